@@ -1,12 +1,345 @@
 """Contains Advice that can cache task results in a local file system."""
+import atexit
+import collections
+import contextlib
+import fcntl
 import logging
+import os
 import pathlib
+import queue
+import sqlite3
+import threading
+import time
 
 from ..advice import Advice
+from ..cache.directory import DirectoryBackend
+from ..cache.statistics import CacheStatistics
+from ..io import MappedFileStream
 
 
 logger = logging.getLogger(__name__)
 
+# The number of accesses of results in memory, which are written to the index at once
+_ACCESS_BATCH_SIZE = 100
+
+
+class MemoryCache:
+    """
+    In-memory cache of results, that evicts the least recently used results.
+
+    The cache is bounded by the number of results and by their estimated size in
+    bytes. The results are returned as they are stored, without copying them.
+
+    Attributes:
+        max_entries (int): The maximum number of results in the cache. If `None`,
+            the number is not limited.
+        max_bytes (int): The maximum estimated size in bytes of all results in the
+            cache. If `None`, the size is not limited.
+        hits (int): The number of lookups which returned a result.
+        misses (int): The number of lookups which didn't find a result.
+        evictions (int): The number of results, which were evicted from the cache.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    # is reasonable in this case, the counters are part of the public state.
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns a result from the cache.
+
+        Args:
+            key (Tuple[str,str]): The key of the result.
+
+        Returns:
+            bandsaw.result.Result: The cached result or `None` if the cache doesn't
+                contain a result for the key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result, size):
+        """
+        Adds a result to the cache.
+
+        Args:
+            key (Tuple[str,str]): The key of the result.
+            result (bandsaw.result.Result): The result to cache.
+            size (int): The estimated size of the result in bytes, e.g. the size of
+                the serialized result.
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.debug("Result %s is too large for memory cache", key)
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (result, size)
+            self._size += size
+            while (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ) or (self.max_bytes is not None and self._size > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def remove(self, key):
+        """
+        Removes a result from the cache.
+
+        Args:
+            key (Tuple[str,str]): The key of the result. If the cache doesn't
+                contain a result for the key, nothing happens.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """The estimated size in bytes of all results in the cache."""
+        return self._size
+
+
+class CacheIndex:
+    """
+    Index of the items in a cache directory, which keeps their sizes and times.
+
+    The index is stored in a SQLite database and can be shared between multiple
+    processes. It allows to find the least recently used or expired items without
+    walking the cache directory. The total size of all items is kept up to date by
+    triggers in the database, so that it doesn't need to be summed up. Items with
+    the same content id share their storage and are only counted once.
+    """
+
+    def __init__(self, path):
+        """
+        Create a new index.
+
+        Args:
+            path (pathlib.Path): The path to the database file of the index. The file
+                is created if it doesn't exist yet.
+        """
+        self.path = pathlib.Path(path)
+        self._connections = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._connections, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=60)
+            # Replaced items must fire the delete trigger to keep the total size
+            connection.execute('PRAGMA recursive_triggers = ON')
+            connection.executescript(
+                'BEGIN IMMEDIATE;'
+                'CREATE TABLE IF NOT EXISTS items ('
+                ' task_id TEXT NOT NULL,'
+                ' execution_id TEXT NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' created REAL NOT NULL,'
+                ' accessed REAL NOT NULL,'
+                ' content TEXT,'
+                ' PRIMARY KEY (task_id, execution_id));'
+                'COMMIT;'
+            )
+            _add_content_column(connection)
+            connection.executescript(
+                'BEGIN IMMEDIATE;'
+                'CREATE INDEX IF NOT EXISTS items_accessed ON items (accessed);'
+                'CREATE INDEX IF NOT EXISTS items_created ON items (created);'
+                'CREATE INDEX IF NOT EXISTS items_content ON items (content);'
+                'CREATE TABLE IF NOT EXISTS totals ('
+                ' id INTEGER PRIMARY KEY CHECK (id = 0),'
+                ' size INTEGER NOT NULL);'
+                'INSERT OR IGNORE INTO totals SELECT 0,'
+                ' (SELECT COALESCE(SUM(size), 0) FROM items WHERE content IS NULL)'
+                ' + (SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size'
+                '    FROM items WHERE content IS NOT NULL GROUP BY content));'
+                # Recreated, in case the index was created with older definitions
+                'DROP TRIGGER IF EXISTS items_inserted;'
+                'DROP TRIGGER IF EXISTS items_deleted;'
+                'DROP TRIGGER IF EXISTS items_resized;'
+                'CREATE TRIGGER items_inserted AFTER INSERT ON items'
+                ' WHEN new.content IS NULL'
+                '  OR (SELECT COUNT(*) FROM items WHERE content = new.content) = 1'
+                ' BEGIN UPDATE totals SET size = size + new.size; END;'
+                'CREATE TRIGGER items_deleted AFTER DELETE ON items'
+                ' WHEN old.content IS NULL'
+                '  OR NOT EXISTS (SELECT 1 FROM items WHERE content = old.content)'
+                ' BEGIN UPDATE totals SET size = size - old.size; END;'
+                'CREATE TRIGGER items_resized AFTER UPDATE OF size ON items'
+                ' WHEN old.content IS NULL AND new.content IS NULL'
+                ' BEGIN UPDATE totals SET size = size - old.size + new.size; END;'
+                'COMMIT;'
+            )
+            self._connections.connection = connection
+        return connection
+
+    def add(self, task_id, execution_id, size, content_id=None):
+        """
+        Adds a newly stored item to the index.
+
+        Args:
+            task_id (str): The id of the task of the item.
+            execution_id (str): The id of the execution of the item.
+            size (int): The size of the item in bytes.
+            content_id (str): The id of the content of the item, if it shares its
+                storage with other items of the same content. Defaults to `None`.
+        """
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)',
+                (task_id, execution_id, size, now, now, content_id),
+            )
+
+    def touch(self, task_id, execution_id, size):
+        """
+        Updates the access time of an item.
+
+        Items that aren't part of the index yet, e.g. because they were stored
+        before the index was created, are added.
+
+        Args:
+            task_id (str): The id of the task of the item.
+            execution_id (str): The id of the execution of the item.
+            size (int): The size of the item in bytes.
+        """
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?, ?, NULL)',
+                (task_id, execution_id, size, now, now),
+            )
+            connection.execute(
+                'UPDATE items SET accessed = ? WHERE task_id = ? AND execution_id = ?',
+                (now, task_id, execution_id),
+            )
+
+    def update_access_times(self, accesses):
+        """
+        Updates the access times of items, which are part of the index.
+
+        Items that aren't part of the index are ignored, e.g. because they were
+        evicted since they were accessed.
+
+        Args:
+            accesses (Iterable[Tuple[str,str,float]]): The task and execution ids of
+                the accessed items and the times of the accesses in seconds since the
+                epoch.
+        """
+        with self._connection() as connection:
+            connection.executemany(
+                'UPDATE items SET accessed = MAX(accessed, ?) '
+                'WHERE task_id = ? AND execution_id = ?',
+                (
+                    (accessed, task_id, execution_id)
+                    for task_id, execution_id, accessed in accesses
+                ),
+            )
+
+    def created(self, task_id, execution_id):
+        """
+        Returns the time when an item was stored.
+
+        Args:
+            task_id (str): The id of the task of the item.
+            execution_id (str): The id of the execution of the item.
+
+        Returns:
+            float: The time as seconds since the epoch or `None` if the item isn't
+                part of the index.
+        """
+        row = (
+            self._connection()
+            .execute(
+                'SELECT created FROM items WHERE task_id = ? AND execution_id = ?',
+                (task_id, execution_id),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return row[0]
+
+    def remove(self, task_id, execution_id):
+        """
+        Removes an item from the index.
+
+        Args:
+            task_id (str): The id of the task of the item.
+            execution_id (str): The id of the execution of the item.
+        """
+        with self._connection() as connection:
+            connection.execute(
+                'DELETE FROM items WHERE task_id = ? AND execution_id = ?',
+                (task_id, execution_id),
+            )
+
+    def total_size(self):
+        """The total size in bytes of all items in the index as `int`."""
+        row = self._connection().execute('SELECT size FROM totals').fetchone()
+        return row[0]
+
+    def created_before(self, timestamp):
+        """
+        Returns the items, that were stored before a point in time.
+
+        Args:
+            timestamp (float): The point in time as seconds since the epoch.
+
+        Returns:
+            List[Tuple[str,str]]: The task and execution ids of the items.
+        """
+        return self._connection().execute(
+            'SELECT task_id, execution_id FROM items WHERE created < ?',
+            (timestamp,),
+        ).fetchall()
+
+    def least_recently_used(self):
+        """
+        Iterates over all items, starting with the least recently used one.
+
+        Yields:
+            Tuple[str,str,int]: The task and execution ids and the size of the item.
+        """
+        yield from self._connection().execute(
+            'SELECT task_id, execution_id, size FROM items ORDER BY accessed'
+        )
+
+
+def _add_content_column(connection):
+    """Adds the column `content` to indexes, that were created without it."""
+    columns = [row[1] for row in connection.execute('PRAGMA table_info(items)')]
+    if 'content' in columns:
+        return
+    try:
+        connection.execute('ALTER TABLE items ADD COLUMN content TEXT')
+    except sqlite3.OperationalError as error:
+        # Another process might have added the column in the meantime
+        if 'duplicate column' not in str(error):
+            raise
+
 
 class CachingAdvice(Advice):
     """
@@ -14,11 +347,143 @@ class CachingAdvice(Advice):
 
     Attributes:
         directory (Path): The path to the directory where the results are cached.
+        backend (bandsaw.cache.backend.Backend): The backend which stores the
+            serialized results.
+        memory_cache (MemoryCache): The in-memory cache in front of the backend or
+            `None` if results are only cached in the backend.
+        max_size (int): The maximum size in bytes of all cached results in the
+            backend or `None` if the size is unlimited.
+        ttl (float): The number of seconds after which cached results expire or
+            `None` if they never expire.
+        index (CacheIndex): The index of the cached results, that is used for
+            evicting them, or `None` if neither `max_size` nor `ttl` is set.
+        single_flight (bool): If `True`, only one process computes a missing result,
+            while other processes wait for it to be stored.
+        lock_timeout (float): The maximum number of seconds to wait for another
+            process computing the same result or `None` to wait indefinitely.
+        cache_exceptions (Union[bool,Tuple[type]]): Which exceptions raised by
+            tasks are cached.
+        exception_ttl (float): The number of seconds after which cached exceptions
+            expire or `None` if they never expire.
+        memory_map (bool): If `True`, cached results stored in files are
+            memory-mapped when they are read.
+        write_behind (bool): If `True`, results are stored by a background thread.
+        statistics (bandsaw.cache.statistics.CacheStatistics): Statistics about the
+            hits, misses and stores per task.
     """
 
-    def __init__(self, directory):
+    # pylint: disable=too-many-instance-attributes
+    # is reasonable in this case, the attributes are the options of the cache.
+
+    def __init__(
+        self,
+        directory,
+        memory_cache_entries=None,
+        memory_cache_bytes=None,
+        max_size=None,
+        ttl=None,
+        single_flight=False,
+        lock_timeout=None,
+        cache_exceptions=False,
+        exception_ttl=None,
+        content_addressed=False,
+        backend=None,
+        memory_map=False,
+        write_behind=False,
+        max_pending_writes=16,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Create a new instance.
+
+        Args:
+            directory (str): The directory where the results are cached. If a
+                different `backend` is used, the directory still contains the index
+                and the lock files.
+            memory_cache_entries (int): If set, recently used results are
+                additionally kept in memory, up to this number of results.
+            memory_cache_bytes (int): If set, recently used results are additionally
+                kept in memory, up to this size in bytes. The size of a result is
+                estimated by the size of its serialized form.
+            max_size (int): If set, the least recently used results are evicted from
+                the backend, whenever a new result is stored and the size of all
+                results exceeds this number of bytes.
+            ttl (float): If set, cached results expire after this number of seconds
+                and are evicted.
+            single_flight (bool): If `True`, a process that misses a result takes a
+                lock file for it, while computing the result. Other processes
+                missing the same result wait for the lock and read the stored result
+                instead of computing it again. Defaults to `False`.
+            lock_timeout (float): The maximum number of seconds to wait for the lock
+                of a result. If the lock isn't acquired in time, the result is
+                computed anyway. Defaults to `None`, which waits indefinitely.
+            cache_exceptions (Union[bool,Tuple[type]]): If `True`, exceptions raised
+                by tasks are cached like results, so that the tasks aren't executed
+                again. If a tuple of exception types is given, only exceptions of
+                these types are cached. This should only be used for exceptions,
+                that are deterministic. Defaults to `False`.
+            exception_ttl (float): If set, cached exceptions expire after this number
+                of seconds, so that the task is executed again. Defaults to `None`.
+            content_addressed (bool): If `True`, serialized results are stored once
+                as blobs named by the hash of their content in the `blobs` directory
+                within `directory`. The cache items are hard links to these blobs,
+                so identical results of different executions share the same storage.
+                Defaults to `False`. Can't be used together with `backend`.
+            backend (bandsaw.cache.backend.Backend): The backend which stores the
+                serialized results. Defaults to a
+                `bandsaw.cache.directory.DirectoryBackend` storing the results as
+                files in `directory`.
+            memory_map (bool): If `True`, cached results, which the backend stores
+                in files, are memory-mapped and passed to the serializer as
+                `bandsaw.io.MappedFileStream`. Serializers that support it, like the
+                `PickleSerializer` with out-of-band buffers, return views into the
+                mapped file instead of reading it, so large results are only loaded
+                when they are accessed. Defaults to `False`.
+            write_behind (bool): If `True`, results are serialized and stored by a
+                background thread, so that `after()` returns without waiting for
+                the write. Results which are still waiting to be written are used
+                for executions in the same process as if they were stored.
+                Pending writes are flushed when the interpreter exits. Results must
+                not be modified until they are written. Defaults to `False`.
+            max_pending_writes (int): The maximum number of results waiting to be
+                written by the background thread. If more results are stored,
+                `after()` blocks until the background thread has caught up.
+                Defaults to 16.
+
+        Raises:
+            ValueError: If `content_addressed` is used together with `backend`.
+        """
         self.directory = pathlib.Path(directory)
-        logger.info("Caching artifacts in storage '%s'", self.directory)
+        if backend is None:
+            backend = DirectoryBackend(self.directory, content_addressed)
+        elif content_addressed:
+            raise ValueError("content_addressed can't be used with a custom backend")
+        self.backend = backend
+        logger.info(
+            "Caching artifacts in storage '%s' using %s",
+            self.directory,
+            type(self.backend).__name__,
+        )
+        self.memory_cache = None
+        if memory_cache_entries is not None or memory_cache_bytes is not None:
+            self.memory_cache = MemoryCache(memory_cache_entries, memory_cache_bytes)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.index = None
+        if max_size is not None or ttl is not None:
+            self.index = CacheIndex(self.directory / 'index.sqlite')
+        self.single_flight = single_flight
+        self.lock_timeout = lock_timeout
+        self.cache_exceptions = cache_exceptions
+        self.exception_ttl = exception_ttl
+        self.memory_map = memory_map
+        self.write_behind = write_behind
+        self._writer = None
+        if write_behind:
+            self._writer = _BackgroundWriter(self._store_result, max_pending_writes)
+        self.statistics = CacheStatistics()
+        self._locks = {}
+        self._accesses = {}
+        self._accesses_lock = threading.Lock()
         super().__init__()
 
     def before(self, session):
@@ -27,31 +492,397 @@ class CachingAdvice(Advice):
 
         cache_item_path = self.directory / artifact_id / revision_id
         session.context['cache-item-path'] = str(cache_item_path)
-        if (
-            session.task.advice_parameters.get('cache', True)
-            and cache_item_path.exists()
+        if not session.task.advice_parameters.get('cache', True):
+            session.proceed()
+            return
+
+        # Expired results are removed from the memory cache as well
+        if self.memory_cache is not None and not self._is_expired(
+            artifact_id, revision_id
         ):
-            logger.info("Using result from cache '%s'", cache_item_path)
+            result = self.memory_cache.get((artifact_id, revision_id))
+            if result is not None:
+                logger.info("Using result from memory cache '%s'", cache_item_path)
+                self._record_memory_hit(session)
+                session.conclude(result)
+                return
 
-            with open(cache_item_path, 'rb') as stream:
-                result = session.serializer.deserialize(stream)
+        if self._writer is not None:
+            result = self._writer.pending((artifact_id, revision_id))
+            if result is not None:
+                logger.info("Using result waiting to be stored '%s'", cache_item_path)
+                self._record_memory_hit(session)
+                session.conclude(result)
+                return
+
+        result = self._read_cached_result(session)
+        if result is None and self.single_flight:
+            result = self._read_cached_result_with_lock(session, cache_item_path)
+        if result is not None:
+            session.context['cache']['lookup'] = 'hit'
             session.conclude(result)
             return
-        session.proceed()
+        self.statistics.record_miss(artifact_id)
+        session.context['cache']['lookup'] = 'miss'
+        try:
+            session.proceed()
+        except BaseException:
+            # `after()` isn't called if a following advice or the task raises
+            self._release_session_lock(session)
+            raise
 
     def after(self, session):
-        if session.result.value:
-            cache_item_path = pathlib.Path(session.context['cache-item-path'])
+        lock_file = self._locks.pop(id(session), None)
+        key = (session.task.task_id, session.execution.execution_id)
+        try:
             if (
-                session.task.advice_parameters.get('cache', True)
-                and not cache_item_path.exists()
+                self._is_cacheable(session.result)
+                and session.task.advice_parameters.get('cache', True)
+                and not self._is_stored(key)
             ):
-                cache_item_directory = cache_item_path.parent
-                if not cache_item_directory.exists():
-                    cache_item_directory.mkdir(parents=True)
+                if self._writer is not None:
+                    # The lock is released by the writer once the result is stored
+                    self._writer.submit(
+                        key, session.result, session.serializer, lock_file
+                    )
+                    lock_file = None
+                else:
+                    size, seconds = self._store_result(
+                        key, session.result, session.serializer
+                    )
+                    session.context['cache']['bytes-written'] = size
+                    session.context['cache']['serialize-seconds'] = seconds
+        finally:
+            if lock_file is not None:
+                _release_lock(lock_file)
+        session.proceed()
 
-                logger.info("Storing result in cache '%s'", cache_item_path)
+    def _read_cached_result_with_lock(self, session, cache_item_path):
+        """
+        Reads a cached result after acquiring the lock for computing it.
 
-                with open(cache_item_path, 'wb') as stream:
-                    session.serializer.serialize(session.result, stream)
-        session.proceed()
+        If the result isn't cached, the lock is kept for the session, until the
+        computed result is stored or the session failed.
+        """
+        lock_file = self._acquire_lock(cache_item_path)
+        # Another process might have stored the result while we were waiting
+        result = self._read_cached_result(session)
+        if lock_file is not None:
+            if result is None:
+                self._locks[id(session)] = lock_file
+            else:
+                _release_lock(lock_file)
+        return result
+
+    def _release_session_lock(self, session):
+        lock_file = self._locks.pop(id(session), None)
+        if lock_file is not None:
+            _release_lock(lock_file)
+
+    def flush(self):
+        """
+        Waits until all results, that are written in the background, are stored.
+
+        Does nothing if `write_behind` isn't enabled.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+    def _record_memory_hit(self, session):
+        self.statistics.record_hit(session.task.task_id)
+        session.context['cache']['lookup'] = 'memory'
+        if self.index is not None:
+            key = (session.task.task_id, session.execution.execution_id)
+            with self._accesses_lock:
+                self._accesses[key] = time.time()
+                batch_complete = len(self._accesses) >= _ACCESS_BATCH_SIZE
+            if batch_complete:
+                self._write_accesses()
+
+    def _write_accesses(self):
+        """
+        Writes the access times of results returned from memory to the index.
+
+        The accesses are written in batches, so that returning results from memory
+        doesn't require writing to the index every time.
+        """
+        with self._accesses_lock:
+            accesses = self._accesses
+            self._accesses = {}
+        if accesses:
+            self.index.update_access_times(
+                (task_id, execution_id, accessed)
+                for (task_id, execution_id), accessed in accesses.items()
+            )
+
+    def _is_stored(self, key):
+        if self._writer is not None and self._writer.pending(key) is not None:
+            return True
+        return self.backend.contains(*key)
+
+    def _is_cacheable(self, result):
+        if result.exception is None:
+            return True
+        if self.cache_exceptions is True:
+            return True
+        if not self.cache_exceptions:
+            return False
+        return isinstance(result.exception, self.cache_exceptions)
+
+    def _read_cached_result(self, session):
+        artifact_id = session.task.task_id
+        revision_id = session.execution.execution_id
+        if self._is_expired(artifact_id, revision_id):
+            return None
+        stream = self.backend.open(artifact_id, revision_id)
+        if stream is None:
+            return None
+        if self.memory_map:
+            stream = MappedFileStream.from_stream(stream)
+
+        logger.info("Using result from cache '%s/%s'", artifact_id, revision_id)
+        start = time.perf_counter()
+        with stream:
+            result = session.serializer.deserialize(stream)
+            size = stream.tell()
+        seconds = time.perf_counter() - start
+        if _exception_of(result) is not None and self.exception_ttl is not None:
+            stored_at = self.backend.stored_at(artifact_id, revision_id)
+            if stored_at is not None and stored_at < time.time() - self.exception_ttl:
+                logger.info(
+                    "Cached exception in '%s/%s' expired", artifact_id, revision_id
+                )
+                self._remove_item(artifact_id, revision_id)
+                return None
+        if self.index is not None:
+            self.index.touch(artifact_id, revision_id, size)
+        self._remember(artifact_id, revision_id, result, size)
+        self.statistics.record_hit(artifact_id, size, seconds)
+        session.context['cache']['bytes-read'] = size
+        session.context['cache']['deserialize-seconds'] = seconds
+        return result
+
+    def _store_result(self, key, result, serializer):
+        """
+        Serializes a result and stores it in the backend.
+
+        Returns:
+            Tuple[int,float]: The size in bytes of the serialized result and the
+                duration of storing it in seconds.
+        """
+        artifact_id, revision_id = key
+        logger.info("Storing result in cache '%s/%s'", artifact_id, revision_id)
+        start = time.perf_counter()
+        with self.backend.store(artifact_id, revision_id) as stream:
+            serializer.serialize(result, stream)
+            size = stream.tell()
+        seconds = time.perf_counter() - start
+        self.statistics.record_store(artifact_id, size, seconds)
+
+        self._remember(artifact_id, revision_id, result, size)
+        if self.index is not None:
+            self.index.add(
+                artifact_id,
+                revision_id,
+                size,
+                self.backend.content_id(artifact_id, revision_id),
+            )
+            self.evict()
+        return size, seconds
+
+    def _acquire_lock(self, cache_item_path):
+        """
+        Acquires the lock for computing a cache item.
+
+        Returns:
+            io.BufferedWriter: The opened lock file, which holds the lock until it is
+                released by `_release_lock()`, or `None` if the lock couldn't be
+                acquired within `lock_timeout`.
+        """
+        lock_path = cache_item_path.with_name(cache_item_path.name + '.lock')
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        deadline = None
+        if self.lock_timeout is not None:
+            deadline = time.monotonic() + self.lock_timeout
+        while True:
+            lock_file = open(lock_path, 'wb')  # pylint: disable=consider-using-with
+            if not _lock_file(lock_file, deadline):
+                logger.warning(
+                    "Timeout while waiting for lock '%s', computing result "
+                    "without it",
+                    lock_path,
+                )
+                lock_file.close()
+                return None
+            # The previous holder removes the lock file when releasing the lock, in
+            # which case the lock has to be taken on the new file
+            if _is_same_file(lock_file, lock_path):
+                return lock_file
+            lock_file.close()
+
+    def evict(self):
+        """
+        Evicts expired results and the least recently used results from the cache.
+
+        Results are evicted, until the size of all remaining results doesn't exceed
+        `max_size`. This is done automatically whenever a new result is stored, but
+        can be called explicitly, e.g. to clean up a cache that isn't written to.
+        """
+        if self.index is None:
+            return
+        self._write_accesses()
+        if self.ttl is not None:
+            for artifact_id, revision_id in self.index.created_before(
+                time.time() - self.ttl
+            ):
+                self._remove_item(artifact_id, revision_id)
+        if self.max_size is not None:
+            # Removing an item doesn't free its size, if other items share its
+            # content, therefore the total size is checked after each removal
+            while self.index.total_size() > self.max_size:
+                artifact_id, revision_id, _ = next(self.index.least_recently_used())
+                self._remove_item(artifact_id, revision_id)
+
+    def _is_expired(self, artifact_id, revision_id):
+        if self.index is None or self.ttl is None:
+            return False
+        created = self.index.created(artifact_id, revision_id)
+        if created is None or created >= time.time() - self.ttl:
+            return False
+        self._remove_item(artifact_id, revision_id)
+        return True
+
+    def _remove_item(self, artifact_id, revision_id):
+        logger.info("Evicting result from cache '%s/%s'", artifact_id, revision_id)
+        self.backend.remove(artifact_id, revision_id)
+        if self.index is not None:
+            self.index.remove(artifact_id, revision_id)
+        if self.memory_cache is not None:
+            self.memory_cache.remove((artifact_id, revision_id))
+
+    def _remember(self, artifact_id, revision_id, result, size):
+        if self.memory_cache is not None and _exception_of(result) is None:
+            self.memory_cache.put((artifact_id, revision_id), result, size)
+
+
+def _lock_file(lock_file, deadline):
+    """
+    Locks a file exclusively.
+
+    Returns:
+        bool: `True` if the file was locked, `False` if the `deadline` in monotonic
+            time passed before. If `deadline` is `None`, this waits indefinitely.
+    """
+    if deadline is None:
+        logger.debug("Waiting for lock '%s'", lock_file.name)
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return True
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
+def _is_same_file(lock_file, lock_path):
+    try:
+        path_stat = os.stat(lock_path)
+    except FileNotFoundError:
+        return False
+    return os.path.samestat(os.fstat(lock_file.fileno()), path_stat)
+
+
+def _release_lock(lock_file):
+    """Removes a lock file acquired by `CachingAdvice._acquire_lock()`, unlocking it."""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(lock_file.name)
+    lock_file.close()
+
+
+def _exception_of(result):
+    # Cache items are expected to contain `Result` objects, but tolerate plain values
+    return getattr(result, 'exception', None)
+
+
+class _BackgroundWriter:
+    """
+    Stores results in a background thread.
+
+    The results are queued in a bounded queue, which is processed by a single
+    daemon thread, that is started with the first result. Results are kept
+    available until they are written, so that they can be returned from the cache.
+    """
+
+    def __init__(self, store, max_pending):
+        """
+        Create a new writer.
+
+        Args:
+            store (Callable[[Tuple[str,str],bandsaw.result.Result,Serializer],None]):
+                The function, that stores a result.
+            max_pending (int): The maximum number of results in the queue.
+        """
+        self._store = store
+        self._queue = queue.Queue(max_pending)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, key, result, serializer, lock_file=None):
+        """
+        Queues a result for being stored.
+
+        Blocks if the queue is full.
+
+        Args:
+            key (Tuple[str,str]): The task and execution id of the result.
+            result (bandsaw.result.Result): The result to store.
+            serializer (bandsaw.serialization.Serializer): The serializer used for
+                serializing the result.
+            lock_file (io.BufferedWriter): A lock file, which is released after the
+                result is stored.
+        """
+        with self._lock:
+            self._pending[key] = result
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='bandsaw-cache-writer', daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush)
+        self._queue.put((key, result, serializer, lock_file))
+
+    def pending(self, key):
+        """
+        Returns a result, which waits to be stored.
+
+        Args:
+            key (Tuple[str,str]): The task and execution id of the result.
+
+        Returns:
+            bandsaw.result.Result: The result or `None` if no result with this key
+                waits to be stored.
+        """
+        with self._lock:
+            return self._pending.get(key)
+
+    def flush(self):
+        """Waits until all queued results are stored."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            key, result, serializer, lock_file = self._queue.get()
+            try:
+                self._store(key, result, serializer)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Storing result '%s/%s' failed", *key)
+            finally:
+                if lock_file is not None:
+                    _release_lock(lock_file)
+                with self._lock:
+                    self._pending.pop(key, None)
+                self._queue.task_done()
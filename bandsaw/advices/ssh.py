@@ -1,13 +1,21 @@
 """Contains code for running tasks remotely via SSH"""
 import abc
+import atexit
+import contextlib
+import hashlib
 import io
 import logging
 import os
 import pathlib
+import shutil
 import subprocess
+import tempfile
+import threading
+import uuid
 
 from bandsaw.advice import Advice
 from bandsaw.user import get_current_username
+from .ssh_pool import RemotePool
 
 
 logger = logging.getLogger(__name__)
@@ -28,6 +36,27 @@ class SshBackend(abc.ABC):
             remote_path (str): Remote path to the directory that should be created.
         """
 
+    def create_private_dir(self, remote, remote_path):
+        """
+        Create a directory on a remote machine, which only its user can access.
+
+        The directory must be owned by the user of the remote and must not be
+        accessible by other users, because the files in it are trusted, e.g. the
+        distribution archives which are executed. Backends that don't implement this
+        create the directory using `create_dir()`, without restricting its access.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): Remote machine where a directory will
+                be created.
+            remote_path (pathlib.Path): Remote path to the directory that should be
+                created.
+
+        Raises:
+            subprocess.CalledProcessError: If the directory can't be created or
+                exists, but isn't owned by the user of the remote.
+        """
+        self.create_dir(remote, remote_path)
+
     def copy_file_to_remote(self, remote, local_path, remote_path):
         """
         Copies a local file or directory to a remote machine.
@@ -70,6 +99,24 @@ class SshBackend(abc.ABC):
                 Its return code will be available through the exception.
         """
 
+    def execute_remote_with_pipe(self, remote, input_data, executable, *arguments):
+        """
+        Execute an executable on a remote machine and exchange data via its stdin
+        and stdout.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): Remote machine where the executable
+                should be executed.
+            input_data (bytes): The data which is written to stdin of the executable.
+            executable (str): Path to the executable on the remote machine.
+            *arguments (str): Additional arguments for the executable.
+
+        Backends that don't implement this can't be used with the transfer `pipe`.
+
+        Returns:
+            bytes: The data, which the executable wrote to stdout.
+        """
+
     def delete_dir(self, remote, remote_path):
         """
         Delete a directory on a remote machine.
@@ -80,12 +127,93 @@ class SshBackend(abc.ABC):
             remote_path (str): Remote path to the directory that should be deleted.
         """
 
+    def path_exists(self, remote, remote_path):
+        """
+        Checks if a file or directory exists on a remote machine.
+
+        Backends that don't support this return `False`, which makes the callers
+        assume, that the file needs to be created.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): Remote machine where the path is
+                checked.
+            remote_path (pathlib.Path): Remote path to check.
+
+        Returns:
+            bool: `True` if the path exists, otherwise `False`.
+        """
+        # pylint: disable=unused-argument,no-self-use
+        return False
+
+    def move(self, remote, remote_source, remote_destination):
+        """
+        Moves a file on a remote machine.
+
+        Backends that don't implement this can't move files atomically, therefore
+        files are copied to their final path directly instead.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): Remote machine where the file is
+                moved.
+            remote_source (pathlib.Path): Remote path of the file to move.
+            remote_destination (pathlib.Path): Remote path where the file is moved
+                to. An existing file is replaced.
+        """
+
+
+def _overrides(backend, method_name):
+    """
+    Returns if a backend implements an optional method of the `SshBackend` interface.
+    """
+    return getattr(type(backend), method_name, None) is not getattr(
+        SshBackend, method_name
+    )
+
 
 class SshCommandLineBackend(SshBackend):
     """
     SSH backend that uses the SSH command line tools.
+
+    By default, every command opens a new SSH connection. If `multiplex` is enabled,
+    a master connection is opened for each remote machine the first time it is used,
+    which is then shared by all following `ssh` and `scp` commands, so that they
+    don't need to connect and authenticate again. The master connections are closed
+    when the interpreter exits, or after they haven't been used for
+    `control_persist` seconds, if the interpreter is killed.
+
+    Attributes:
+        multiplex (bool): If the connections to a remote machine are multiplexed
+            over a single master connection.
+        control_persist (int): The number of seconds, after which an unused master
+            connection is closed.
     """
 
+    def __init__(self, multiplex=False, control_directory=None, control_persist=60):
+        """
+        Create a new backend.
+
+        Args:
+            multiplex (bool): If `True`, the commands for a remote machine share a
+                single master connection. Defaults to `False`.
+            control_directory (str): The directory, where the control sockets of the
+                master connections are created. The paths of sockets are limited to
+                about 100 characters, so this should be a short path. If `None`, a
+                new temporary directory is used.
+            control_persist (int): The number of seconds, after which a master
+                connection, that isn't used by any command, is closed. Commands after
+                that open a new connection. Defaults to 60 seconds.
+        """
+        self.multiplex = multiplex
+        self.control_persist = control_persist
+        self._control_directory = None
+        if control_directory is not None:
+            self._control_directory = pathlib.Path(control_directory)
+        self._masters = {}
+        self._master_locks = {}
+        self._close_registered = False
+        self._masters_lock = threading.Lock()
+        super().__init__()
+
     def create_dir(self, remote, remote_path):
         return self._run(
             [
@@ -94,6 +222,7 @@ class SshCommandLineBackend(SshBackend):
                 str(remote.port),
             ]
             + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
             + [
                 self.login(remote),
                 'mkdir',
@@ -102,6 +231,39 @@ class SshCommandLineBackend(SshBackend):
             ]
         )
 
+    def create_private_dir(self, remote, remote_path):
+        # An existing directory is only used, if it belongs to the user
+        return self._run(
+            [
+                'ssh',
+                '-p',
+                str(remote.port),
+            ]
+            + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
+            + [
+                self.login(remote),
+                'mkdir',
+                '-p',
+                '-m',
+                '700',
+                str(remote_path),
+                '&&',
+                'test',
+                '!',
+                '-L',
+                str(remote_path),
+                '&&',
+                'test',
+                '-O',
+                str(remote_path),
+                '&&',
+                'chmod',
+                '700',
+                str(remote_path),
+            ]
+        )
+
     def copy_file_to_remote(self, remote, local_path, remote_path):
         copy_destination = self.get_remote_path(remote, remote_path)
         self._run(
@@ -111,6 +273,7 @@ class SshCommandLineBackend(SshBackend):
                 str(remote.port),
             ]
             + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
             + [
                 str(local_path),
                 copy_destination,
@@ -126,6 +289,7 @@ class SshCommandLineBackend(SshBackend):
                 str(remote.port),
             ]
             + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
             + [
                 copy_source,
                 str(local_path),
@@ -140,6 +304,7 @@ class SshCommandLineBackend(SshBackend):
                 str(remote.port),
             ]
             + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
             + [
                 self.login(remote),
                 str(executable),
@@ -147,6 +312,29 @@ class SshCommandLineBackend(SshBackend):
             + list(arguments),
         )
 
+    def execute_remote_with_pipe(self, remote, input_data, executable, *arguments):
+        command = (
+            [
+                'ssh',
+                '-p',
+                str(remote.port),
+            ]
+            + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
+            + [
+                self.login(remote),
+                str(executable),
+            ]
+            + list(arguments)
+        )
+        logger.debug("running command %s", command)
+        return subprocess.run(
+            command,
+            input=input_data,
+            stdout=subprocess.PIPE,
+            check=True,
+        ).stdout
+
     def delete_dir(self, remote, remote_path):
         return self._run(
             [
@@ -155,6 +343,7 @@ class SshCommandLineBackend(SshBackend):
                 str(remote.port),
             ]
             + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
             + [
                 self.login(remote),
                 'rm',
@@ -163,6 +352,141 @@ class SshCommandLineBackend(SshBackend):
             ]
         )
 
+    def path_exists(self, remote, remote_path):
+        command = (
+            [
+                'ssh',
+                '-p',
+                str(remote.port),
+            ]
+            + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
+            + [
+                self.login(remote),
+                'test',
+                '-e',
+                str(remote_path),
+            ]
+        )
+        logger.debug("running command %s", command)
+        return subprocess.call(command) == 0
+
+    def move(self, remote, remote_source, remote_destination):
+        return self._run(
+            [
+                'ssh',
+                '-p',
+                str(remote.port),
+            ]
+            + self._key_file_option(remote)
+            + self._multiplexing_options(remote)
+            + [
+                self.login(remote),
+                'mv',
+                '-f',
+                str(remote_source),
+                str(remote_destination),
+            ]
+        )
+
+    def close(self):
+        """Closes all master connections opened for multiplexing."""
+        with self._masters_lock:
+            masters = list(self._masters.items())
+            self._masters.clear()
+        for (user, host, port, _), control_path in masters:
+            if control_path is None:
+                continue
+            logger.info("Closing master connection to %s", host)
+            try:
+                self._run(
+                    [
+                        'ssh',
+                        '-p',
+                        str(port),
+                        '-o',
+                        f'ControlPath={control_path}',
+                        '-O',
+                        'exit',
+                        f'{user}@{host}',
+                    ]
+                )
+            except (subprocess.CalledProcessError, OSError) as error:
+                logger.warning("Failed to close master connection: %s", error)
+
+    def _multiplexing_options(self, remote):
+        if not self.multiplex:
+            return []
+        key = (remote.user, remote.host, remote.port, remote.key_file)
+        with self._masters_lock:
+            master_lock = self._master_locks.setdefault(key, threading.Lock())
+        # Only connections to the same remote wait for the master connection
+        with master_lock:
+            with self._masters_lock:
+                opened = key in self._masters
+                control_path = self._masters.get(key)
+            if not opened:
+                control_path = self._open_master(remote, key)
+                with self._masters_lock:
+                    self._masters[key] = control_path
+        if control_path is None:
+            return []
+        # If the master connection is gone, ssh falls back to a new connection
+        return ['-o', 'ControlMaster=no', '-o', f'ControlPath={control_path}']
+
+    def _open_master(self, remote, key):
+        """
+        Opens a master connection to a remote machine, which runs in the background.
+
+        Returns:
+            pathlib.Path: The path of the control socket of the master connection or
+                `None`, if the connection couldn't be opened.
+        """
+        with self._masters_lock:
+            if self._control_directory is None:
+                self._control_directory = pathlib.Path(
+                    tempfile.mkdtemp(prefix='bandsaw-ssh-')
+                )
+                atexit.register(
+                    shutil.rmtree, str(self._control_directory), ignore_errors=True
+                )
+            if not self._close_registered:
+                atexit.register(self.close)
+                self._close_registered = True
+            self._control_directory.mkdir(parents=True, exist_ok=True)
+            name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+            control_path = self._control_directory / name
+
+        logger.info("Opening master connection to %s", remote.host)
+        try:
+            self._run(
+                [
+                    'ssh',
+                    '-p',
+                    str(remote.port),
+                ]
+                + self._key_file_option(remote)
+                + [
+                    '-o',
+                    'ControlMaster=yes',
+                    '-o',
+                    f'ControlPath={control_path}',
+                    '-o',
+                    f'ControlPersist={self.control_persist}',
+                    '-f',
+                    '-N',
+                    self.login(remote),
+                ]
+            )
+        except subprocess.CalledProcessError as error:
+            logger.warning(
+                "Can't open master connection to %s, using separate connections: %s",
+                remote.host,
+                error,
+            )
+            return None
+        return control_path
+
     @staticmethod
     def _run(command):
         logger.debug("running command %s", command)
@@ -229,7 +553,16 @@ class Remote:  # pylint: disable=too-few-public-methods
 class SshAdvice(Advice):
     """Advice that moves and proceeds a session on a remote machine via SSH"""
 
-    def __init__(self, directory=None, backend=SshCommandLineBackend()):
+    # pylint: disable=too-many-instance-attributes
+    # is reasonable in this case, the state is shared by concurrent sessions.
+
+    def __init__(
+        self,
+        directory=None,
+        backend=SshCommandLineBackend(),
+        transfer='file',
+        max_in_flight=None,
+    ):
         """
         Create a new instance.
 
@@ -237,6 +570,18 @@ class SshAdvice(Advice):
             directory (str): The local directory where temporary files are stored to
                 exchange data between the local and the remote machine. If `None`, the
                 temporary directory from the session is used.
+            backend (bandsaw.advices.ssh.SshBackend): The backend which runs the SSH
+                commands. Defaults to a `SshCommandLineBackend`.
+            transfer (str): How the sessions are transferred to and from the remote
+                machine. `file` copies them as files, which are exchanged via
+                temporary directories on both machines. `pipe` sends the session via
+                stdin of the remote process and reads the result from its stdout, all
+                within a single SSH command. Defaults to `file`.
+            max_in_flight (int): The maximum number of sessions per remote machine,
+                which are executed at the same time. Sessions, that are transferred
+                as files, are uploaded before they wait for a free slot, so that the
+                upload of the next session overlaps with the execution of the
+                current one. If `None`, the number isn't limited.
         """
         if directory is None:
             self.directory = None
@@ -245,8 +590,22 @@ class SshAdvice(Advice):
             self.directory = pathlib.Path(directory)
             logger.info("Using directory %s for exchange data", self.directory)
 
+        if transfer not in ('file', 'pipe'):
+            raise ValueError(f"Unknown transfer '{transfer}', use 'file' or 'pipe'")
+        if transfer == 'pipe' and not _overrides(backend, 'execute_remote_with_pipe'):
+            raise ValueError(
+                f"Backend {type(backend).__name__} doesn't support transfer 'pipe'"
+            )
+        self.transfer = transfer
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
         self.remotes = {}
         self._backend = backend
+        self._uploaded_archives = set()
+        self._uploaded_archives_lock = threading.Lock()
         super().__init__()
 
     def add_remote(self, remote, name='default'):
@@ -254,7 +613,9 @@ class SshAdvice(Advice):
         Add a new definition of a remote machine.
 
         Args:
-            remote (bandsaw.advices.ssh.Remote): Definition of the remote machine.
+            remote (Union[Remote, bandsaw.advices.ssh_pool.RemotePool]): Definition
+                of the remote machine or a pool of remote machines, which share the
+                tasks.
             name (str): Name of the remote. Defaults to `default`.
 
         Returns:
@@ -264,7 +625,64 @@ class SshAdvice(Advice):
         return self
 
     def before(self, session):
+        parameters = session.task.advice_parameters
+        remote_name = parameters.get('ssh', {}).get('remote', 'default')
+        remote = self.remotes[remote_name]
+
+        if isinstance(remote, RemotePool):
+            pool = remote
+            remote = pool.acquire()
+            logger.info("Selected remote %s from pool %s", remote.host, remote_name)
+            failed = True
+            try:
+                self._continue_remotely(session, remote, pool)
+                failed = False
+            finally:
+                pool.release(remote, failed=failed)
+        else:
+            self._continue_remotely(session, remote)
+
+        logger.info("Proceed local session")
+        session.proceed()
 
+    def _continue_remotely(self, session, remote, pool=None):
+        archive = session.distribution_archive
+        remote_distribution_archive_path = self._upload_distribution_archive(
+            remote, archive
+        )
+        try:
+            self._continue_with_archive(
+                session, remote, remote_distribution_archive_path, pool
+            )
+        except subprocess.CalledProcessError:
+            if not self._is_archive_missing(remote, remote_distribution_archive_path):
+                raise
+            logger.warning(
+                "Distribution archive %s is missing on host %s, uploading it again",
+                archive.archive_id,
+                remote.host,
+            )
+            self._upload_distribution_archive(remote, archive)
+            self._continue_with_archive(
+                session, remote, remote_distribution_archive_path, pool
+            )
+
+    def _continue_with_archive(
+        self, session, remote, remote_distribution_archive_path, pool
+    ):
+        execution_slot = self._execution_slot(remote, pool)
+        if self.transfer == 'pipe':
+            self._continue_via_pipe(
+                session, remote, remote_distribution_archive_path, execution_slot
+            )
+        else:
+            self._continue_via_files(
+                session, remote, remote_distribution_archive_path, execution_slot
+            )
+
+    def _continue_via_files(
+        self, session, remote, remote_distribution_archive_path, execution_slot
+    ):
         temp_dir = self.directory or session.temp_dir
 
         session_in_path = temp_dir / f'session-{session.session_id}-in.zip'
@@ -274,10 +692,6 @@ class SshAdvice(Advice):
         with io.FileIO(str(session_in_path), mode='w') as stream:
             session.save(stream)
 
-        parameters = session.task.advice_parameters
-        remote_name = parameters.get('ssh', {}).get('remote', 'default')
-        remote = self.remotes[remote_name]
-
         remote_run_directory = remote.directory / session.execution.execution_id
         logger.info(
             "Creating run directory %s on host %s",
@@ -289,17 +703,6 @@ class SshAdvice(Advice):
             remote_run_directory,
         )
 
-        logger.info("Copying over distribution archive to host %s", remote.host)
-        distribution_archive_path = session.distribution_archive.path
-        remote_distribution_archive_path = (
-            remote_run_directory / distribution_archive_path.name
-        )
-        self._backend.copy_file_to_remote(
-            remote,
-            distribution_archive_path,
-            remote_distribution_archive_path,
-        )
-
         logger.info("Copying over session to host %s", remote.host)
         remote_session_in_path = remote_run_directory / session_in_path.name
         self._backend.copy_file_to_remote(
@@ -310,30 +713,32 @@ class SshAdvice(Advice):
 
         remote_session_out_path = remote_run_directory / session_out_path.name
 
-        logger.info(
-            "Running remote process using interpreter %s", remote.interpreter.executable
-        )
-        self._backend.execute_remote(
-            remote,
-            remote.interpreter.executable,
-            str(remote_distribution_archive_path),
-            '--input',
-            str(remote_session_in_path),
-            '--output',
-            str(remote_session_out_path),
-            '--run-id',
-            session.run_id,
-        )
-        # environment = self.interpreter.environment
-        # environment['PYTHONPATH'] = ':'.join(self.interpreter.path)
-        logger.info("Remote process exited")
-
-        logger.info("Copying over session result from host %s", remote.host)
-        self._backend.copy_file_from_remote(
-            remote,
-            remote_session_out_path,
-            session_out_path,
-        )
+        with execution_slot:
+            logger.info(
+                "Running remote process using interpreter %s",
+                remote.interpreter.executable,
+            )
+            self._backend.execute_remote(
+                remote,
+                remote.interpreter.executable,
+                str(remote_distribution_archive_path),
+                '--input',
+                str(remote_session_in_path),
+                '--output',
+                str(remote_session_out_path),
+                '--run-id',
+                session.run_id,
+            )
+            # environment = self.interpreter.environment
+            # environment['PYTHONPATH'] = ':'.join(self.interpreter.path)
+            logger.info("Remote process exited")
+
+            logger.info("Copying over session result from host %s", remote.host)
+            self._backend.copy_file_from_remote(
+                remote,
+                remote_session_out_path,
+                session_out_path,
+            )
 
         logger.info(
             "Cleaning up remote directory %s on host %s",
@@ -343,6 +748,8 @@ class SshAdvice(Advice):
         self._backend.delete_dir(remote, remote_run_directory)
 
         logger.info("Restore local session from %s", session_out_path)
+        # The stream is closed by the session, which reads its values from it when
+        # they are accessed
         stream = io.FileIO(str(session_out_path), mode='r')
         session.restore(stream)
 
@@ -354,8 +761,132 @@ class SshAdvice(Advice):
         session_in_path.unlink()
         session_out_path.unlink()
 
-        logger.info("Proceed local session")
-        session.proceed()
+    def _continue_via_pipe(
+        self, session, remote, remote_distribution_archive_path, execution_slot
+    ):
+        logger.info("Sending session via pipe to host %s", remote.host)
+        stream = io.BytesIO()
+        session.save(stream)
+
+        with execution_slot:
+            logger.info(
+                "Running remote process using interpreter %s",
+                remote.interpreter.executable,
+            )
+            session_out = self._backend.execute_remote_with_pipe(
+                remote,
+                stream.getvalue(),
+                remote.interpreter.executable,
+                str(remote_distribution_archive_path),
+                '--input',
+                '-',
+                '--output',
+                '-',
+                '--run-id',
+                session.run_id,
+            )
+            logger.info("Remote process exited")
+
+        logger.info("Reading session from pipe")
+        session.restore(io.BytesIO(session_out))
+
+    @contextlib.contextmanager
+    def _execution_slot(self, remote, pool=None):
+        """
+        Occupies one of the slots of a remote while a session is executed on it.
+
+        The slots are limited by `max_in_flight` and by the slots of the remote in
+        its pool.
+        """
+        with contextlib.ExitStack() as slots:
+            if pool is not None:
+                slots.enter_context(pool.execution_slot(remote))
+            if self.max_in_flight is not None:
+                key = (remote.user, remote.host, remote.port)
+                with self._in_flight_lock:
+                    semaphore = self._in_flight.get(key)
+                    if semaphore is None:
+                        semaphore = threading.BoundedSemaphore(self.max_in_flight)
+                        self._in_flight[key] = semaphore
+                slots.enter_context(semaphore)
+            yield
+
+    def _upload_distribution_archive(self, remote, archive):
+        """
+        Copies a distribution archive to a remote machine, if it isn't there yet.
+
+        The archives are kept in the directory `bandsaw-<user>/archives` within the
+        directory of the remote, named by their id. The directory `bandsaw-<user>`
+        is only accessible by the user of the remote, so that other users can't
+        place archives, which would be executed instead. The archives are uploaded
+        under a temporary name first and then moved into place, so that concurrent
+        sessions never see incomplete archives.
+
+        Returns:
+            pathlib.Path: The path of the archive on the remote machine.
+        """
+        remote_archive_path = self._remote_archive_path(remote, archive)
+        key = (remote.user, remote.host, remote.port, str(remote_archive_path))
+        with self._uploaded_archives_lock:
+            if key in self._uploaded_archives:
+                return remote_archive_path
+
+        self._backend.create_private_dir(remote, remote_archive_path.parent.parent)
+        if self._backend.path_exists(remote, remote_archive_path):
+            logger.info(
+                "Distribution archive %s already exists on host %s",
+                archive.archive_id,
+                remote.host,
+            )
+        elif _overrides(self._backend, 'move'):
+            logger.info("Copying over distribution archive to host %s", remote.host)
+            remote_upload_path = remote_archive_path.with_name(
+                f'{remote_archive_path.name}.{uuid.uuid4().hex}.tmp'
+            )
+            self._backend.create_dir(remote, remote_archive_path.parent)
+            self._backend.copy_file_to_remote(
+                remote,
+                archive.path,
+                remote_upload_path,
+            )
+            self._backend.move(remote, remote_upload_path, remote_archive_path)
+        else:
+            logger.info(
+                "Copying over distribution archive to host %s without moving it",
+                remote.host,
+            )
+            self._backend.create_dir(remote, remote_archive_path.parent)
+            self._backend.copy_file_to_remote(
+                remote,
+                archive.path,
+                remote_archive_path,
+            )
+        with self._uploaded_archives_lock:
+            self._uploaded_archives.add(key)
+        return remote_archive_path
+
+    @staticmethod
+    def _remote_archive_path(remote, archive):
+        return (
+            remote.directory
+            / f'bandsaw-{remote.user}'
+            / 'archives'
+            / f'{archive.archive_id}.pyz'
+        )
+
+    def _is_archive_missing(self, remote, remote_archive_path):
+        """
+        Checks if an uploaded distribution archive was removed from the remote.
+
+        The archive is uploaded again by the next session, if its existence can't be
+        checked by the backend.
+        """
+        key = (remote.user, remote.host, remote.port, str(remote_archive_path))
+        with self._uploaded_archives_lock:
+            self._uploaded_archives.discard(key)
+        if not _overrides(self._backend, 'path_exists'):
+            return False
+        return not self._backend.path_exists(remote, remote_archive_path)
 
     def after(self, session):
         logger.info("after called in process %d", os.getpid())
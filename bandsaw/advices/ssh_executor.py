@@ -0,0 +1,115 @@
+"""Executor, which submits tasks to an `SshAdvice` without blocking the caller"""
+import concurrent.futures
+import logging
+
+from .ssh_pool import RemotePool
+
+
+logger = logging.getLogger(__name__)
+
+
+class SshExecutor:
+    """
+    Runs tasks on remote machines without blocking the caller.
+
+    Tasks are submitted to the executor, which returns a `concurrent.futures.Future`
+    for the result of each task. The executor doesn't run the tasks on the remote
+    machines by itself, but calls them in a bounded number of worker threads, so
+    that they are run by the `SshAdvice` in their advice chain. Only tasks whose
+    advice chain contains the advice of the executor can be submitted, other tasks
+    would silently run in the local worker threads. Tasks that can't be started yet
+    are queued until a worker becomes free.
+
+    Example:
+        >>> with SshExecutor(advice) as executor:
+        ...     futures = [executor.submit(my_task, value) for value in values]
+        ...     results = [future.result() for future in futures]
+
+    Attributes:
+        advice (bandsaw.advices.ssh.SshAdvice): The advice, that runs the tasks on the
+            remote machines.
+        max_workers (int): The number of tasks, that are run concurrently.
+    """
+
+    def __init__(self, advice, max_workers=None):
+        """
+        Create a new executor.
+
+        Args:
+            advice (bandsaw.advices.ssh.SshAdvice): The advice, that must be part of
+                the advice chain of the submitted tasks.
+            max_workers (int): The number of tasks, that are run concurrently. If
+                `None`, it is the number of tasks, which can be assigned to the
+                remotes of the advice. For a `RemotePool` this is its `capacity`.
+                Every other remote counts like a pool of this single remote with
+                `max_in_flight` slots, or one slot if the advice doesn't limit the
+                sessions per remote.
+        """
+        self.advice = advice
+        if max_workers is None:
+            max_workers = self._default_max_workers(advice)
+        self.max_workers = max_workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='bandsaw-ssh',
+        )
+
+    @staticmethod
+    def _default_max_workers(advice):
+        max_workers = 0
+        for remote in advice.remotes.values():
+            if not isinstance(remote, RemotePool):
+                remote = RemotePool().add_remote(
+                    remote, slots=advice.max_in_flight or 1
+                )
+            max_workers += remote.capacity
+        return max(max_workers, 1)
+
+    def submit(self, task_function, *args, **kwargs):
+        """
+        Submits a task to be run without waiting for its result.
+
+        Args:
+            task_function (Callable): The function decorated by `bandsaw.task`, whose
+                advice chain contains the advice of this executor.
+            *args: The positional arguments for the task.
+            **kwargs: The keyword arguments for the task.
+
+        Returns:
+            concurrent.futures.Future: The future, which contains the value returned
+                by the task or the exception raised by the task.
+
+        Raises:
+            ValueError: If the advice chain of the task doesn't contain the advice of
+                this executor.
+            RuntimeError: If the executor is already shut down.
+        """
+        if not self._is_advised(task_function):
+            raise ValueError(
+                f"Task {task_function} isn't advised by the advice of the executor"
+            )
+        logger.info("Submitting task %s", task_function)
+        return self._executor.submit(task_function, *args, **kwargs)
+
+    def _is_advised(self, task_function):
+        configuration = getattr(task_function, 'bandsaw_configuration', None)
+        if configuration is None:
+            return False
+        advice_chain = configuration.get_advice_chain(task_function.bandsaw_chain)
+        return any(advice is self.advice for advice in advice_chain or ())
+
+    def shutdown(self, wait=True):
+        """
+        Shuts down the executor, after which no more tasks can be submitted.
+
+        Args:
+            wait (bool): If `True`, waits until all submitted tasks are finished.
+                Defaults to `True`.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
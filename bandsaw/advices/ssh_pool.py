@@ -0,0 +1,263 @@
+"""Pools of remote machines, which share the tasks of an `SshAdvice`"""
+import contextlib
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class RemotePool:
+    """
+    A pool of remote machines, which share the tasks of a single remote name.
+
+    Each remote has a number of slots, which limits how many tasks are executed on it
+    concurrently. A remote is assigned one task more than its slots, which can be
+    uploaded while the other tasks are executed and then waits for a free slot.
+    Remotes, on which running a task failed `max_failures` times in a row, are taken
+    out of rotation for `retry_after` seconds, after which a single task is tried on
+    them again.
+
+    Attributes:
+        strategy (str): How a remote is selected for a task, either `least-loaded` or
+            `round-robin`.
+        max_failures (int): The number of consecutive failures after which a remote
+            is taken out of rotation.
+        retry_after (float): The number of seconds, after which a remote is put back
+            into rotation.
+    """
+
+    def __init__(self, strategy='least-loaded', max_failures=3, retry_after=60.0):
+        """
+        Create a new pool.
+
+        Args:
+            strategy (str): `least-loaded` selects the remote with the lowest ratio of
+                assigned tasks to slots, `round-robin` selects the remotes which can
+                take another task one after another. Defaults to `least-loaded`.
+            max_failures (int): The number of consecutive failures after which a
+                remote is taken out of rotation. Defaults to 3.
+            retry_after (float): The number of seconds, after which a remote is put
+                back into rotation. Defaults to 60 seconds.
+        """
+        if strategy not in ('least-loaded', 'round-robin'):
+            raise ValueError(
+                f"Unknown strategy '{strategy}', use 'least-loaded' or 'round-robin'"
+            )
+        if max_failures < 1:
+            raise ValueError("max_failures must be at least 1")
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.retry_after = retry_after
+        self._members = []
+        self._next_index = 0
+        self._condition = threading.Condition()
+
+    def add_remote(self, remote, slots=1):
+        """
+        Add a remote machine to the pool.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): Definition of the remote machine.
+            slots (int): The number of tasks that can run concurrently on the remote.
+                Defaults to 1.
+
+        Returns:
+            bandsaw.advices.ssh_pool.RemotePool: The pool with the added remote.
+        """
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        with self._condition:
+            self._members.append(_PoolMember(remote, slots))
+        return self
+
+    @property
+    def remotes(self):
+        """The remotes in the pool as `List[bandsaw.advices.ssh.Remote]`."""
+        return [member.remote for member in self._members]
+
+    @property
+    def capacity(self):
+        """The number of tasks, which can be assigned to all remotes, as `int`."""
+        return sum(member.slots + 1 for member in self._members)
+
+    def available_remotes(self):
+        """
+        Returns the remotes, which are currently in rotation.
+
+        Returns:
+            List[bandsaw.advices.ssh.Remote]: The remotes in rotation.
+        """
+        with self._condition:
+            return [
+                member.remote
+                for member in self._members
+                if member.out_of_rotation_until is None
+            ]
+
+    def acquire(self):
+        """
+        Selects a remote for running a task and assigns the task to it.
+
+        Blocks until a remote in rotation can take another task. If all remotes are
+        out of rotation, this waits until the first one can be retried. The task
+        must be executed within `execution_slot()`.
+
+        Returns:
+            bandsaw.advices.ssh.Remote: The remote, which must be given back by
+                calling `release()` after the task finished.
+
+        Raises:
+            RuntimeError: If the pool contains no remotes.
+        """
+        with self._condition:
+            if not self._members:
+                raise RuntimeError("Remote pool contains no remotes")
+            while True:
+                now = time.monotonic()
+                member = self._select(now)
+                if member is not None:
+                    break
+                timeout = self._wait_timeout(now)
+                if timeout is not None:
+                    logger.warning(
+                        "All remotes are out of rotation, waiting %.1f seconds",
+                        timeout,
+                    )
+                self._condition.wait(timeout)
+
+            member.assigned += 1
+            if member.out_of_rotation_until is not None:
+                logger.info("Retrying remote %s with a single task", member.remote.host)
+                member.out_of_rotation_until = None
+                member.probing = True
+            return member.remote
+
+    @contextlib.contextmanager
+    def execution_slot(self, remote):
+        """
+        Occupies one of the slots of a remote while a task is executed on it.
+
+        Blocks until a slot of the remote becomes free.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): The remote returned by `acquire()`.
+        """
+        with self._condition:
+            member = self._member(remote)
+            while member.executing >= member.slots:
+                self._condition.wait()
+            member.executing += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                member.executing -= 1
+                self._condition.notify_all()
+
+    def release(self, remote, failed=False):
+        """
+        Removes a task from a remote, after it finished.
+
+        Args:
+            remote (bandsaw.advices.ssh.Remote): The remote returned by `acquire()`.
+            failed (bool): If running the task on the remote failed. Defaults to
+                `False`.
+        """
+        with self._condition:
+            member = self._member(remote)
+            member.assigned -= 1
+            probing = member.probing
+            member.probing = False
+            if failed:
+                member.failures += 1
+                if probing or member.failures >= self.max_failures:
+                    logger.warning(
+                        "Taking remote %s out of rotation for %s seconds after %d "
+                        "failures",
+                        remote.host,
+                        self.retry_after,
+                        member.failures,
+                    )
+                    member.out_of_rotation_until = time.monotonic() + self.retry_after
+            else:
+                member.failures = 0
+            self._condition.notify_all()
+
+    def _select(self, now):
+        candidates = [
+            (index, member)
+            for index, member in enumerate(self._members)
+            if member.is_selectable(now)
+        ]
+        if not candidates:
+            return None
+        if self.strategy == 'round-robin':
+            count = len(self._members)
+            index, member = min(
+                candidates,
+                key=lambda candidate: (candidate[0] - self._next_index) % count,
+            )
+            self._next_index = (index + 1) % count
+            return member
+        return min(
+            candidates,
+            key=lambda candidate: (
+                candidate[1].assigned / candidate[1].slots,
+                candidate[0],
+            ),
+        )[1]
+
+    def _wait_timeout(self, now):
+        if any(member.out_of_rotation_until is None for member in self._members):
+            # Wait for a remote which can take another task
+            return None
+        # Remotes with assigned tasks can't be retried before `release()` notifies
+        retry_times = [
+            member.out_of_rotation_until
+            for member in self._members
+            if not member.assigned
+        ]
+        if not retry_times:
+            return None
+        return max(min(retry_times) - now, 0.0)
+
+    def _member(self, remote):
+        for member in self._members:
+            if member.remote is remote:
+                return member
+        raise ValueError(f"Remote {remote.host} is not part of the pool")
+
+
+# Mostly a record of the state of a remote, the pool does the bookkeeping
+class _PoolMember:  # pylint: disable=too-few-public-methods
+    """
+    Bookkeeping of a remote within a `RemotePool`.
+
+    Attributes:
+        assigned (int): The number of tasks currently assigned to the remote.
+        executing (int): The number of tasks currently executed on the remote.
+        failures (int): The number of consecutive failures of the remote.
+        out_of_rotation_until (float): The monotonic time, after which a remote that
+            is out of rotation can be retried, `None` if the remote is in rotation.
+        probing (bool): If a single task is retried on the remote.
+    """
+
+    def __init__(self, remote, slots):
+        self.remote = remote
+        self.slots = slots
+        self.assigned = 0
+        self.executing = 0
+        self.failures = 0
+        self.out_of_rotation_until = None
+        self.probing = False
+
+    def is_selectable(self, now):
+        """Returns if a task can be assigned to the remote."""
+        if self.out_of_rotation_until is not None:
+            return self.out_of_rotation_until <= now and not self.assigned
+        if self.probing:
+            return False
+        # One task more than slots, which is uploaded while the others are executed
+        return self.assigned < self.slots + 1
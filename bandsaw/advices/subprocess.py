@@ -1,9 +1,14 @@
 """Contains Advice implementation that runs the execution in a subprocess"""
+import atexit
+import contextlib
 import io
+import json
 import logging
 import os
 import pathlib
+import shutil
 import subprocess
+import threading
 
 
 from ..advice import Advice
@@ -13,10 +18,218 @@ from ..interpreter import Interpreter
 logger = logging.getLogger(__name__)
 
 
+class _Worker:
+    """
+    A long-lived subprocess that continues sessions one after another.
+
+    The worker runs `bandsaw.runner` with `--worker` and receives the sessions to
+    continue via its stdin.
+
+    Attributes:
+        tasks (int): The number of sessions, that the worker has continued.
+    """
+
+    def __init__(self, command, environment):
+        logger.info("Starting worker process %s", command)
+        self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+            command,
+            env=environment,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self.tasks = 0
+
+    @property
+    def is_alive(self):
+        """`True` if the worker process is still running."""
+        return self._process.poll() is None
+
+    def continue_session(
+        self, session_in, session_out_path=None, reference_attachments=False
+    ):
+        """
+        Let the worker continue a session.
+
+        Args:
+            session_in (Union[pathlib.Path, bytes, memoryview]): Path to the file
+                containing the session to continue or the saved session itself.
+            session_out_path (pathlib.Path): Path to the file where the worker writes
+                the session after it was continued. If `None`, the session is
+                transferred back via the pipe and returned.
+            reference_attachments (bool): If the worker should save attached files
+                as references instead of copying their content.
+
+        Returns:
+            bytes: The continued session if `session_out_path` is `None`, otherwise
+                `None`.
+
+        Raises:
+            subprocess.CalledProcessError: If the worker process died while
+                continuing the session.
+        """
+        request = {'reference_attachments': reference_attachments}
+        payload = b''
+        if isinstance(session_in, pathlib.Path):
+            request['input'] = str(session_in)
+        else:
+            request['input'] = '-'
+            request['size'] = len(session_in)
+            payload = session_in
+        if session_out_path is None:
+            request['output'] = '-'
+        else:
+            request['output'] = str(session_out_path)
+
+        try:
+            self._process.stdin.write(json.dumps(request).encode('utf-8') + b'\n')
+            self._process.stdin.write(payload)
+            self._process.stdin.flush()
+            response_line = self._process.stdout.readline()
+        except BrokenPipeError:
+            response_line = b''
+        if not response_line:
+            self._raise_process_error()
+
+        session_out = None
+        response = json.loads(response_line)
+        if 'size' in response:
+            session_out = self._process.stdout.read(response['size'])
+            if len(session_out) < response['size']:
+                self._raise_process_error()
+        self.tasks += 1
+        return session_out
+
+    def _raise_process_error(self):
+        return_code = self._process.wait()
+        raise subprocess.CalledProcessError(return_code, self._process.args)
+
+    def stop(self):
+        """Stops the worker process and waits for it to end."""
+        logger.info("Stopping worker process %d", self._process.pid)
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process.stdout.close()
+
+
+class _WorkerPool:
+    """
+    Pool of worker processes that are started once and then reused for sessions.
+
+    Workers are started lazily when needed, up to `size` of them at the same time.
+    A worker that has continued `max_tasks_per_worker` sessions or that died is
+    replaced by a new one.
+    """
+
+    def __init__(self, command, environment, size, max_tasks_per_worker=None):
+        self._command = command
+        self._environment = environment
+        self._size = size
+        self._max_tasks_per_worker = max_tasks_per_worker
+        self._idle_workers = []
+        self._worker_count = 0
+        self._condition = threading.Condition()
+
+    def continue_session(
+        self, session_in, session_out_path=None, reference_attachments=False
+    ):
+        """
+        Continue a session in one of the workers of the pool.
+
+        Blocks until a worker is available.
+
+        Args:
+            session_in (Union[pathlib.Path, bytes, memoryview]): Path to the file
+                containing the session to continue or the saved session itself.
+            session_out_path (pathlib.Path): Path to the file where the worker writes
+                the session after it was continued. If `None`, the session is
+                transferred back via the pipe and returned.
+            reference_attachments (bool): If the worker should save attached files
+                as references instead of copying their content.
+
+        Returns:
+            bytes: The continued session if `session_out_path` is `None`, otherwise
+                `None`.
+
+        Raises:
+            subprocess.CalledProcessError: If the worker process died while
+                continuing the session.
+        """
+        worker = self._acquire()
+        try:
+            return worker.continue_session(
+                session_in, session_out_path, reference_attachments
+            )
+        finally:
+            self._release(worker)
+
+    def close(self):
+        """Stops all idle workers of the pool."""
+        with self._condition:
+            workers = self._idle_workers
+            self._idle_workers = []
+            self._worker_count -= len(workers)
+        for worker in workers:
+            worker.stop()
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                while self._idle_workers:
+                    worker = self._idle_workers.pop()
+                    if worker.is_alive:
+                        return worker
+                    logger.warning("Replacing dead worker")
+                    self._worker_count -= 1
+                if self._worker_count < self._size:
+                    self._worker_count += 1
+                    break
+                self._condition.wait()
+        try:
+            return _Worker(self._command, self._environment)
+        except Exception:
+            with self._condition:
+                self._worker_count -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker):
+        recycle = (
+            self._max_tasks_per_worker is not None
+            and worker.tasks >= self._max_tasks_per_worker
+        )
+        if worker.is_alive and not recycle:
+            with self._condition:
+                self._idle_workers.append(worker)
+                self._condition.notify()
+            return
+        worker.stop()
+        with self._condition:
+            self._worker_count -= 1
+            self._condition.notify()
+
+
 class SubprocessAdvice(Advice):
     """Advice that runs in a subprocess"""
 
-    def __init__(self, directory=None, interpreter=None):
+    # pylint: disable=too-many-instance-attributes
+    # is reasonable in this case, the attributes configure the subprocesses.
+
+    def __init__(
+        self,
+        directory=None,
+        interpreter=None,
+        pool_size=None,
+        max_tasks_per_worker=None,
+        transfer='file',
+        reference_attachments=False,
+    ):  # pylint: disable=too-many-arguments
         """
         Create a new instance.
 
@@ -26,6 +239,20 @@ class SubprocessAdvice(Advice):
                 is used.
             interpreter (bandsaw.interpreter.Interpreter): The interpreter to use in
                 the subprocess. If `None` the same interpreter will be used.
+            pool_size (int): The number of long-lived worker processes, that continue
+                the sessions one after another. If `None` a new subprocess is started
+                for every session.
+            max_tasks_per_worker (int): The number of sessions after which a worker
+                process is replaced by a new one. If `None` workers are reused
+                indefinitely. Only used if `pool_size` is set.
+            transfer (str): How the sessions are transferred between both processes.
+                `file` uses temporary files in `directory`, `pipe` sends the sessions
+                via stdin and stdout of the subprocess without touching the disk.
+                Defaults to `file`.
+            reference_attachments (bool): If `True`, attached files are transferred
+                as references to their paths instead of copying their content. Files
+                within the temporary directories are always copied, because they are
+                deleted when the process ends. Defaults to `False`.
         """
         if directory is None:
             self.directory = None
@@ -34,54 +261,32 @@ class SubprocessAdvice(Advice):
             self.directory = pathlib.Path(directory)
             logger.info("Using directory %s", self.directory)
         self.interpreter = interpreter or Interpreter()
+        if pool_size is not None and pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.pool_size = pool_size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        if transfer not in ('file', 'pipe'):
+            raise ValueError(f"Unknown transfer '{transfer}', use 'file' or 'pipe'")
+        self.transfer = transfer
+        self.reference_attachments = reference_attachments
+        self._pools = {}
+        self._pools_lock = threading.Lock()
         super().__init__()
 
     def before(self, session):
         logger.info("before called in process %d", os.getpid())
 
-        temp_dir = self.directory or session.temp_dir
-        session_in_path = temp_dir / f'session-{session.session_id}-in.zip'
-        session_out_path = temp_dir / f'session-{session.session_id}-out.zip'
         archive_path = session.distribution_archive.path
-
-        logger.info("Writing session to %s", session_in_path)
-        with io.FileIO(session_in_path, mode='w') as stream:
-            session.save(stream)
-
         logger.info(
             "Continue session in subprocess using interpreter %s and "
             "distribution archive %s",
             self.interpreter.executable,
             archive_path,
         )
-        environment = self.interpreter.environment
-        environment['PYTHONPATH'] = ':'.join(self.interpreter.path)
-        subprocess.check_call(
-            [
-                self.interpreter.executable,
-                archive_path,
-                '--input',
-                session_in_path,
-                '--output',
-                session_out_path,
-                '--run-id',
-                session.run_id,
-            ],
-            env=environment,
-        )
-        logger.info("Sub process exited")
-
-        logger.info("Reading session from %s", session_out_path)
-        with io.FileIO(session_out_path, mode='r') as stream:
-            session.restore(stream)
-
-        logger.info(
-            "Cleaning up session files %s, %s",
-            session_in_path,
-            session_out_path,
-        )
-        session_in_path.unlink()
-        session_out_path.unlink()
+        if self.transfer == 'pipe':
+            self._continue_via_pipe(session, archive_path)
+        else:
+            self._continue_via_files(session, archive_path)
 
         logger.info("proceed() session in parent process")
         session.proceed()
@@ -90,3 +295,152 @@ class SubprocessAdvice(Advice):
         logger.info("after called in process %d", os.getpid())
         logger.info("Sub process created result %s", session.result)
         logger.info("Returning to end session and continue in parent")
+
+    def _continue_via_files(self, session, archive_path):
+        temp_dir = self.directory or session.temp_dir
+        session_in_path = temp_dir / f'session-{session.session_id}-in.zip'
+        session_out_path = temp_dir / f'session-{session.session_id}-out.zip'
+
+        logger.info("Writing session to %s", session_in_path)
+        with io.FileIO(session_in_path, mode='w') as stream:
+            session.save(stream, reference_attachments=self.reference_attachments)
+
+        try:
+            if self.pool_size is None:
+                subprocess.check_call(
+                    self._command(
+                        archive_path,
+                        session.run_id,
+                        '--input',
+                        session_in_path,
+                        '--output',
+                        session_out_path,
+                        *self._reference_attachments_option(),
+                    ),
+                    env=self._environment(),
+                )
+                logger.info("Sub process exited")
+            else:
+                pool = self._get_pool(archive_path, session.run_id)
+                pool.continue_session(
+                    session_in_path,
+                    session_out_path,
+                    self.reference_attachments,
+                )
+                logger.info("Worker process finished session")
+
+            logger.info("Reading session from %s", session_out_path)
+            # The stream is closed by the session, because the session reads its
+            # values from it when they are accessed. The file can still be deleted
+            # afterwards.
+            stream = io.FileIO(session_out_path, mode='r')
+            session.restore(stream)
+        finally:
+            logger.info(
+                "Cleaning up session files %s, %s",
+                session_in_path,
+                session_out_path,
+            )
+            for path in (session_in_path, session_out_path):
+                if path.exists():
+                    path.unlink()
+
+    def _continue_via_pipe(self, session, archive_path):
+        logger.info("Sending session via pipe")
+        if self.pool_size is None:
+            session_out = self._continue_in_subprocess(session, archive_path)
+            logger.info("Sub process exited")
+        else:
+            # The worker protocol needs the size of the session in advance, so
+            # the session is saved into memory and sent without copying it again
+            stream = io.BytesIO()
+            session.save(stream, reference_attachments=self.reference_attachments)
+            pool = self._get_pool(archive_path, session.run_id)
+            with stream.getbuffer() as session_in:
+                session_out = io.BytesIO(
+                    pool.continue_session(
+                        session_in,
+                        reference_attachments=self.reference_attachments,
+                    )
+                )
+            logger.info("Worker process finished session")
+
+        logger.info("Reading session from pipe")
+        session.restore(session_out)
+
+    def _continue_in_subprocess(self, session, archive_path):
+        """
+        Continues a session in a new subprocess, which exchanges it via its stdin
+        and stdout.
+
+        The session is saved directly into stdin of the subprocess and its result is
+        read from stdout chunk by chunk, so that no additional copies of the sessions
+        are kept in memory.
+
+        Returns:
+            io.BytesIO: The stream containing the continued session.
+
+        Raises:
+            subprocess.CalledProcessError: If the subprocess failed.
+        """
+        session_out = io.BytesIO()
+        with subprocess.Popen(
+            self._command(
+                archive_path,
+                session.run_id,
+                '--input',
+                '-',
+                '--output',
+                '-',
+                *self._reference_attachments_option(),
+            ),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=self._environment(),
+        ) as process:
+            # If the subprocess ends early, the error is raised by its return code
+            with contextlib.suppress(BrokenPipeError):
+                with process.stdin:
+                    session.save(
+                        process.stdin, reference_attachments=self.reference_attachments
+                    )
+            shutil.copyfileobj(process.stdout, session_out)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        session_out.seek(0)
+        return session_out
+
+    def _command(self, archive_path, run_id, *arguments):
+        return [
+            self.interpreter.executable,
+            str(archive_path),
+            *[str(argument) for argument in arguments],
+            '--run-id',
+            run_id,
+        ]
+
+    def _reference_attachments_option(self):
+        if self.reference_attachments:
+            return ['--reference-attachments']
+        return []
+
+    def _environment(self):
+        environment = self.interpreter.environment
+        environment['PYTHONPATH'] = ':'.join(self.interpreter.path)
+        return environment
+
+    def _get_pool(self, archive_path, run_id):
+        with self._pools_lock:
+            key = (str(archive_path), run_id)
+            pool = self._pools.get(key)
+            if pool is None:
+                logger.info("Creating pool with %d workers", self.pool_size)
+                pool = _WorkerPool(
+                    self._command(archive_path, run_id, '--worker'),
+                    self._environment(),
+                    self.pool_size,
+                    self.max_tasks_per_worker,
+                )
+                atexit.register(pool.close)
+                self._pools[key] = pool
+        return pool
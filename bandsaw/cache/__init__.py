@@ -0,0 +1 @@
+"""Storage backends and utilities for caching results of tasks."""
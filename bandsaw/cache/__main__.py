@@ -0,0 +1,305 @@
+"""
+Command-line tool for maintaining the results cached by the `CachingAdvice`.
+
+A cache is given either as the directory of a `CachingAdvice` using the default
+`DirectoryBackend` or as the database file of a `SqliteBackend`, which must have the
+suffix `.sqlite`. The index of a managed cache, `index.sqlite` in the directory of
+the cache or next to the database, is kept up-to-date as well.
+
+Run `python -m bandsaw.cache --help` for a list of the available commands.
+"""
+import argparse
+import collections
+import importlib
+import logging
+import pathlib
+import shutil
+import sys
+
+from ..advices.cache import CacheIndex
+from ..config import get_configuration
+from ..tasks import Task
+from .directory import DirectoryBackend
+from .sqlite import SqliteBackend
+
+
+logger = logging.getLogger(__name__)
+
+
+def _open_cache(location):
+    """
+    Opens the cache backend at a location together with the index of the cache.
+
+    Args:
+        location (str): The cache directory or database.
+
+    Returns:
+        Tuple[bandsaw.cache.backend.Backend, bandsaw.advices.cache.CacheIndex]: The
+            backend and the index, which is `None` if the cache doesn't have one.
+    """
+    path = pathlib.Path(location)
+    if path.suffix == '.sqlite' and not path.is_dir():
+        backend = SqliteBackend(path)
+        directory = path.parent
+    else:
+        backend = DirectoryBackend(path, content_addressed=(path / 'blobs').is_dir())
+        directory = path
+    index = None
+    index_path = directory / 'index.sqlite'
+    if index_path.exists():
+        index = CacheIndex(index_path)
+    return backend, index
+
+
+def _remove(backend, index, task_id, execution_id):
+    """Removes a result from the backend and the index."""
+    backend.remove(task_id, execution_id)
+    if index is not None:
+        index.remove(task_id, execution_id)
+
+
+def main(args):
+    """
+    Main function of the command-line tool.
+
+    Args:
+        args (tuple[str]): The arguments taken from the command line.
+
+    Returns:
+        int: The exit code, which is `1` if `verify` found broken results, otherwise
+            `0`.
+    """
+    logging.basicConfig(
+        level=logging.WARNING, format='{levelname}: {message}', style='{'
+    )
+
+    parser = argparse.ArgumentParser(
+        prog='python -m bandsaw.cache',
+        description="Maintains the results cached by the CachingAdvice.",
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    size_parser = commands.add_parser(
+        'size', help="Show the number and size of the cached results per task"
+    )
+    size_parser.add_argument('cache', help="The cache directory or database")
+
+    gc_parser = commands.add_parser(
+        'gc',
+        help=(
+            "Remove results of tasks, which aren't defined in the given modules or "
+            "have a different version"
+        ),
+    )
+    gc_parser.add_argument('cache', help="The cache directory or database")
+    gc_parser.add_argument(
+        '--module',
+        dest='modules',
+        action='append',
+        required=True,
+        help="A module defining the current tasks, can be given multiple times",
+    )
+    gc_parser.add_argument(
+        '--dry-run',
+        dest='dry_run',
+        action='store_true',
+        help="Only show the results which would be removed",
+    )
+
+    verify_parser = commands.add_parser(
+        'verify', help="Check that all cached results can be deserialized"
+    )
+    verify_parser.add_argument('cache', help="The cache directory or database")
+    verify_parser.add_argument(
+        '--config',
+        dest='config',
+        help="The configuration module, whose serializer is used for the results",
+    )
+    verify_parser.add_argument(
+        '--remove',
+        dest='remove',
+        action='store_true',
+        help="Remove broken results",
+    )
+
+    copy_parser = commands.add_parser(
+        'copy',
+        help="Copy results into another cache, e.g. for prewarming a local cache",
+    )
+    copy_parser.add_argument('source', help="The cache to copy from")
+    copy_parser.add_argument('destination', help="The cache to copy into")
+    copy_parser.add_argument(
+        '--task',
+        dest='task_ids',
+        action='append',
+        default=[],
+        help="Only copy results of the task with this id, can be given multiple times",
+    )
+    copy_parser.add_argument(
+        '--module',
+        dest='modules',
+        action='append',
+        default=[],
+        help="Only copy results of tasks defined in this module, can be given "
+        "multiple times",
+    )
+
+    args = parser.parse_args(args=args)
+    if args.command == 'size':
+        _show_size(*_open_cache(args.cache))
+    elif args.command == 'gc':
+        _collect_garbage(*_open_cache(args.cache), args.modules, args.dry_run)
+    elif args.command == 'verify':
+        serializer = get_configuration(args.config).serializer
+        if not _verify(*_open_cache(args.cache), serializer, args.remove):
+            return 1
+    elif args.command == 'copy':
+        task_ids = set(args.task_ids)
+        if args.modules:
+            task_ids.update(_task_ids_of_modules(args.modules))
+        _copy(_open_cache(args.source), _open_cache(args.destination), task_ids or None)
+    return 0
+
+
+def _show_size(backend, _index):
+    counts = collections.Counter()
+    sizes = collections.Counter()
+    for task_id, _, size in backend.entries():
+        counts[task_id] += 1
+        sizes[task_id] += size
+
+    print(f"{'task':<24} {'results':>10} {'bytes':>16}")
+    for task_id, size in sizes.most_common():
+        print(f"{task_id:<24} {counts[task_id]:>10} {size:>16}")
+    print(f"{'total':<24} {sum(counts.values()):>10} {sum(sizes.values()):>16}")
+
+
+def _collect_garbage(backend, index, modules, dry_run):
+    """
+    Removes the results of tasks, that aren't defined in the modules.
+
+    The ids of tasks defined in modules only depend on their module, their name and
+    their `version`, so results of tasks whose code changed without a new `version`
+    are kept.
+    """
+    task_ids = _task_ids_of_modules(modules)
+    removed_count = 0
+    removed_size = 0
+    for task_id, execution_id, size in backend.entries():
+        if task_id in task_ids:
+            continue
+        if dry_run:
+            print(f"Would remove {task_id}/{execution_id}")
+        else:
+            print(f"Removing {task_id}/{execution_id}")
+            _remove(backend, index, task_id, execution_id)
+        removed_count += 1
+        removed_size += size
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"{verb} {removed_count} results with {removed_size} bytes")
+
+
+def _verify(backend, index, serializer, remove):
+    """
+    Deserializes all results and reports the ones that fail.
+
+    Returns:
+        bool: `True` if all results could be deserialized.
+    """
+    checked, broken = _find_broken_results(backend, serializer)
+    stale = _find_stale_index_entries(backend, index)
+    if remove:
+        for task_id, execution_id in broken:
+            _remove(backend, index, task_id, execution_id)
+        for task_id, execution_id in stale:
+            index.remove(task_id, execution_id)
+    print(f"Checked {checked} results, {len(broken)} broken")
+    return not broken
+
+
+def _find_broken_results(backend, serializer):
+    """
+    Returns the number of checked results and the results, that can't be
+    deserialized.
+    """
+    broken = []
+    checked = 0
+    for task_id, execution_id, _ in backend.entries():
+        stream = backend.open(task_id, execution_id)
+        if stream is None:
+            # Removed while verifying
+            continue
+        checked += 1
+        try:
+            with stream:
+                serializer.deserialize(stream)
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"Broken result {task_id}/{execution_id}: {error!r}")
+            broken.append((task_id, execution_id))
+    return checked, broken
+
+
+def _find_stale_index_entries(backend, index):
+    """Returns the results in the index, which are missing in the backend."""
+    stale = []
+    if index is None:
+        return stale
+    for task_id, execution_id, _ in list(index.least_recently_used()):
+        if not backend.contains(task_id, execution_id):
+            print(f"Index contains missing result {task_id}/{execution_id}")
+            stale.append((task_id, execution_id))
+    return stale
+
+
+def _copy(source, destination, task_ids=None):
+    source_backend, _ = source
+    destination_backend, destination_index = destination
+    copied_count = 0
+    copied_size = 0
+    skipped_count = 0
+    for task_id, execution_id, _ in source_backend.entries():
+        if task_ids is not None and task_id not in task_ids:
+            continue
+        if destination_backend.contains(task_id, execution_id):
+            skipped_count += 1
+            continue
+        input_stream = source_backend.open(task_id, execution_id)
+        if input_stream is None:
+            continue
+        with input_stream:
+            with destination_backend.store(task_id, execution_id) as output_stream:
+                shutil.copyfileobj(input_stream, output_stream)
+                size = output_stream.tell()
+        if destination_index is not None:
+            destination_index.add(task_id, execution_id, size)
+        copied_count += 1
+        copied_size += size
+    print(
+        f"Copied {copied_count} results with {copied_size} bytes, "
+        f"skipped {skipped_count} existing results"
+    )
+
+
+def _task_ids_of_modules(module_names):
+    """
+    Returns the ids of all tasks, which are defined in modules.
+
+    Args:
+        module_names (List[str]): The names of the modules, which are imported.
+
+    Returns:
+        Set[str]: The ids of the tasks of all functions decorated by `task`.
+    """
+    task_ids = set()
+    for module_name in module_names:
+        module = importlib.import_module(module_name)
+        for value in vars(module).values():
+            task = getattr(value, 'bandsaw_task', None)
+            if isinstance(task, Task):
+                task_ids.add(task.task_id)
+    logger.info("Found %d tasks in modules %s", len(task_ids), module_names)
+    return task_ids
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+"""Interface for cache backends"""
+import abc
+
+
+class Backend(abc.ABC):
+    """
+    Base class for backends, which store the serialized results of tasks.
+
+    The results are identified by the id of their task and the id of their
+    execution.
+    """
+
+    @abc.abstractmethod
+    def open(self, task_id, execution_id):
+        """
+        Opens a stored result for reading.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            io.Stream: A readable binary stream containing the serialized result,
+                which must be closed by the caller, or `None` if the result isn't
+                stored.
+        """
+
+    @abc.abstractmethod
+    def store(self, task_id, execution_id):
+        """
+        Returns a context manager for storing a result.
+
+        The context manager returns a writable binary stream, to which the
+        serialized result is written. The result becomes visible atomically, once
+        the context manager exits without an exception.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            ContextManager[io.Stream]: The context manager.
+        """
+
+    @abc.abstractmethod
+    def contains(self, task_id, execution_id):
+        """
+        Returns if a result is stored.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            bool: `True` if the result is stored, otherwise `False`.
+        """
+
+    @abc.abstractmethod
+    def stored_at(self, task_id, execution_id):
+        """
+        Returns the time when a result was stored.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            float: The time in seconds since the epoch or `None` if the result isn't
+                stored.
+        """
+
+    def content_id(self, task_id, execution_id):
+        """
+        Returns the id of the content of a stored result.
+
+        Backends, that store identical results only once, return the same id for
+        results sharing their storage, so that their size is only counted once.
+        Other backends return `None`.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            str: The id of the content or `None` if the storage of the result isn't
+                shared or the result isn't stored.
+        """
+        # pylint: disable=unused-argument,no-self-use
+        return None
+
+    @abc.abstractmethod
+    def remove(self, task_id, execution_id):
+        """
+        Removes a stored result.
+
+        Removing a result that isn't stored does nothing.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+        """
+
+    @abc.abstractmethod
+    def entries(self):
+        """
+        Iterates over all stored results.
+
+        Yields:
+            Tuple[str,str,int]: The task id, the execution id and the size in bytes
+                of the serialized result.
+        """
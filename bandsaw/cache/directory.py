@@ -0,0 +1,247 @@
+"""Cache backend using a directory in the file system"""
+import contextlib
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+
+from ..io import HashingStream
+from .backend import Backend
+
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryBackend(Backend):
+    """
+    Cache backend that stores each result as a file in a directory.
+
+    The results are stored in files `<directory>/<task_id>/<execution_id>`. If the
+    results are `content_addressed`, the hash of the blob of each result is kept in
+    the file `<directory>/<task_id>/<execution_id>.sha256`.
+
+    Attributes:
+        directory (pathlib.Path): The directory, where the results are stored.
+        content_addressed (bool): If identical results are stored only once.
+    """
+
+    def __init__(self, directory, content_addressed=False):
+        """
+        Create a new backend.
+
+        Args:
+            directory (str): Directory where the results are stored.
+            content_addressed (bool): If `True`, serialized results are stored once
+                as blobs named by the hash of their content in the `blobs` directory
+                within `directory`. The files of the individual results are hard
+                links to these blobs, so identical results of different executions
+                share the same storage. As the links share the modification time of
+                the blob, storing a result again updates the time when all the
+                identical results were stored, see `stored_at()`. Defaults to
+                `False`.
+        """
+        self.directory = pathlib.Path(directory)
+        self.content_addressed = content_addressed
+        super().__init__()
+
+    def path(self, task_id, execution_id):
+        """
+        Returns the path of the file containing a result.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            pathlib.Path: The path of the file.
+        """
+        return self.directory / task_id / execution_id
+
+    def open(self, task_id, execution_id):
+        try:
+            return open(self.path(task_id, execution_id), 'rb')
+        except FileNotFoundError:
+            return None
+
+    @contextlib.contextmanager
+    def store(self, task_id, execution_id):
+        cache_item_path = self.path(task_id, execution_id)
+        cache_item_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.content_addressed:
+            with self._store_as_blob(cache_item_path) as stream:
+                yield stream
+        else:
+            with _temporary_file(cache_item_path) as stream:
+                yield stream
+            os.replace(stream.name, cache_item_path)
+
+    @contextlib.contextmanager
+    def _store_as_blob(self, cache_item_path):
+        blobs_directory = self.directory / 'blobs'
+        blobs_directory.mkdir(exist_ok=True)
+        with _temporary_file(blobs_directory / 'blob') as stream:
+            hashing_stream = HashingStream(hashlib.sha256(), stream)
+            yield hashing_stream
+        digest = hashing_stream.hash.hexdigest()
+        blob_path = self._blob_path(digest)
+        if blob_path.exists():
+            logger.info("Result already exists as blob '%s'", blob_path)
+            os.unlink(stream.name)
+            # The links share the timestamps of the blob, mark it as stored now
+            os.utime(blob_path)
+        else:
+            blob_path.parent.mkdir(exist_ok=True)
+            os.replace(stream.name, blob_path)
+
+        link_path = cache_item_path.with_name(
+            f'{cache_item_path.name}.{os.getpid()}.{threading.get_ident()}.tmp'
+        )
+        try:
+            os.link(blob_path, link_path)
+        except OSError as error:
+            logger.warning("Can't link blob '%s', copying it: %s", blob_path, error)
+            shutil.copyfile(blob_path, link_path)
+        # Keep the hash, so that the blob can be found without hashing the item
+        digest_path = _digest_path(cache_item_path)
+        with _temporary_file(digest_path) as stream:
+            stream.write(digest.encode('ascii'))
+        os.replace(stream.name, digest_path)
+        os.replace(link_path, cache_item_path)
+
+    def _blob_path(self, digest):
+        return self.directory / 'blobs' / digest[:2] / digest
+
+    def contains(self, task_id, execution_id):
+        return self.path(task_id, execution_id).exists()
+
+    def stored_at(self, task_id, execution_id):
+        """
+        Returns the time when a result was stored.
+
+        The time is the modification time of the file of the result. If results are
+        `content_addressed`, identical results share this time, which is the time
+        when the last of them was stored.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            execution_id (str): The id of the execution of the result.
+
+        Returns:
+            float: The time in seconds since the epoch or `None` if the result isn't
+                stored.
+        """
+        try:
+            return self.path(task_id, execution_id).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def content_id(self, task_id, execution_id):
+        if not self.content_addressed:
+            return None
+        return _read_digest(self.path(task_id, execution_id))
+
+    def remove(self, task_id, execution_id):
+        cache_item_path = self.path(task_id, execution_id)
+        blob_path = None
+        if self.content_addressed:
+            blob_path = self._orphaned_blob_path(cache_item_path)
+        try:
+            cache_item_path.unlink()
+        except FileNotFoundError:
+            pass
+        if self.content_addressed:
+            with contextlib.suppress(FileNotFoundError):
+                _digest_path(cache_item_path).unlink()
+        if blob_path is not None and blob_path.stat().st_nlink == 1:
+            logger.info("Removing blob '%s' which isn't used anymore", blob_path)
+            blob_path.unlink()
+
+    def entries(self):
+        if not self.directory.is_dir():
+            return
+        for task_directory in sorted(self.directory.iterdir()):
+            # Ids never contain dots, which skips other files in the directory
+            if (
+                task_directory.name == 'blobs'
+                or '.' in task_directory.name
+                or not task_directory.is_dir()
+            ):
+                continue
+            for path in sorted(task_directory.iterdir()):
+                # Skips lock and temporary files
+                if '.' in path.name:
+                    continue
+                try:
+                    size = path.stat().st_size
+                except FileNotFoundError:
+                    continue
+                yield task_directory.name, path.name, size
+
+    def _orphaned_blob_path(self, cache_item_path):
+        """
+        Returns the path of the blob, that is only used by the given cache item.
+
+        Returns:
+            pathlib.Path: The path of the blob or `None` if the cache item isn't
+                linked to a blob or if the blob is used by other cache items as well.
+        """
+        try:
+            if cache_item_path.stat().st_nlink != 2:
+                return None
+            digest = _read_digest(cache_item_path)
+            if digest is None:
+                # Items stored without their hash need to be hashed
+                hashing = hashlib.sha256()
+                with open(cache_item_path, 'rb') as stream:
+                    shutil.copyfileobj(stream, HashingStream(hashing))
+                digest = hashing.hexdigest()
+        except FileNotFoundError:
+            return None
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists() or not blob_path.samefile(cache_item_path):
+            return None
+        return blob_path
+
+
+def _digest_path(cache_item_path):
+    return cache_item_path.with_name(cache_item_path.name + '.sha256')
+
+
+def _read_digest(cache_item_path):
+    """
+    Returns the hash of the blob of a content addressed cache item.
+
+    Returns:
+        str: The hex digest of the blob or `None` if the hash of the item isn't
+            known.
+    """
+    try:
+        return _digest_path(cache_item_path).read_text('ascii')
+    except FileNotFoundError:
+        return None
+
+
+@contextlib.contextmanager
+def _temporary_file(path):
+    """
+    Creates a temporary file next to `path`, which is removed if writing it fails.
+
+    Results are written to a temporary file first, which is then renamed atomically,
+    so that readers never see partially written results.
+    """
+    with tempfile.NamedTemporaryFile(
+        'wb',
+        dir=path.parent,
+        prefix=path.name + '.',
+        suffix='.tmp',
+        delete=False,
+    ) as stream:
+        try:
+            yield stream
+        except BaseException:
+            stream.close()
+            os.unlink(stream.name)
+            raise
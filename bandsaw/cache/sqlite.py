@@ -0,0 +1,217 @@
+"""Cache backend using a SQLite database"""
+import contextlib
+import io
+import logging
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from .backend import Backend
+
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteBackend(Backend):
+    """
+    Cache backend that stores results in a SQLite database.
+
+    Small results are stored inline in the database, larger results are stored as
+    external files in a directory next to the database. The database uses WAL mode,
+    so that multiple processes can read results while another one writes.
+
+    Attributes:
+        path (pathlib.Path): The path of the database file.
+        files_directory (pathlib.Path): The directory where large results are stored.
+        inline_threshold (int): The maximum size in bytes of results, that are stored
+            inline in the database.
+    """
+
+    def __init__(self, path, inline_threshold=1024 * 1024):
+        """
+        Create a new backend.
+
+        Args:
+            path (str): The path of the database file. It is created if it doesn't
+                exist yet. Large results are stored in the directory `<path>.files`.
+            inline_threshold (int): The maximum size in bytes of results, that are
+                stored inline in the database. Defaults to 1 MiB.
+        """
+        self.path = pathlib.Path(path)
+        self.files_directory = self.path.with_name(self.path.name + '.files')
+        self.inline_threshold = inline_threshold
+        self._connections = threading.local()
+        super().__init__()
+
+    def _connection(self):
+        connection = getattr(self._connections, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=60)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    ' task_id TEXT NOT NULL,'
+                    ' execution_id TEXT NOT NULL,'
+                    ' stored REAL NOT NULL,'
+                    ' size INTEGER NOT NULL,'
+                    ' data BLOB,'
+                    ' file TEXT,'
+                    ' PRIMARY KEY (task_id, execution_id)'
+                    ') WITHOUT ROWID'
+                )
+            self._connections.connection = connection
+        return connection
+
+    def _row(self, columns, task_id, execution_id):
+        return (
+            self._connection()
+            .execute(
+                f'SELECT {columns} FROM results WHERE task_id = ? AND execution_id = ?',
+                (task_id, execution_id),
+            )
+            .fetchone()
+        )
+
+    def open(self, task_id, execution_id):
+        row = self._row('data, file', task_id, execution_id)
+        if row is None:
+            return None
+        data, file_name = row
+        if file_name is None:
+            return io.BytesIO(data)
+        try:
+            return open(self.files_directory / file_name, 'rb')
+        except FileNotFoundError:
+            # The result was removed after reading its row
+            return None
+
+    @contextlib.contextmanager
+    def store(self, task_id, execution_id):
+        stream = _SpillingStream(self.inline_threshold, self.files_directory)
+        try:
+            yield stream
+        except BaseException:
+            stream.discard()
+            raise
+        size = stream.tell()
+        stream.close()
+
+        data = None
+        file_name = None
+        if stream.file_path is None:
+            data = stream.getvalue()
+        else:
+            file_name = f'{task_id}-{execution_id}-{uuid.uuid4().hex}'
+            os.replace(stream.file_path, self.files_directory / file_name)
+
+        with self._connection() as connection:
+            previous = connection.execute(
+                'SELECT file FROM results WHERE task_id = ? AND execution_id = ?',
+                (task_id, execution_id),
+            ).fetchone()
+            connection.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                (task_id, execution_id, time.time(), size, data, file_name),
+            )
+        if previous is not None:
+            self._remove_file(previous[0])
+
+    def contains(self, task_id, execution_id):
+        return self._row('1', task_id, execution_id) is not None
+
+    def stored_at(self, task_id, execution_id):
+        row = self._row('stored', task_id, execution_id)
+        if row is None:
+            return None
+        return row[0]
+
+    def remove(self, task_id, execution_id):
+        with self._connection() as connection:
+            row = connection.execute(
+                'SELECT file FROM results WHERE task_id = ? AND execution_id = ?',
+                (task_id, execution_id),
+            ).fetchone()
+            connection.execute(
+                'DELETE FROM results WHERE task_id = ? AND execution_id = ?',
+                (task_id, execution_id),
+            )
+        if row is not None:
+            self._remove_file(row[0])
+
+    def entries(self):
+        # Fetch all rows first, so that results can be removed while iterating
+        yield from self._connection().execute(
+            'SELECT task_id, execution_id, size FROM results'
+            ' ORDER BY task_id, execution_id'
+        ).fetchall()
+
+    def _remove_file(self, file_name):
+        if file_name is None:
+            return
+        try:
+            (self.files_directory / file_name).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _SpillingStream(io.RawIOBase):
+    """
+    Writable stream that keeps its data in memory until it exceeds a threshold.
+
+    Once more than `threshold` bytes are written, all data is written to a temporary
+    file in `directory` instead.
+    """
+
+    def __init__(self, threshold, directory):
+        self._threshold = threshold
+        self._directory = directory
+        self._buffer = io.BytesIO()
+        self._file = None
+        self.file_path = None
+        super().__init__()
+
+    def writable(self):
+        return True
+
+    def write(self, buffer):
+        size = memoryview(buffer).nbytes
+        if self._file is None and self._buffer.tell() + size > self._threshold:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._file = tempfile.NamedTemporaryFile(  # pylint: disable=R1732
+                'wb', dir=self._directory, suffix='.tmp', delete=False
+            )
+            self.file_path = self._file.name
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        if self._file is None:
+            self._buffer.write(buffer)
+        else:
+            self._file.write(buffer)
+        return size
+
+    def tell(self):
+        if self._file is None:
+            return self._buffer.tell()
+        return self._file.tell()
+
+    def getvalue(self):
+        """Returns the data, if it was kept in memory."""
+        return self._buffer.getvalue()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        super().close()
+
+    def discard(self):
+        """Closes the stream and removes the temporary file, if one was created."""
+        self.close()
+        if self.file_path is not None:
+            os.unlink(self.file_path)
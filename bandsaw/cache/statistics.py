@@ -0,0 +1,264 @@
+"""Statistics about the effectiveness of caching results"""
+import bisect
+import collections
+import math
+import threading
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations with fixed, logarithmic buckets.
+
+    The buckets range from one microsecond to 500 seconds in steps of 1, 2 and 5,
+    durations longer than that are counted in an additional bucket without upper
+    bound.
+
+    Attributes:
+        count (int): The number of durations in the histogram.
+        total (float): The sum of all durations in seconds.
+        bounds (List[float]): The upper bounds in seconds of the buckets.
+        counts (List[int]): The number of durations per bucket. Has one element more
+            than `bounds` for the durations exceeding the last bound.
+    """
+
+    bounds = [
+        multiplier * 10.0**exponent
+        for exponent in range(-6, 3)
+        for multiplier in (1, 2, 5)
+    ]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def add(self, seconds):
+        """
+        Adds a duration to the histogram.
+
+        Args:
+            seconds (float): The duration in seconds.
+        """
+        self.count += 1
+        self.total += seconds
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+
+    @property
+    def mean(self):
+        """The mean duration in seconds as `float` or `None` if there is none."""
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def quantile(self, quantile):
+        """
+        Returns an upper bound for a quantile of the durations.
+
+        Args:
+            quantile (float): The quantile between 0 and 1, e.g. `0.99`.
+
+        Returns:
+            float: The upper bound of the bucket containing the quantile, which might
+                be `math.inf`, or `None` if the histogram is empty.
+        """
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        cumulative_count = 0
+        for bound, count in zip(self.bounds + [math.inf], self.counts):
+            cumulative_count += count
+            if cumulative_count >= rank:
+                return bound
+        return math.inf
+
+    def value_info(self):
+        """
+        Information about the histogram.
+
+        Returns:
+            Dict[str,Any]: The count, total, mean and the counts of all non-empty
+                buckets keyed by their upper bound.
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'buckets': {
+                str(bound): count
+                for bound, count in zip(self.bounds + [math.inf], self.counts)
+                if count
+            },
+        }
+
+
+class TaskStatistics:
+    """
+    Statistics about the cached results of a single task.
+
+    Attributes:
+        hits (int): The number of executions, whose results were taken from the
+            cache, including `memory_hits`.
+        memory_hits (int): The number of hits, which were returned from memory
+            without reading them from the backend.
+        misses (int): The number of executions, whose results weren't cached.
+        stores (int): The number of results stored in the backend.
+        bytes_read (int): The number of bytes of serialized results read from the
+            backend.
+        bytes_written (int): The number of bytes of serialized results written to
+            the backend.
+        deserialize_latency (LatencyHistogram): The durations of reading and
+            deserializing results from the backend.
+        serialize_latency (LatencyHistogram): The durations of serializing and
+            writing results to the backend.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    # is reasonable in this case, each attribute is a separate counter.
+
+    def __init__(self):
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.deserialize_latency = LatencyHistogram()
+        self.serialize_latency = LatencyHistogram()
+
+    @property
+    def hit_rate(self):
+        """The ratio of hits to all lookups as `float` or `None` without lookups."""
+        lookups = self.hits + self.misses
+        if not lookups:
+            return None
+        return self.hits / lookups
+
+    def value_info(self):
+        """
+        Information about the statistics.
+
+        Returns:
+            Dict[str,Any]: All counters and histograms.
+        """
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'stores': self.stores,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'deserialize_latency': self.deserialize_latency.value_info(),
+            'serialize_latency': self.serialize_latency.value_info(),
+        }
+
+
+class CacheStatistics:
+    """
+    Thread-safe statistics about the cached results, kept per task.
+    """
+
+    def __init__(self):
+        self._tasks = collections.defaultdict(TaskStatistics)
+        self._lock = threading.Lock()
+
+    def record_hit(self, task_id, size=None, seconds=None):
+        """
+        Records that a result was taken from the cache.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            size (int): The size in bytes of the serialized result, that was read
+                from the backend, or `None` if the result was returned from memory.
+            seconds (float): The duration of reading and deserializing the result.
+        """
+        with self._lock:
+            statistics = self._tasks[task_id]
+            statistics.hits += 1
+            if size is None:
+                statistics.memory_hits += 1
+            else:
+                statistics.bytes_read += size
+                statistics.deserialize_latency.add(seconds)
+
+    def record_miss(self, task_id):
+        """
+        Records that a result wasn't found in the cache.
+
+        Args:
+            task_id (str): The id of the task of the result.
+        """
+        with self._lock:
+            self._tasks[task_id].misses += 1
+
+    def record_store(self, task_id, size, seconds):
+        """
+        Records that a result was stored in the cache.
+
+        Args:
+            task_id (str): The id of the task of the result.
+            size (int): The size in bytes of the serialized result.
+            seconds (float): The duration of serializing and writing the result.
+        """
+        with self._lock:
+            statistics = self._tasks[task_id]
+            statistics.stores += 1
+            statistics.bytes_written += size
+            statistics.serialize_latency.add(seconds)
+
+    def task(self, task_id):
+        """
+        Returns the statistics of a task.
+
+        Args:
+            task_id (str): The id of the task.
+
+        Returns:
+            TaskStatistics: The statistics, which are empty if nothing was recorded
+                for the task yet.
+        """
+        with self._lock:
+            return self._tasks.get(task_id) or TaskStatistics()
+
+    @property
+    def task_ids(self):
+        """The ids of all tasks with recorded statistics as `List[str]`."""
+        with self._lock:
+            return sorted(self._tasks)
+
+    def total(self):
+        """
+        Returns the statistics summed up over all tasks.
+
+        Returns:
+            TaskStatistics: The summed up statistics.
+        """
+        total = TaskStatistics()
+        with self._lock:
+            for statistics in self._tasks.values():
+                total.hits += statistics.hits
+                total.memory_hits += statistics.memory_hits
+                total.misses += statistics.misses
+                total.stores += statistics.stores
+                total.bytes_read += statistics.bytes_read
+                total.bytes_written += statistics.bytes_written
+                for name in ('deserialize_latency', 'serialize_latency'):
+                    histogram = getattr(total, name)
+                    task_histogram = getattr(statistics, name)
+                    histogram.count += task_histogram.count
+                    histogram.total += task_histogram.total
+                    histogram.counts = [
+                        a + b for a, b in zip(histogram.counts, task_histogram.counts)
+                    ]
+        return total
+
+    def value_info(self):
+        """
+        Information about the statistics of all tasks.
+
+        Returns:
+            Dict[str,Dict[str,Any]]: The statistics keyed by the ids of the tasks.
+        """
+        with self._lock:
+            tasks = dict(self._tasks)
+        return {task_id: tasks[task_id].value_info() for task_id in sorted(tasks)}
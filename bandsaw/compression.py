@@ -0,0 +1,92 @@
+"""Contains classes for defining how archives are compressed."""
+import fnmatch
+import time
+import zipfile
+
+
+_METHODS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+
+class Compression:
+    """
+    Defines how the entries of a zip archive are compressed.
+
+    Attributes:
+        method (str): The name of the compression method used for all entries, that
+            don't match any of the patterns in `entries`. Can be one of `stored`,
+            `deflate`, `bzip2` or `lzma`.
+        level (int): The compression level used with `method`. If `None` the default
+            level of the compression method is used.
+        entries (Dict[str,str]): A mapping of glob-style patterns to compression
+            methods. Entries in the archive whose names match a pattern use the
+            method of the first matching pattern with its default level.
+    """
+
+    def __init__(self, method='stored', level=None, entries=None):
+        """
+        Create a new compression definition.
+
+        Args:
+            method (str): The compression method used for all entries. Defaults to
+                `stored`, which doesn't compress at all.
+            level (int): The compression level. If `None` the default level of the
+                compression method is used.
+            entries (Dict[str,str]): Mapping of patterns to compression methods for
+                individual entries, e.g. `{'attachments/*.gz': 'stored'}`.
+
+        Raises:
+            ValueError: If an unknown compression method is given.
+        """
+        entries = dict(entries or {})
+        for entry_method in (method, *entries.values()):
+            if entry_method not in _METHODS:
+                raise ValueError(
+                    f"Unknown compression method '{entry_method}', "
+                    f"use one of {', '.join(_METHODS)}"
+                )
+        self.method = method
+        self.level = level
+        self.entries = entries
+
+    def open_archive(self, stream):
+        """
+        Opens a new zip archive for writing, that uses this compression.
+
+        Args:
+            stream (io.Stream): The binary stream to which the archive is written.
+
+        Returns:
+            zipfile.ZipFile: The opened archive.
+        """
+        return zipfile.ZipFile(
+            stream,
+            'w',
+            compression=_METHODS[self.method],
+            compresslevel=self.level,
+        )
+
+    def entry(self, name):
+        """
+        Returns the definition of an entry that can be written to the archive.
+
+        Args:
+            name (str): The name of the entry in the archive.
+
+        Returns:
+            Union[str,zipfile.ZipInfo]: Either the name of the entry, if the entry
+                uses the compression of the archive, or a `ZipInfo` that defines a
+                different compression. Both can be given to `ZipFile.open()` or
+                `ZipFile.writestr()`.
+        """
+        for pattern, method in self.entries.items():
+            if fnmatch.fnmatchcase(name, pattern):
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                info.compress_type = _METHODS[method]
+                info.external_attr = 0o600 << 16
+                return info
+        return name
@@ -9,6 +9,8 @@ import tempfile
 import traceback
 import typing
 
+from .compression import Compression
+from .identifier import Hasher
 from .modules import get_loaded_module_name_by_path
 from .serialization import PickleSerializer
 
@@ -27,12 +29,25 @@ class Configuration:
     Attributes:
         temporary_directory (pathlib.Path): The path to a directory where temporary
             files are stored.
+        session_compression (bandsaw.compression.Compression): Defines how the
+            archives of saved sessions are compressed.
+        hasher (bandsaw.identifier.Hasher): The hash algorithm used for deriving
+            the ids of tasks and executions.
+        fingerprints (Dict[type,Callable[[Any],str]]): Functions returning the
+            fingerprints of arguments of different types, which are used instead of
+            the arguments for deriving execution ids.
     """
 
+    # pylint: disable=too-many-instance-attributes
+    # is reasonable in this case, the configuration collects all settings.
+
     def __init__(self):
         self._advice_chains = {}
         self.extensions = []
         self.serializer = PickleSerializer()
+        self.session_compression = Compression()
+        self.hasher = Hasher()
+        self.fingerprints = {}
         self.add_advice_chain()
         stack = traceback.extract_stack(limit=2)
         config_module_file_path = stack[0].filename
@@ -111,6 +126,82 @@ class Configuration:
         self.serializer = serializer
         return self
 
+    def set_session_compression(self, method, level=None, entries=None):
+        """
+        Sets how the archives of saved sessions are compressed.
+
+        Sessions are saved as zip archives when they are transferred to other
+        processes or machines. By default, the entries of the archive are stored
+        without compression.
+
+        Args:
+            method (str): The compression method to use, one of `stored`, `deflate`,
+                `bzip2` or `lzma`.
+            level (int): The compression level to use with `method`. If `None`, the
+                default level of the compression method is used.
+            entries (Dict[str,str]): Mapping of glob-style patterns to compression
+                methods, which allows different methods for individual entries of the
+                archive. E.g. `{'attachments/*.gz': 'stored'}` stores already
+                compressed attachments without compressing them again.
+
+        Returns:
+            bandsaw.config.Configuration: The configuration with the changed
+                compression.
+
+        Raises:
+            ValueError: If an unknown compression method is given.
+        """
+        self.session_compression = Compression(method, level, entries)
+        return self
+
+    def set_hash_algorithm(self, algorithm, **parameters):
+        """
+        Sets the hash algorithm which is used for deriving ids of tasks and executions.
+
+        By default, `sha256` is used. Tasks using a different algorithm have
+        different task ids, so that e.g. cached results created with different
+        algorithms never collide.
+
+        Args:
+            algorithm (str): The name of a hash algorithm supported by
+                `hashlib.new()`, e.g. `blake2b`.
+            **parameters: Additional parameters for the algorithm, e.g.
+                `digest_size=8` for `blake2b`.
+
+        Returns:
+            bandsaw.config.Configuration: The configuration with the changed hash
+                algorithm.
+
+        Raises:
+            ValueError: If the algorithm is unknown or can't be used for ids.
+        """
+        self.hasher = Hasher(algorithm, **parameters)
+        return self
+
+    def add_fingerprint(self, value_type, function):
+        """
+        Adds a function that returns the fingerprints of values of a type.
+
+        When deriving the id of an execution, arguments of this type or of its
+        subclasses are replaced by their fingerprint instead of serializing them
+        completely. This allows to use cheap fingerprints for large arguments, e.g.
+        a hash of the buffer of a numpy array. Types which implement the method
+        `__bandsaw_fingerprint__()` don't need to be added.
+
+        Args:
+            value_type (type): The type of values, for which the function returns the
+                fingerprint.
+            function (Callable[[Any],str]): A function that takes a value and returns
+                its fingerprint as `str`. The module `bandsaw.fingerprints` contains
+                functions for common cases.
+
+        Returns:
+            bandsaw.config.Configuration: The configuration with the added
+                fingerprint function.
+        """
+        self.fingerprints[value_type] = function
+        return self
+
     def add_modules_for_distribution(self, *modules):
         """
         Add modules that should be included in the distribution archive.
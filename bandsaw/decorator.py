@@ -1,11 +1,12 @@
 """Contains decorators that allow to define individual tasks"""
-import io
 import logging
 
 from .advice import advise_task_with_chain
 from .config import get_configuration
 from .execution import Execution
-from .identifier import identifier_from_bytes
+from .fingerprints import replace_by_fingerprints
+from .identifier import Hasher, identifier_from_hash
+from .io import HashingStream
 from .tasks import Task
 
 
@@ -68,7 +69,7 @@ def task(*task_args, config=None, chain=None, **task_kwargs):
         logger.info("Decorate function '%s'", func)
 
         logger.info("Creating task for function '%s'", func)
-        the_task = Task.create_task(func, task_kwargs)
+        the_task = Task.create_task(func, task_kwargs, configuration.hasher)
 
         def inner(*func_args, **func_kwargs):
 
@@ -76,6 +77,8 @@ def task(*task_args, config=None, chain=None, **task_kwargs):
                 func_args,
                 func_kwargs,
                 configuration.serializer,
+                configuration.hasher,
+                configuration.fingerprints,
             )
             execution = Execution(execution_id, func_args, func_kwargs)
 
@@ -92,6 +95,7 @@ def task(*task_args, config=None, chain=None, **task_kwargs):
         inner.__wrapped__ = func
         inner.bandsaw_task = the_task
         inner.bandsaw_configuration = configuration
+        inner.bandsaw_chain = chain_name
         return inner
 
     if len(task_args) == 1 and len(task_kwargs) == 0:
@@ -104,10 +108,10 @@ def task(*task_args, config=None, chain=None, **task_kwargs):
     raise RuntimeError("Invalid 'task' decorator.")
 
 
-def _calculate_execution_id(args, kwargs, serializer):
+def _calculate_execution_id(args, kwargs, serializer, hasher=None, fingerprints=None):
     """The unique id of an execution, derived from its arguments."""
-    stream = io.BytesIO()
-    value = (args, kwargs)
+    hasher = hasher or Hasher()
+    stream = HashingStream(hasher.new())
+    value = replace_by_fingerprints(args, kwargs, fingerprints)
     serializer.serialize(value, stream)
-    bytebuffer = stream.getvalue()
-    return identifier_from_bytes(bytebuffer)
+    return identifier_from_hash(stream.hash)
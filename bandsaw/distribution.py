@@ -6,12 +6,17 @@ machines. They are normal zip files, that contain bandsaw itself, a __main__ mod
 which allows to execute the archive and to continue sessions and possibly some
 additional dependencies.
 """
+import hashlib
 import logging
 import pathlib
 import sys
 import tempfile
+import threading
 import zipfile
 
+from .identifier import identifier_from_hash
+from .io import read_stream_to_generator
+
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +35,8 @@ def _add_module_to_archive(module, archive):
         directories_to_package = [package_dir]
         while directories_to_package:
             directory = directories_to_package.pop()
-            for path in directory.iterdir():
+            # Sorted, so that archives of the same files have the same content
+            for path in sorted(directory.iterdir()):
                 if path.is_dir():
                     if path.name != '__pycache__':
                         directories_to_package.append(path)
@@ -53,7 +59,9 @@ import bandsaw.runner
 if __name__ == '__main__':
     bandsaw.runner.main(sys.argv[1:])
 """
-    archive.writestr('__main__.py', main_module_contents)
+    # Fixed timestamp, so that archives of the same files have the same content
+    main_module_info = zipfile.ZipInfo('__main__.py', date_time=(1980, 1, 1, 0, 0, 0))
+    archive.writestr(main_module_info, main_module_contents)
 
 
 def _create_distribution_archive(path, modules=None):
@@ -159,6 +167,9 @@ class DistributionArchive:
     def __init__(self, path, *modules):
         self._path = path
         self.modules = modules
+        self._archive_id = None
+        # Sessions of concurrently running tasks share the archive
+        self._lock = threading.Lock()
 
     @property
     def path(self):
@@ -168,10 +179,29 @@ class DistributionArchive:
                 lazily, when the path is accessed the first time. This makes sure,
                 we only create the archive if necessary.
         """
-        if not self._path.exists():
-            _create_distribution_archive(self._path, self.modules)
+        with self._lock:
+            if not self._path.exists():
+                _create_distribution_archive(self._path, self.modules)
         return self._path
 
+    @property
+    def archive_id(self):
+        """
+        Returns:
+            str: The id of the archive, derived from the hash of its content. Archives
+                with the same content have the same id, which allows to reuse them
+                e.g. on remote machines.
+        """
+        if self._archive_id is None:
+            path = self.path
+            with self._lock:
+                content_hash = hashlib.sha256()
+                with open(path, 'rb') as stream:
+                    for buffer in read_stream_to_generator(stream, 1024 * 1024):
+                        content_hash.update(buffer)
+                self._archive_id = identifier_from_hash(content_hash)
+        return self._archive_id
+
     def __eq__(self, other):
         if not isinstance(other, type(self)):
             return False
@@ -0,0 +1,199 @@
+"""
+Contains functions for deriving cheap fingerprints of large arguments.
+
+Deriving the id of an execution requires serializing all of its arguments, which can
+take a long time for large arguments like numpy arrays or pandas dataframes. Instead,
+arguments can be replaced by a fingerprint, a short string, which identifies the
+value of the argument. Types can provide their fingerprint by implementing the method
+`__bandsaw_fingerprint__()`, which returns the fingerprint as `str`. For third-party
+types, a function that returns the fingerprint can be registered in the configuration
+using `Configuration.add_fingerprint()`.
+"""
+import hashlib
+import logging
+import os
+import weakref
+
+from .serialization import SerializableValue
+
+
+logger = logging.getLogger(__name__)
+
+
+FINGERPRINT_METHOD = '__bandsaw_fingerprint__'
+
+
+class Fingerprint(SerializableValue):
+    """
+    Stands in for a value when deriving the id of an execution.
+
+    Attributes:
+        value_type (str): The fully qualified name of the type of the value.
+        fingerprint (str): The fingerprint of the value.
+    """
+
+    def __init__(self, value_type, fingerprint):
+        self.value_type = value_type
+        self.fingerprint = fingerprint
+
+    def serialized(self):
+        return {
+            'value_type': self.value_type,
+            'fingerprint': self.fingerprint,
+        }
+
+    @classmethod
+    def deserialize(cls, values):
+        return Fingerprint(values['value_type'], values['fingerprint'])
+
+    def __eq__(self, other):
+        if not isinstance(other, type(self)):
+            return False
+        return (
+            self.value_type == other.value_type
+            and self.fingerprint == other.fingerprint
+        )
+
+    def __hash__(self):
+        return hash((self.value_type, self.fingerprint))
+
+    def __repr__(self):
+        return f"Fingerprint('{self.value_type}', '{self.fingerprint}')"
+
+
+def fingerprint_of(value, fingerprints=None):
+    """
+    Returns the fingerprint of a value, if one is available.
+
+    The method `__bandsaw_fingerprint__()` of the value takes precedence over the
+    functions registered for its type.
+
+    Args:
+        value (Any): The value for which to return a fingerprint.
+        fingerprints (Dict[type,Callable[[Any],str]]): Mapping of types to functions,
+            which return the fingerprint of a value of this type. Subclasses of the
+            types use the same function.
+
+    Returns:
+        bandsaw.fingerprints.Fingerprint: The fingerprint of the value or `None` if
+            the value has no fingerprint.
+    """
+    value_type = type(value)
+    method = getattr(value_type, FINGERPRINT_METHOD, None)
+    if method is not None:
+        function = method
+    else:
+        function = None
+        for base_type in value_type.__mro__:
+            function = (fingerprints or {}).get(base_type)
+            if function is not None:
+                break
+        if function is None:
+            return None
+    type_name = value_type.__module__ + '.' + value_type.__qualname__
+    return Fingerprint(type_name, function(value))
+
+
+def replace_by_fingerprints(args, kwargs, fingerprints=None):
+    """
+    Replaces the arguments of an execution by their fingerprints.
+
+    Only the arguments themselves are replaced, values within arguments, e.g. items
+    of lists, are kept.
+
+    Args:
+        args (tuple[Any]): The positional arguments of the execution.
+        kwargs (Dict[str,Any]): The keyword arguments of the execution.
+        fingerprints (Dict[type,Callable[[Any],str]]): Mapping of types to functions,
+            which return the fingerprint of a value of this type.
+
+    Returns:
+        tuple[tuple[Any],Dict[str,Any]]: The positional and keyword arguments, where
+            all arguments that have a fingerprint are replaced by it.
+    """
+
+    def _replace(value):
+        fingerprint = fingerprint_of(value, fingerprints)
+        if fingerprint is None:
+            return value
+        return fingerprint
+
+    args = tuple(_replace(value) for value in args)
+    kwargs = {name: _replace(value) for name, value in kwargs.items()}
+    return args, kwargs
+
+
+def file_fingerprint(path):
+    """
+    Returns the fingerprint of a file, derived from its path, size and mtime.
+
+    This is much cheaper than hashing the content of the file, but relies on the
+    modification time being updated whenever the file changes.
+
+    Args:
+        path (Union[str,os.PathLike]): The path to the file.
+
+    Returns:
+        str: The fingerprint of the file.
+    """
+    path = os.path.abspath(path)
+    stat_result = os.stat(path)
+    return f'{path}:{stat_result.st_size}:{stat_result.st_mtime_ns}'
+
+
+def buffer_fingerprint(value):
+    """
+    Returns the fingerprint of a value, derived from a hash of its buffer.
+
+    Works for all values that support the buffer protocol, e.g. `bytes` or numpy
+    arrays. Besides the content, the format and shape of the buffer are part of the
+    fingerprint.
+
+    Args:
+        value (Any): A value supporting the buffer protocol.
+
+    Returns:
+        str: The fingerprint of the value.
+    """
+    with memoryview(value) as view:
+        content_hash = hashlib.blake2b(digest_size=16)
+        if view.c_contiguous:
+            content_hash.update(view.cast('B'))
+        else:
+            content_hash.update(view.tobytes())
+        return f'{view.format}:{view.shape}:{content_hash.hexdigest()}'
+
+
+def cached_fingerprint(function):
+    """
+    Wraps a fingerprint function, so that the fingerprint is derived only once.
+
+    The fingerprints are cached as long as the values exist, based on their identity.
+    This is only safe for values that aren't changed after their fingerprint was
+    derived for the first time. Values that don't support weak references aren't
+    cached.
+
+    Args:
+        function (Callable[[Any],str]): The function that returns the fingerprint of
+            a value.
+
+    Returns:
+        Callable[[Any],str]: A function returning the cached fingerprint.
+    """
+    cache = {}
+
+    def _cached_fingerprint(value):
+        key = id(value)
+        entry = cache.get(key)
+        if entry is not None and entry[0]() is value:
+            return entry[1]
+        fingerprint = function(value)
+        try:
+            reference = weakref.ref(value, lambda _: cache.pop(key, None))
+        except TypeError:
+            logger.debug("Can't cache fingerprint of %s", type(value))
+            return fingerprint
+        cache[key] = (reference, fingerprint)
+        return fingerprint
+
+    return _cached_fingerprint
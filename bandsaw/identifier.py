@@ -2,6 +2,8 @@
 import hashlib
 import os
 
+from .serialization import SerializableValue
+
 
 _ID_LENGTH = int(os.getenv('BANDSAW_ID_LENGTH', '16'))
 
@@ -17,7 +19,22 @@ def identifier_from_bytes(buffer):
     Returns:
         str: The identifier in form of a string of a hexadecimal number.
     """
-    identifier = hashlib.sha256(buffer).hexdigest()[:_ID_LENGTH]
+    identifier = identifier_from_hash(hashlib.sha256(buffer))
+    return identifier
+
+
+def identifier_from_hash(hash_object):
+    """
+    Derive an identifier from a hash.
+
+    Args:
+        hash_object (hashlib._Hash): The hash object which was updated with the
+            data from which to derive an identifier.
+
+    Returns:
+        str: The identifier in form of a string of a hexadecimal number.
+    """
+    identifier = hash_object.hexdigest()[:_ID_LENGTH]
     return identifier
 
 
@@ -33,3 +50,110 @@ def identifier_from_string(string):
     """
     identifier = identifier_from_bytes(string.encode('utf-8'))
     return identifier
+
+
+class Hasher(SerializableValue):
+    """
+    Defines the hash algorithm, that is used for deriving identifiers.
+
+    Attributes:
+        algorithm (str): The name of the hash algorithm, one of the algorithms
+            supported by `hashlib.new()`.
+        parameters (Dict[str,Any]): Additional parameters for creating the hash,
+            e.g. `digest_size` for `blake2b`.
+    """
+
+    def __init__(self, algorithm='sha256', **parameters):
+        """
+        Create a new hasher.
+
+        Args:
+            algorithm (str): The name of the hash algorithm. Defaults to `sha256`.
+            **parameters: Additional parameters given to `hashlib.new()`, e.g.
+                `digest_size=16` for `blake2b`.
+
+        Raises:
+            ValueError: If the algorithm is unknown, doesn't support the parameters
+                or requires a length for its digest.
+        """
+        self.algorithm = algorithm
+        self.parameters = parameters
+        try:
+            self.new().hexdigest()
+        except TypeError as error:
+            raise ValueError(
+                f"Hash algorithm '{self.name}' can't be used for identifiers: {error}"
+            ) from error
+
+    @property
+    def name(self):
+        """The name of the algorithm together with its parameters as `str`."""
+        if not self.parameters:
+            return self.algorithm
+        parameters = ','.join(
+            f'{name}={value}' for name, value in sorted(self.parameters.items())
+        )
+        return f'{self.algorithm}({parameters})'
+
+    @property
+    def is_default(self):
+        """`True` if this is the default hasher used by bandsaw."""
+        return self.algorithm == 'sha256' and not self.parameters
+
+    def new(self, data=b''):
+        """
+        Creates a new hash object of the algorithm.
+
+        Args:
+            data (Union[bytes,bytearray]): Initial data for the hash.
+
+        Returns:
+            hashlib._Hash: The new hash object.
+        """
+        return hashlib.new(self.algorithm, data, **self.parameters)
+
+    def identifier_from_bytes(self, buffer):
+        """
+        Derive an identifier from a bytebuffer.
+
+        Args:
+            buffer (Union[bytes,bytearray]): The binary data from which to derive an
+                identifier.
+
+        Returns:
+            str: The identifier in form of a string of a hexadecimal number.
+        """
+        return identifier_from_hash(self.new(buffer))
+
+    def identifier_from_string(self, string):
+        """
+        Derive an identifier from a string.
+
+        Args:
+            string (str): The string from which to derive an identifier.
+
+        Returns:
+            str: The identifier in form of a string of a hexadecimal number.
+        """
+        return self.identifier_from_bytes(string.encode('utf-8'))
+
+    def serialized(self):
+        return {
+            'algorithm': self.algorithm,
+            'parameters': self.parameters,
+        }
+
+    @classmethod
+    def deserialize(cls, values):
+        return Hasher(values['algorithm'], **values['parameters'])
+
+    def __eq__(self, other):
+        if not isinstance(other, type(self)):
+            return False
+        return self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"Hasher('{self.name}')"
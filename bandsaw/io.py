@@ -1,6 +1,9 @@
 """Contains classes related to input/output of data."""
 import io
 import logging
+import mmap
+import os
+import stat
 
 
 logger = logging.getLogger(__name__)
@@ -59,6 +62,153 @@ class BytearrayGeneratorToStream(io.RawIOBase):
         return position
 
 
+class HashingStream(io.RawIOBase):
+    """
+    Writable stream that feeds all written bytes into a hash.
+
+    This allows to calculate the hash of serialized data without keeping the data
+    in memory. Optionally, the bytes are additionally written to another stream.
+
+    Attributes:
+        hash (hashlib._Hash): The hash object that is updated with the written
+            bytes.
+    """
+
+    def __init__(self, hash_object, stream=None):
+        """
+        Create a new stream.
+
+        Args:
+            hash_object (hashlib._Hash): The hash object, e.g. `hashlib.sha256()`,
+                that is updated with all bytes written to the stream.
+            stream (io.Stream): A binary stream, to which all bytes are written as
+                well. If `None`, the bytes are only hashed.
+        """
+        self.hash = hash_object
+        self._stream = stream
+        self._position = 0
+        super().__init__()
+
+    def writable(self):
+        return True
+
+    def write(self, buffer):
+        self.hash.update(buffer)
+        if self._stream is not None:
+            self._stream.write(buffer)
+        size = memoryview(buffer).nbytes
+        self._position += size
+        return size
+
+    def tell(self):
+        return self._position
+
+
+class MappedFileStream(io.RawIOBase):
+    """
+    Readable stream over a memory-mapped file.
+
+    Reading from the stream works like reading from the file, but additionally the
+    whole content of the file is available as `buffer` without reading it. This
+    allows serializers to return views into the mapped file instead of copying its
+    content, so that only the pages which are actually accessed are loaded.
+
+    The mapping is copy-on-write, so changing the views doesn't change the file.
+    Closing the stream keeps the mapping alive as long as views into it exist.
+
+    Attributes:
+        buffer (memoryview): A view of the whole content of the file.
+    """
+
+    def __init__(self, mapped_file):
+        """
+        Create a new stream.
+
+        Args:
+            mapped_file (mmap.mmap): The mapped file from which the stream reads.
+        """
+        self._mapped_file = mapped_file
+        self.buffer = memoryview(mapped_file)
+        self._position = 0
+        super().__init__()
+
+    @classmethod
+    def from_stream(cls, stream):
+        """
+        Maps the file of a stream, if it belongs to a regular file.
+
+        Args:
+            stream (io.Stream): A binary stream, which is read from its current
+                position. The stream is closed if the file was mapped.
+
+        Returns:
+            io.Stream: A `MappedFileStream` positioned at the current position of
+                `stream` or `stream` itself, if it can't be mapped, e.g. because it
+                isn't a regular file or is empty.
+        """
+        try:
+            file_descriptor = stream.fileno()
+            stat_result = os.fstat(file_descriptor)
+        except (AttributeError, OSError):
+            return stream
+        if not stat.S_ISREG(stat_result.st_mode) or stat_result.st_size == 0:
+            return stream
+        mapped_file = mmap.mmap(file_descriptor, 0, access=mmap.ACCESS_COPY)
+        mapped_stream = cls(mapped_file)
+        mapped_stream.seek(stream.tell())
+        stream.close()
+        return mapped_stream
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast('B')
+        data = self.buffer[self._position : self._position + view.nbytes]
+        view[: data.nbytes] = data
+        self._position += data.nbytes
+        return data.nbytes
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = self.buffer.nbytes
+        else:
+            end = self._position + size
+        data = self.buffer[self._position : end].tobytes()
+        self._position += len(data)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.buffer.nbytes
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self.buffer.release()
+            try:
+                self._mapped_file.close()
+            except BufferError:
+                # Views into the mapping are still in use, it is closed when the
+                # last one is garbage collected.
+                pass
+        super().close()
+
+
 def read_stream_to_generator(stream, buffer_size=8192):
     """
     Read from a stream into a generator yielding `bytes`.
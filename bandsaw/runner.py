@@ -1,8 +1,10 @@
 """Contains main() function to continue sessions from files"""
 import argparse
 import io
+import json
 import logging
 import os
+import sys
 
 from .run import set_run_id
 from .session import Session
@@ -10,6 +12,8 @@ from .session import Session
 
 logger = logging.getLogger(__name__)
 
+_CHUNK_SIZE = 1024 * 1024
+
 
 def main(args):
     """
@@ -17,7 +21,18 @@ def main(args):
 
     This function allows to read a session from a file, proceed it until it returns
     and then save the state of the session to a new file. It is used for running
-    tasks in a separate process or on different machines.
+    tasks in a separate process or on different machines. Instead of a file, `-` can
+    be given as `--input` or `--output`, in which case the session is read from
+    stdin or written to stdout, so that the session never touches the disk.
+
+    If `--worker` is given, the process keeps running and continues one session
+    after another. Each session is requested by a JSON object on a single line of
+    stdin, which contains the `input` and `output` paths and optionally the flag
+    `reference_attachments`. If `input` is `-`, the object contains the `size` of
+    the session, which directly follows the line. Each finished session is
+    acknowledged by writing a JSON line to stdout, again followed by the session
+    itself if `output` is `-`. Anything else written to stdout, e.g. by the tasks,
+    is redirected to stderr when stdout is used for transferring sessions.
 
     Args:
         args (tuple[str]): The arguments taken from the command line.
@@ -33,14 +48,12 @@ def main(args):
     parser.add_argument(
         '--input',
         dest='input_session',
-        help="The session which should be continued",
-        required=True,
+        help="The session which should be continued, `-` for stdin",
     )
     parser.add_argument(
         '--output',
         dest='output_session',
-        help="The session after continuation ended",
-        required=True,
+        help="The session after continuation ended, `-` for stdout",
     )
     parser.add_argument(
         '--run-id',
@@ -48,20 +61,127 @@ def main(args):
         help="The run id of the workflow",
         required=True,
     )
+    parser.add_argument(
+        '--reference-attachments',
+        dest='reference_attachments',
+        action='store_true',
+        help="Save attached files as references instead of copying their content",
+    )
+    parser.add_argument(
+        '--worker',
+        dest='worker',
+        action='store_true',
+        help="Continue multiple sessions which are requested via stdin",
+    )
     args = parser.parse_args(args=args)
+    if not args.worker and (args.input_session is None or args.output_session is None):
+        parser.error("--input and --output are required if not running as --worker")
 
     set_run_id(args.run_id)
 
+    if args.worker:
+        _run_worker(sys.stdin.buffer, _redirect_stdout_to_stderr())
+        return
+
+    if args.input_session == '-':
+        input_stream = _read_into_memory(sys.stdin.buffer)
+    else:
+        input_stream = io.FileIO(args.input_session, mode='r')
+    if args.output_session == '-':
+        output_stream = _redirect_stdout_to_stderr()
+    else:
+        output_stream = io.FileIO(args.output_session, mode='w')
+    with input_stream, output_stream:
+        _continue_session(input_stream, output_stream, args.reference_attachments)
+
+
+def _continue_session(input_stream, output_stream, reference_attachments=False):
     logger.info("Creating new session")
     session = Session()
 
-    logger.info("Reading session from %s", args.output_session)
-    with io.FileIO(args.input_session, mode='r') as stream:
-        session.restore(stream)
+    logger.info("Reading session")
+    session.restore(input_stream)
 
     logger.info("Proceeding session")
     session.proceed()
 
-    logger.info("Writing session with result to %s", args.output_session)
-    with io.FileIO(args.output_session, mode='w') as stream:
-        session.save(stream)
+    logger.info("Writing session with result")
+    session.save(output_stream, reference_attachments=reference_attachments)
+
+
+def _run_worker(requests, responses):
+    logger.info("Waiting for sessions as worker")
+    for line in requests:
+        request = json.loads(line)
+        if request['input'] == '-':
+            input_stream = _read_into_memory(requests, request['size'])
+        else:
+            input_stream = io.FileIO(request['input'], mode='r')
+        if request['output'] == '-':
+            output_stream = io.BytesIO()
+        else:
+            output_stream = io.FileIO(request['output'], mode='w')
+        with input_stream, output_stream:
+            _continue_session(
+                input_stream,
+                output_stream,
+                request.get('reference_attachments', False),
+            )
+            response = {'status': 'ok'}
+            payload = b''
+            if request['output'] == '-':
+                payload = output_stream.getvalue()
+                response['size'] = len(payload)
+        responses.write(json.dumps(response).encode('utf-8') + b'\n')
+        responses.write(payload)
+        responses.flush()
+    logger.info("No more sessions, worker exits")
+
+
+def _read_into_memory(stream, size=None):
+    """
+    Reads a session from a stream into memory.
+
+    Sessions can only be restored from seekable streams, so sessions transferred via
+    pipes must be kept in memory. They are read chunk by chunk into a single buffer,
+    so that the session isn't copied in memory again.
+
+    Args:
+        stream (io.BufferedReader): The stream from which the session is read.
+        size (int): The size of the session in bytes. If `None`, the session is read
+            until the stream ends.
+
+    Returns:
+        io.BytesIO: The stream containing the session.
+
+    Raises:
+        EOFError: If the stream ends before `size` bytes are read.
+    """
+    buffer = io.BytesIO()
+    remaining = size
+    while remaining is None or remaining > 0:
+        chunk_size = _CHUNK_SIZE if remaining is None else min(_CHUNK_SIZE, remaining)
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer.write(chunk)
+        if remaining is not None:
+            remaining -= len(chunk)
+    if remaining:
+        raise EOFError("Session was not transferred completely")
+    buffer.seek(0)
+    return buffer
+
+
+def _redirect_stdout_to_stderr():
+    """
+    Redirects stdout to stderr and returns a stream to the original stdout.
+
+    Returns:
+        io.BufferedWriter: A binary stream that writes to the original stdout.
+    """
+    sys.stdout.flush()
+    stdout_fd = sys.stdout.fileno()
+    original_stdout = os.fdopen(os.dup(stdout_fd), 'wb')
+    os.dup2(sys.stderr.fileno(), stdout_fd)
+    return original_stdout
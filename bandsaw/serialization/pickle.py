@@ -1,11 +1,62 @@
 """Contains a Serializer which uses pickle for serializing values."""
+import io
+import mmap
+import os
 import pickle
+import stat
+import struct
+import sys
 
+from ..io import MappedFileStream
 from .serializer import Serializer
 
 
+_OUT_OF_BAND_MAGIC = b'BANDSAW5'
+_OUT_OF_BAND_HEADER = struct.Struct('<8sQQ')
+_OUT_OF_BAND_ALIGNMENT = 64
+
+
 class PickleSerializer(Serializer):
-    """A `Serializer` which serializes objects using pickle."""
+    """
+    A `Serializer` which serializes objects using pickle.
+
+    If `out_of_band` is enabled, pickle protocol 5 is used and large contiguous
+    buffers, e.g. the data of numpy arrays, are written as separate blocks after the
+    pickled data instead of being copied into it. When deserializing from a file,
+    these blocks are memory-mapped, so that the buffers are views into the file
+    without copying them. For in-memory streams like `io.BytesIO` the buffers are
+    views into the stream's buffer.
+
+    Attributes:
+        protocol (int): The pickle protocol to use. If `None`, the default protocol
+            of the `pickle` module is used.
+        out_of_band (bool): If large buffers are written out-of-band.
+        out_of_band_threshold (int): The minimum size in bytes of buffers to be
+            written out-of-band. Smaller buffers are pickled in-band.
+    """
+
+    def __init__(self, protocol=None, out_of_band=False, out_of_band_threshold=65536):
+        """
+        Create a new pickle serializer.
+
+        Args:
+            protocol (int): The pickle protocol to use. If `None`, the default
+                protocol of the `pickle` module is used. Ignored if `out_of_band` is
+                `True`, which always uses protocol 5.
+            out_of_band (bool): If `True`, large buffers are written out-of-band.
+                Defaults to `False`.
+            out_of_band_threshold (int): The minimum size in bytes of buffers to be
+                written out-of-band. Defaults to 64 KiB.
+
+        Raises:
+            ValueError: If `out_of_band` is used with python older than 3.8, which
+                doesn't support pickle protocol 5.
+        """
+        if out_of_band and sys.version_info < (3, 8):
+            raise ValueError("Out-of-band buffers require python 3.8 or newer")
+        self.protocol = protocol
+        self.out_of_band = out_of_band
+        self.out_of_band_threshold = out_of_band_threshold
 
     def serialize(self, value, stream):
         """
@@ -16,7 +67,10 @@ class PickleSerializer(Serializer):
             stream (io.Stream): The binary stream where the serialized value is
                 written.
         """
-        pickle.dump(value, stream)
+        if self.out_of_band:
+            self._serialize_out_of_band(value, stream)
+        else:
+            pickle.dump(value, stream, protocol=self.protocol)
 
     def deserialize(self, stream):
         """
@@ -29,4 +83,116 @@ class PickleSerializer(Serializer):
         Returns:
              Any: The object/value which was deserialized.
         """
+        if self.out_of_band:
+            return self._deserialize_out_of_band(stream)
         return pickle.load(stream)
+
+    def _serialize_out_of_band(self, value, stream):
+        buffers = []
+
+        def _collect_buffer(pickle_buffer):
+            try:
+                buffer = pickle_buffer.raw()
+            except BufferError:
+                # not contiguous, needs to be pickled in-band
+                return True
+            if buffer.nbytes < self.out_of_band_threshold:
+                return True
+            buffers.append(buffer)
+            return False
+
+        data = pickle.dumps(value, protocol=5, buffer_callback=_collect_buffer)
+
+        stream.write(
+            _OUT_OF_BAND_HEADER.pack(_OUT_OF_BAND_MAGIC, len(data), len(buffers))
+        )
+        stream.write(struct.pack(f'<{len(buffers)}Q', *(b.nbytes for b in buffers)))
+        stream.write(data)
+        position = _OUT_OF_BAND_HEADER.size + 8 * len(buffers) + len(data)
+        for buffer in buffers:
+            padding = -position % _OUT_OF_BAND_ALIGNMENT
+            stream.write(b'\0' * padding)
+            stream.write(buffer)
+            position += padding + buffer.nbytes
+
+    def _deserialize_out_of_band(self, stream):
+        start = stream.tell() if stream.seekable() else None
+        header = stream.read(_OUT_OF_BAND_HEADER.size)
+        if header[:8] != _OUT_OF_BAND_MAGIC:
+            # Value was written without out-of-band buffers
+            if start is not None:
+                stream.seek(start)
+                return pickle.load(stream)
+            return pickle.loads(header + stream.read())
+        if len(header) < _OUT_OF_BAND_HEADER.size:
+            raise EOFError("Unexpected end of out-of-band pickle data")
+        _, data_size, buffer_count = _OUT_OF_BAND_HEADER.unpack(header)
+        sizes = struct.unpack(
+            f'<{buffer_count}Q', _read_exactly(stream, 8 * buffer_count)
+        )
+        data = _read_exactly(stream, data_size)
+        position = _OUT_OF_BAND_HEADER.size + 8 * buffer_count + data_size
+
+        content = None
+        if sizes and start is not None:
+            content = _map_stream(stream)
+        buffers = []
+        for size in sizes:
+            padding = -position % _OUT_OF_BAND_ALIGNMENT
+            position += padding
+            if content is not None:
+                buffers.append(content[start + position : start + position + size])
+            else:
+                _read_exactly(stream, padding)
+                buffer = bytearray(size)
+                _read_into(stream, buffer)
+                buffers.append(buffer)
+            position += size
+        if content is not None:
+            stream.seek(start + position)
+        return pickle.loads(data, buffers=buffers)
+
+
+def _map_stream(stream):
+    """
+    Returns a memoryview of the whole content of a stream without copying it.
+
+    Args:
+        stream (io.Stream): A seekable binary stream.
+
+    Returns:
+        memoryview: A memoryview over the content of the stream, or `None` if
+            the content of the stream can't be accessed without copying it.
+    """
+    if isinstance(stream, MappedFileStream):
+        return stream.buffer
+    if isinstance(stream, io.BytesIO):
+        # getvalue() doesn't copy if the stream wasn't modified after creating it
+        # from bytes, contrary to getbuffer() it doesn't prevent closing the stream.
+        return memoryview(stream.getvalue())
+    try:
+        file_descriptor = stream.fileno()
+    except (AttributeError, OSError):
+        return None
+    if not stat.S_ISREG(os.fstat(file_descriptor).st_mode):
+        return None
+    # A copy-on-write mapping, so that the deserialized values are writable without
+    # changing the underlying file.
+    mapped_file = mmap.mmap(file_descriptor, 0, access=mmap.ACCESS_COPY)
+    return memoryview(mapped_file)
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("Unexpected end of out-of-band pickle data")
+    return data
+
+
+def _read_into(stream, buffer):
+    view = memoryview(buffer)
+    while view:
+        read = stream.readinto(view)
+        if not read:
+            raise EOFError("Unexpected end of out-of-band pickle data")
+        view = view[read:]
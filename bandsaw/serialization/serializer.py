@@ -23,7 +23,8 @@ class Serializer(abc.ABC):
 
         Args:
             stream (io.Stream): The binary stream from where the serialized value is
-                read.
+                read. If it is a `bandsaw.io.MappedFileStream`, the serializer can
+                return views into its `buffer` instead of copying the data.
 
         Returns:
              Any: The object/value which was deserialized.
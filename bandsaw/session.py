@@ -1,10 +1,10 @@
 """Contains classes for representing an advising session"""
 import abc
 import collections.abc
-import io
 import json
 import logging
 import pathlib
+import shutil
 import zipfile
 
 from .config import get_configuration
@@ -41,6 +41,11 @@ class _FileAttachment(Attachment):
     def __init__(self, path):
         self._path = path
 
+    @property
+    def path(self):
+        """The path to the attached file."""
+        return self._path
+
     def open(self):
         return self._path.open('rb')
 
@@ -103,18 +108,49 @@ class Attachments(collections.abc.Mapping):
             if file_path[:12] == 'attachments/':
                 attachment_name = file_path.split('/', 1)[1]
                 self._items[attachment_name] = _ZipAttachment(zip_file, file_path)
+            elif file_path == 'attachments.json':
+                references = json.loads(zip_file.read(file_path))
+                for attachment_name, path in references.items():
+                    self._items[attachment_name] = _FileAttachment(pathlib.Path(path))
 
-    def store(self, zip_file):
+    def store(self, zip_file, compression=None, reference_filter=None):
         """
         Stores all attachments in a zip file.
 
+        The content of the attachments is streamed into the zip file in chunks, so
+        that even large attachments don't need to fit into memory. Alternatively,
+        attachments that are files can be stored as references to their path, which
+        avoids copying them at all, if the zip file is read on the same file system.
+
         Args:
             zip_file (zipfile.ZipFile): The zip file where the attachments should be
                 stored in.
+            compression (bandsaw.compression.Compression): Defines how individual
+                attachments are compressed. If `None`, the compression of the zip
+                file is used.
+            reference_filter (Callable[[pathlib.Path],bool]): A function that is
+                called with the path of each attachment that is a file. If it
+                returns `True`, only a reference to the path is stored instead of the
+                content of the file. If `None`, the content of all attachments is
+                stored.
         """
+        references = {}
         for name, attachment in self._items.items():
-            with attachment.open() as stream:
-                zip_file.writestr('attachments/' + name, stream.read())
+            if (
+                reference_filter is not None
+                and isinstance(attachment, _FileAttachment)
+                and reference_filter(attachment.path)
+            ):
+                references[name] = str(attachment.path.absolute())
+                continue
+            entry = 'attachments/' + name
+            if compression is not None:
+                entry = compression.entry(entry)
+            with attachment.open() as source:
+                with zip_file.open(entry, 'w', force_zip64=True) as target:
+                    shutil.copyfileobj(source, target)
+        if references:
+            zip_file.writestr('attachments.json', json.dumps(references))
 
     def __setitem__(self, key, path):
         if key in self._items:
@@ -187,6 +223,36 @@ class Ids:
         return hash(self.session_id)
 
 
+class _RestoredValue:
+    """
+    Descriptor for values of a session, that are deserialized on first access.
+
+    When a session is restored, its values are not deserialized immediately.
+    Instead, the name of their entry in the archive is remembered and the value is
+    only deserialized from the archive once it is accessed. Assigning a new value
+    replaces the one from the archive without deserializing it at all.
+    """
+
+    def __init__(self, entry_name):
+        self.entry_name = entry_name
+        self.attribute_name = None
+
+    def __set_name__(self, owner, name):
+        self.attribute_name = name
+
+    def __get__(self, session, owner=None):
+        if session is None:
+            return self
+        if self.entry_name in session._restored_entries:
+            value = session._load_restored_value(self.entry_name)
+            session.__dict__[self.attribute_name] = value
+        return session.__dict__[self.attribute_name]
+
+    def __set__(self, session, value):
+        session._restored_entries.discard(self.entry_name)
+        session.__dict__[self.attribute_name] = value
+
+
 class Session:
     """
     Class that handles the advising of an execution.
@@ -215,6 +281,12 @@ class Session:
     # pylint: disable=too-many-instance-attributes
     # is reasonable in this case.
 
+    task = _RestoredValue('task.dat')
+    execution = _RestoredValue('execution.dat')
+    context = _RestoredValue('context.dat')
+    result = _RestoredValue('result.dat')
+    _moderator = _RestoredValue('moderator.dat')
+
     def __init__(
         self,
         task=None,
@@ -226,6 +298,9 @@ class Session:
         Create a new session.
 
         """
+        self._archive = None
+        self._archive_stream = None
+        self._restored_entries = set()
         self.task = task
         self.execution = execution
         self.context = Context()
@@ -253,17 +328,22 @@ class Session:
 
         self._trigger_on_session_created()
 
-        self.proceed()
+        try:
+            self.proceed()
 
-        if not self._moderator.is_finished:
-            raise RuntimeError(
-                f"Not all advice has been applied. "
-                f"Misbehaving advice {self._moderator.current_advice}"
-            )
+            if not self._moderator.is_finished:
+                raise RuntimeError(
+                    f"Not all advice has been applied. "
+                    f"Misbehaving advice {self._moderator.current_advice}"
+                )
 
-        self._trigger_on_session_finished()
+            self._trigger_on_session_finished()
 
-        return self.result
+            return self.result
+        finally:
+            # The session is finished, so the stream it was restored from isn't
+            # needed anymore
+            self._close_archive()
 
     @property
     def ids(self):
@@ -351,94 +431,143 @@ class Session:
         self.result = result
         self._moderator.skip(self)
 
-    def save(self, stream):
+    def save(self, stream, reference_attachments=False):
         """
         Suspend the session to be resumed later or elsewhere.
+
+        Args:
+            stream (io.Stream): The binary stream to which the session is written.
+            reference_attachments (bool): If `True`, attachments that are files
+                outside of the temporary directory are saved as references to their
+                paths instead of copying their content. This must only be used if the
+                session is restored on the same file system. Defaults to `False`.
         """
-        self._store_as_zip(stream)
+        self._store_as_zip(stream, reference_attachments)
 
     def restore(self, stream):
         """
         Resume a prior suspended session.
+
+        The values of the session, e.g. its task, execution or result, are only
+        deserialized when they are accessed for the first time. Therefore, the
+        stream must stay open and unchanged as long as the session is used. The
+        session takes ownership of the stream and closes it, when `initiate()`
+        finishes or when the session is restored from another stream.
+
+        Raises:
+            ValueError: If the session was saved using a different hash algorithm than
+                the one of its configuration.
         """
         self._load_from_zip(stream)
         return self
 
+    def _close_archive(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive_stream.close()
+            self._archive = None
+            self._archive_stream = None
+
     def _load_from_zip(self, stream):
+        self._close_archive()
 
         # We don't use with here, because we don't want to close the zip file
         # This allows the attachment's container, to access the attachments from the
-        # archive
+        # archive, and the values of the session to be deserialized when accessed
         archive = zipfile.ZipFile(stream, 'r')  # pylint: disable=consider-using-with
 
         session_json = json.loads(archive.read('session.json'))
         self.configuration = get_configuration(session_json['configuration'])
         self._advice_chain = session_json['advice_chain']
         self._ids = Ids.from_string(session_json['ids'])
+        hasher_name = session_json.get('hasher', 'sha256')
+        if hasher_name != self.configuration.hasher.name:
+            raise ValueError(
+                f"Session was saved using hash algorithm '{hasher_name}', but its "
+                f"configuration uses '{self.configuration.hasher.name}'"
+            )
 
         run_json = json.loads(archive.read('run.json'))
         self._run = Run.from_json(run_json)
 
-        serializer = self.configuration.serializer
-
-        stream = io.BytesIO(archive.read('task.dat'))
-        self.task = serializer.deserialize(stream)
-
-        stream = io.BytesIO(archive.read('execution.dat'))
-        self.execution = serializer.deserialize(stream)
-
-        stream = io.BytesIO(archive.read('context.dat'))
-        self.context = serializer.deserialize(stream)
-
-        stream = io.BytesIO(archive.read('result.dat'))
-        self.result = serializer.deserialize(stream)
-
-        stream = io.BytesIO(archive.read('moderator.dat'))
-        self._moderator = serializer.deserialize(stream)
-        if self._moderator is not None:
-            self._moderator.advice_chain = self.configuration.get_advice_chain(
-                self._advice_chain
-            )
+        self._archive = archive
+        self._archive_stream = stream
+        self._restored_entries = {
+            'task.dat',
+            'execution.dat',
+            'context.dat',
+            'result.dat',
+            'moderator.dat',
+        }
 
         self.attachments = Attachments(archive)
 
-    def _store_as_zip(self, stream):
-        serializer = self.configuration.serializer
-
-        with zipfile.ZipFile(stream, 'w') as archive:
+    def _store_as_zip(self, stream, reference_attachments=False):
+        compression = self.configuration.session_compression
+        with compression.open_archive(stream) as archive:
             session_json = json.dumps(
                 {
                     'configuration': self.configuration.module_name,
                     'advice_chain': self._advice_chain,
                     'ids': str(self.ids),
+                    'hasher': self.configuration.hasher.name,
                 }
             )
-            archive.writestr('session.json', session_json)
+            archive.writestr(compression.entry('session.json'), session_json)
 
             run_json = json.dumps(self.run.to_json())
-            archive.writestr('run.json', run_json)
-
-            stream = io.BytesIO()
-            serializer.serialize(self.task, stream)
-            archive.writestr('task.dat', stream.getvalue())
-
-            stream = io.BytesIO()
-            serializer.serialize(self.execution, stream)
-            archive.writestr('execution.dat', stream.getvalue())
-
-            stream = io.BytesIO()
-            serializer.serialize(self.context, stream)
-            archive.writestr('context.dat', stream.getvalue())
-
-            stream = io.BytesIO()
-            serializer.serialize(self.result, stream)
-            archive.writestr('result.dat', stream.getvalue())
-
-            stream = io.BytesIO()
-            serializer.serialize(self._moderator, stream)
-            archive.writestr('moderator.dat', stream.getvalue())
-
-            self.attachments.store(archive)
+            archive.writestr(compression.entry('run.json'), run_json)
+
+            self._store_value(archive, 'task.dat', 'task')
+            self._store_value(archive, 'execution.dat', 'execution')
+            self._store_value(archive, 'context.dat', 'context')
+            self._store_value(archive, 'result.dat', 'result')
+            self._store_value(archive, 'moderator.dat', '_moderator')
+
+            reference_filter = None
+            if reference_attachments:
+                reference_filter = self._is_outside_of_temporary_directory
+            self.attachments.store(archive, compression, reference_filter)
+
+    def _is_outside_of_temporary_directory(self, path):
+        # Files in the temporary directory are deleted when the interpreter ends,
+        # so they can't be referenced by other processes.
+        temporary_directory = self.configuration.temporary_directory.resolve()
+        return temporary_directory not in path.resolve().parents
+
+    def _load_restored_value(self, name):
+        self._restored_entries.discard(name)
+        value = self._read_value(self._archive, name)
+        if name == 'moderator.dat' and value is not None:
+            value.advice_chain = self.configuration.get_advice_chain(
+                self._advice_chain
+            )
+        return value
+
+    def _store_value(self, archive, name, attribute_name):
+        if name in self._restored_entries:
+            # The value was never accessed since the session was restored, so we
+            # can copy its serialized form without deserializing it.
+            entry = self.configuration.session_compression.entry(name)
+            with self._archive.open(name, 'r') as source:
+                with archive.open(entry, 'w', force_zip64=True) as target:
+                    shutil.copyfileobj(source, target)
+        else:
+            self._write_value(archive, name, getattr(self, attribute_name))
+
+    def _read_value(self, archive, name):
+        # Deserialize directly from the archive, without reading the whole entry
+        # into memory first.
+        with archive.open(name, 'r') as stream:
+            return self.configuration.serializer.deserialize(stream)
+
+    def _write_value(self, archive, name, value):
+        # Serialize directly into the archive, without buffering the serialized
+        # value in memory first. As the size is unknown in advance, we need zip64 to
+        # support values larger than 2 GiB.
+        entry = self.configuration.session_compression.entry(name)
+        with archive.open(entry, 'w', force_zip64=True) as stream:
+            self.configuration.serializer.serialize(value, stream)
 
     def _trigger_on_session_created(self):
         logger.debug("running extensions before advice")
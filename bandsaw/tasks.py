@@ -3,7 +3,7 @@ import abc
 import inspect
 import types
 
-from .identifier import identifier_from_string
+from .identifier import Hasher
 from .modules import object_as_import, import_object
 from .result import Result
 from .serialization import SerializableValue
@@ -18,15 +18,20 @@ class Task(SerializableValue, abc.ABC):
             task definition.
         source (str): The python source code as string which defines the task.
         bytecode (bytes): The compiled byte code of the task definition.
+        hasher (bandsaw.identifier.Hasher): The hash algorithm used for deriving
+            the task id.
     """
 
     # For different types of callable
     # https://stackoverflow.com/questions/19314405/how-to-detect-is-decorator-has-been-applied-to-method-or-function
 
-    def __init__(self, id_tuple, advice_parameters):
+    def __init__(self, id_tuple, advice_parameters, hasher=None):
         if 'version' in advice_parameters:
             id_tuple += (advice_parameters['version'],)
-        self.task_id = identifier_from_string(repr(id_tuple))
+        self.hasher = hasher or Hasher()
+        if not self.hasher.is_default:
+            id_tuple += (self.hasher.name,)
+        self.task_id = self.hasher.identifier_from_string(repr(id_tuple))
         self._advice_parameters = advice_parameters
 
     @property
@@ -85,7 +90,7 @@ class Task(SerializableValue, abc.ABC):
         return result
 
     @classmethod
-    def create_task(cls, obj, advice_parameters=None):
+    def create_task(cls, obj, advice_parameters=None, hasher=None):
         """
         Factory for creating a task for different Python objects.
 
@@ -93,6 +98,8 @@ class Task(SerializableValue, abc.ABC):
             obj (Any): Python object that should be run as a task.
             advice_parameters (dict): A dictionary containing additional arguments to
                 be used by the advices.
+            hasher (bandsaw.identifier.Hasher): The hash algorithm used for deriving
+                the task id. If `None`, the default algorithm is used.
 
         Returns:
             bandsaw.tasks.Task: Instance of `Task` class that allows to execute the
@@ -105,9 +112,9 @@ class Task(SerializableValue, abc.ABC):
             advice_parameters = {}
         if isinstance(obj, types.FunctionType):
             if '.<locals>.' in obj.__qualname__:
-                return _FunctionWithClosureTask(obj, advice_parameters)
+                return _FunctionWithClosureTask(obj, advice_parameters, hasher)
             function_name, module_name = object_as_import(obj)
-            return _FunctionTask(function_name, module_name, advice_parameters)
+            return _FunctionTask(function_name, module_name, advice_parameters, hasher)
         raise TypeError(f"Unsupported task object of type {type(obj)}")
 
 
@@ -116,11 +123,11 @@ class _FunctionTask(Task):
     Task class that supports free functions.
     """
 
-    def __init__(self, function_name, module_name, advice_parameters):
+    def __init__(self, function_name, module_name, advice_parameters, hasher=None):
         self.function_name = function_name
         self.module_name = module_name
         id_tuple = (self.function_name, self.module_name)
-        super().__init__(id_tuple, advice_parameters)
+        super().__init__(id_tuple, advice_parameters, hasher)
 
     @property
     def function(self):
@@ -155,12 +162,16 @@ class _FunctionTask(Task):
             'module_name': self.module_name,
             'function_name': self.function_name,
             'advice_parameters': self.advice_parameters,
+            'hasher': self.hasher,
         }
 
     @classmethod
     def deserialize(cls, values):
         return _FunctionTask(
-            values['function_name'], values['module_name'], values['advice_parameters']
+            values['function_name'],
+            values['module_name'],
+            values['advice_parameters'],
+            values.get('hasher'),
         )
 
     def __str__(self):
@@ -172,9 +183,9 @@ class _FunctionWithClosureTask(Task):
     Task that can execute locally defined functions.
     """
 
-    def __init__(self, function, advice_parameters):
+    def __init__(self, function, advice_parameters, hasher=None):
         self.function = function
-        super().__init__((self.bytecode,), advice_parameters)
+        super().__init__((self.bytecode,), advice_parameters, hasher)
 
     @property
     def source(self):
@@ -107,6 +107,7 @@ class TrackerExtension(Extension):
                 'id': session.task.task_id,
                 'definition': str(session.task),
                 'advice_parameters': session.task.advice_parameters,
+                'hasher': session.task.hasher.name,
             },
         }
         return task_info
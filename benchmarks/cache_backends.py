@@ -0,0 +1,102 @@
+"""
+Benchmark for storing and looking up cached results in different cache backends.
+
+Stores a number of small results in each backend and afterwards looks up a random
+sample of them, measuring stores and lookups per second as well as the disk usage.
+With a million entries, the directory backend creates a million files, which is
+expensive both in inodes and in directory lookups, while the SQLite backend keeps
+all of them in a single database file.
+
+Run it from the project directory with
+
+    python benchmarks/cache_backends.py [--entries ENTRIES] [--lookups LOOKUPS]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from bandsaw.cache.directory import DirectoryBackend
+from bandsaw.cache.sqlite import SqliteBackend
+
+
+RESULT = os.urandom(200)
+
+
+def _task_id(index):
+    return f'task-{index % 100}'
+
+
+def _execution_id(index):
+    return f'{index:040x}'
+
+
+def _disk_usage(directory):
+    total = 0
+    for path, _, files in os.walk(directory):
+        for name in files:
+            total += os.stat(os.path.join(path, name)).st_blocks * 512
+    return total
+
+
+def _measure(backend, directory, entries, lookups):
+    start = time.perf_counter()
+    for index in range(entries):
+        with backend.store(_task_id(index), _execution_id(index)) as stream:
+            stream.write(RESULT)
+    store_duration = time.perf_counter() - start
+
+    sample = random.sample(range(entries), min(lookups, entries))
+    start = time.perf_counter()
+    for index in sample:
+        stream = backend.open(_task_id(index), _execution_id(index))
+        with stream:
+            stream.read()
+    lookup_duration = time.perf_counter() - start
+    return (
+        entries / store_duration,
+        len(sample) / lookup_duration,
+        _disk_usage(directory),
+    )
+
+
+def main():
+    """Runs the benchmark and prints the results as a table."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--entries',
+        type=int,
+        default=10**6,
+        help="Number of results stored in each backend",
+    )
+    parser.add_argument(
+        '--lookups',
+        type=int,
+        default=10**4,
+        help="Number of random results looked up in each backend",
+    )
+    args = parser.parse_args()
+
+    backends = [
+        ('directory', DirectoryBackend),
+        ('sqlite', lambda directory: SqliteBackend(directory + '/cache.sqlite')),
+    ]
+    print(f"{'backend':<10} {'stores/s':>10} {'lookups/s':>10} {'disk MB':>10}")
+    for name, create_backend in backends:
+        directory = tempfile.mkdtemp()
+        try:
+            stores, lookups, disk_usage = _measure(
+                create_backend(directory), directory, args.entries, args.lookups
+            )
+        finally:
+            shutil.rmtree(directory)
+        print(
+            f"{name:<10} {stores:>10.0f} {lookups:>10.0f} "
+            f"{disk_usage / 1024 / 1024:>10.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark for reading large cached results with and without memory-mapping.
+
+Stores a large buffer as result with the `PickleSerializer` and measures how long
+reading it from the cache takes, when it is pickled in-band, pickled out-of-band and
+when the cache file is additionally memory-mapped by the `CachingAdvice`.
+Additionally, the time for accessing a single byte of the result and for touching
+all of its pages is measured, which shows, that mapped results are only loaded when
+they are accessed.
+
+Run it from the project directory with
+
+    python benchmarks/cache_reads.py [--megabytes MEGABYTES]
+"""
+import argparse
+import mmap
+import pickle
+import shutil
+import tempfile
+import time
+
+from bandsaw.advices.cache import CachingAdvice
+from bandsaw.config import Configuration
+from bandsaw.execution import Execution
+from bandsaw.result import Result
+from bandsaw.serialization.pickle import PickleSerializer
+from bandsaw.session import Session
+from bandsaw.tasks import Task
+
+
+def _task_function():
+    pass
+
+
+def _session(configuration):
+    task = Task.create_task(_task_function)
+    session = Session(task, Execution('benchmark'), configuration)
+    session.proceed = lambda: None
+    return session
+
+
+def _read(advice, configuration):
+    session = _session(configuration)
+    concluded = []
+    session.conclude = concluded.append
+    advice.before(session)
+    return concluded[0].value
+
+
+def main():
+    """Runs the benchmark and prints the results as a table."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--megabytes',
+        type=int,
+        default=1024,
+        help="Size of the cached result in MiB",
+    )
+    args = parser.parse_args()
+
+    variants = [
+        ('in-band', PickleSerializer(protocol=5), False),
+        ('out-of-band', PickleSerializer(out_of_band=True), False),
+        ('mapped', PickleSerializer(out_of_band=True), True),
+    ]
+    print(f"{'variant':<12} {'hit ms':>10} {'1 byte ms':>10} {'all pages ms':>13}")
+    for name, serializer, memory_map in variants:
+        configuration = Configuration()
+        configuration.set_serializer(serializer)
+        directory = tempfile.mkdtemp()
+        try:
+            session = _session(configuration)
+            advice = CachingAdvice(directory, memory_map=memory_map)
+            advice.before(session)
+            data = bytearray(args.megabytes * 1024 * 1024)
+            session.result = Result(value=pickle.PickleBuffer(data))
+            advice.after(session)
+            del data, session
+
+            start = time.perf_counter()
+            value = _read(advice, configuration)
+            hit = time.perf_counter() - start
+            start = time.perf_counter()
+            _ = value[len(value) // 2]
+            single = time.perf_counter() - start
+            start = time.perf_counter()
+            _ = sum(value[:: mmap.PAGESIZE])
+            pages = time.perf_counter() - start
+            del value
+        finally:
+            shutil.rmtree(directory)
+        print(
+            f"{name:<12} {hit * 1000:>10.1f} {single * 1000:>10.3f} "
+            f"{pages * 1000:>13.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
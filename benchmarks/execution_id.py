@@ -0,0 +1,91 @@
+"""
+Benchmark for deriving execution ids from the arguments of tasks.
+
+Calculates the execution ids for calls with large arguments, once by serializing
+the arguments into memory and hashing the serialized bytes, and once by hashing the
+serialized data while it is written, which is what `bandsaw.decorator` does. Reports
+the time needed and the peak of additionally allocated memory.
+
+Run it from the project directory with
+
+    python benchmarks/execution_id.py [--size-mb SIZE]
+"""
+import argparse
+import io
+import random
+import time
+import tracemalloc
+
+from bandsaw.decorator import _calculate_execution_id
+from bandsaw.identifier import identifier_from_bytes
+from bandsaw.serialization import JsonSerializer, PickleSerializer
+
+
+def _buffered_execution_id(args, kwargs, serializer):
+    stream = io.BytesIO()
+    serializer.serialize((args, kwargs), stream)
+    return identifier_from_bytes(stream.getvalue())
+
+
+def _floats(size):
+    return [random.gauss(0.0, 1.0) for _ in range(size // 9)]
+
+
+def _text(size):
+    return ''.join(random.choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(size))
+
+
+def _measure(function, args, serializer):
+    tracemalloc.start()
+    start = time.perf_counter()
+    execution_id = function(args, {}, serializer)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return execution_id, duration, peak
+
+
+def main():
+    """Runs the benchmark and prints the results as a table."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--size-mb',
+        type=int,
+        default=64,
+        help="Approximate size of each argument in MB",
+    )
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    payloads = [
+        ('bytes', (random.randbytes(size),)),
+        ('floats', (_floats(size),)),
+        ('text', (_text(size),)),
+    ]
+    serializers = [
+        ('pickle', PickleSerializer()),
+        ('json', JsonSerializer()),
+    ]
+    functions = [
+        ('buffered', _buffered_execution_id),
+        ('streaming', _calculate_execution_id),
+    ]
+
+    print(
+        f"{'payload':<8} {'serializer':<10} {'hashing':<10} "
+        f"{'time s':>8} {'peak MB':>9}"
+    )
+    for payload_name, payload in payloads:
+        for serializer_name, serializer in serializers:
+            if serializer_name == 'json' and payload_name == 'bytes':
+                continue
+            for function_name, function in functions:
+                _, duration, peak = _measure(function, payload, serializer)
+                print(
+                    f"{payload_name:<8} {serializer_name:<10} {function_name:<10} "
+                    f"{duration:>8.3f} {peak / 1024 / 1024:>9.2f}"
+                )
+
+
+if __name__ == '__main__':
+    main()
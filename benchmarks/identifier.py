@@ -0,0 +1,73 @@
+"""
+Benchmark for deriving ids using different hash algorithms.
+
+Measures how many ids per second can be derived with each algorithm, that can be
+configured with `Configuration.set_hash_algorithm()`, both for small inputs like the
+definitions of tasks and for large serialized arguments of executions.
+
+Run it from the project directory with
+
+    python benchmarks/identifier.py [--seconds SECONDS]
+"""
+import argparse
+import os
+import time
+
+from bandsaw.identifier import Hasher
+
+
+HASHERS = [
+    Hasher('sha256'),
+    Hasher('sha1'),
+    Hasher('md5'),
+    Hasher('sha512'),
+    Hasher('blake2b'),
+    Hasher('blake2b', digest_size=16),
+    Hasher('blake2s'),
+    Hasher('sha3_256'),
+]
+
+INPUTS = [
+    ('task', repr(('my_task_function', 'my.workflow.tasks')).encode('utf-8')),
+    ('64 KiB', os.urandom(64 * 1024)),
+    ('16 MiB', os.urandom(16 * 1024 * 1024)),
+]
+
+
+def _measure(hasher, data, seconds):
+    count = 0
+    start = time.perf_counter()
+    end = start + seconds
+    while True:
+        hasher.identifier_from_bytes(data)
+        count += 1
+        now = time.perf_counter()
+        if now >= end:
+            break
+    return count / (now - start)
+
+
+def main():
+    """Runs the benchmark and prints the results as a table."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--seconds',
+        type=float,
+        default=1.0,
+        help="Duration of the measurement for each algorithm and input",
+    )
+    args = parser.parse_args()
+
+    print(f"{'algorithm':<26} {'input':<8} {'ids/s':>12} {'MB/s':>10}")
+    for hasher in HASHERS:
+        for input_name, data in INPUTS:
+            ids_per_second = _measure(hasher, data, args.seconds)
+            megabytes_per_second = ids_per_second * len(data) / 1024 / 1024
+            print(
+                f"{hasher.name:<26} {input_name:<8} {ids_per_second:>12.0f} "
+                f"{megabytes_per_second:>10.1f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
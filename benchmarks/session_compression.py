@@ -0,0 +1,143 @@
+"""
+Benchmark for the compression of session archives.
+
+Saves and restores sessions with realistic payloads using the different
+compression methods and levels, that can be configured with
+`Configuration.set_session_compression()`, and reports the size of the archives
+together with the time needed for saving and restoring them.
+
+Run it from the project directory with
+
+    python benchmarks/session_compression.py [--size-mb SIZE]
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+from bandsaw.config import Configuration
+from bandsaw.execution import Execution
+from bandsaw.result import Result
+from bandsaw.session import Ids, Session
+
+
+configuration = Configuration()
+
+COMPRESSIONS = [
+    ('stored', None),
+    ('deflate', 1),
+    ('deflate', 6),
+    ('deflate', 9),
+    ('bzip2', 9),
+    ('lzma', None),
+]
+
+
+def _floats(size):
+    return [random.gauss(0.0, 1.0) for _ in range(size // 9)]
+
+
+def _records(size):
+    return [
+        {
+            'id': index,
+            'name': f'customer-{index}',
+            'country': random.choice(['DE', 'US', 'FR', 'JP', 'BR']),
+            'score': round(random.random(), 4),
+            'tags': random.sample(['new', 'vip', 'churned', 'trial', 'eu'], 2),
+        }
+        for index in range(size // 100)
+    ]
+
+
+def _random_bytes(size):
+    return os.urandom(size)
+
+
+def _log_file(size, directory):
+    path = os.path.join(directory, 'session.log')
+    levels = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING']
+    with open(path, 'w') as stream:
+        written = 0
+        line_number = 0
+        while written < size:
+            line = (
+                f"2021-10-18 12:00:{line_number % 60:02d} worker-{line_number % 8} "
+                f"{random.choice(levels)} bandsaw.session: processed item "
+                f"{line_number} in {random.random():.6f}s\n"
+            )
+            written += stream.write(line)
+            line_number += 1
+    return path
+
+
+def _session(payload, attachment=None):
+    session = Session(None, Execution('e', (payload,)), configuration)
+    session._ids = Ids('t', 'e', 'r')  # pylint: disable=protected-access
+    session.result = Result(value=payload)
+    if attachment is not None:
+        session.attachments['session.log'] = attachment
+    return session
+
+
+def _measure(session):
+    start = time.perf_counter()
+    stream = io.BytesIO()
+    session.save(stream)
+    save_time = time.perf_counter() - start
+    size = stream.tell()
+
+    stream.seek(0)
+    start = time.perf_counter()
+    restored = Session().restore(stream)
+    if 'session.log' in restored.attachments:
+        with restored.attachments['session.log'].open() as attachment:
+            attachment.read()
+    restore_time = time.perf_counter() - start
+    return size, save_time, restore_time
+
+
+def main():
+    """Runs the benchmark and prints the results as a table."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--size-mb',
+        type=int,
+        default=16,
+        help="Approximate size of each payload in MB",
+    )
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as directory:
+        payloads = [
+            ('floats', _session(_floats(size))),
+            ('records', _session(_records(size))),
+            ('random bytes', _session(_random_bytes(size))),
+            ('log attachment', _session(None, _log_file(size, directory))),
+        ]
+
+        print(
+            f"{'payload':<16} {'compression':<12} {'size MB':>9} {'ratio':>7} "
+            f"{'save s':>8} {'restore s':>10}"
+        )
+        for payload_name, session in payloads:
+            uncompressed_size = None
+            for method, level in COMPRESSIONS:
+                configuration.set_session_compression(method, level)
+                archive_size, save_time, restore_time = _measure(session)
+                if uncompressed_size is None:
+                    uncompressed_size = archive_size
+                name = method if level is None else f'{method}-{level}'
+                print(
+                    f"{payload_name:<16} {name:<12} "
+                    f"{archive_size / 1024 / 1024:>9.2f} "
+                    f"{archive_size / uncompressed_size:>7.2f} "
+                    f"{save_time:>8.3f} {restore_time:>10.3f}"
+                )
+
+
+if __name__ == '__main__':
+    main()
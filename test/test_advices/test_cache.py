@@ -1,13 +1,25 @@
+import fcntl
+import mmap
+import os
 import pathlib
+import pickle
 import shutil
+import sqlite3
 import tempfile
+import threading
+import time
 import unittest
+import unittest.mock
 
-from bandsaw.advices.cache import CachingAdvice
+from bandsaw.advice import Advice
+from bandsaw.advices.cache import CacheIndex, CachingAdvice, MemoryCache
+from bandsaw.cache.sqlite import SqliteBackend
 from bandsaw.config import Configuration
 from bandsaw.context import Context
 from bandsaw.result import Result
+from bandsaw.io import MappedFileStream
 from bandsaw.serialization.json import JsonSerializer
+from bandsaw.serialization.pickle import PickleSerializer
 from bandsaw.session import Session
 from bandsaw.tasks import Task
 from bandsaw.execution import Execution
@@ -17,21 +29,63 @@ def task_function():
     pass
 
 
-class TestCachingAdvice(unittest.TestCase):
+def _create_session(configuration, execution_id='r', advice_parameters=None):
+    task = Task.create_task(task_function, advice_parameters)
+    task.task_id = 't'
+    session = Session(task, Execution(execution_id), configuration)
+    session.proceeded = False
+    session.concluded = []
+
+    def _proceed():
+        session.proceeded = True
+
+    session.proceed = _proceed
+    session.conclude = session.concluded.append
+    return session
+
+
+class CachingAdviceTestCase(unittest.TestCase):
+    """Base class for tests, that run sessions of task `t` through a cache."""
 
     def setUp(self):
         self.configuration = Configuration()
         self.configuration.set_serializer(JsonSerializer())
         self.cache_dir = pathlib.Path(tempfile.mkdtemp())
-        self.advice = CachingAdvice(self.cache_dir)
-        task = Task.create_task(task_function)
-        task.task_id = 't'
-        self.session = Session(task, Execution('r'), self.configuration)
-        self.session.proceed = lambda: None
 
     def tearDown(self):
         shutil.rmtree(self.cache_dir)
 
+    def _session(self, execution_id='r'):
+        return _create_session(self.configuration, execution_id)
+
+    def _store(self, advice, value, execution_id='r'):
+        session = self._session(execution_id)
+        advice.before(session)
+        session.result = Result(value=value)
+        advice.after(session)
+        return session
+
+    def _execute(self, advice, execution_id='r', value='My result'):
+        session = self._session(execution_id)
+        advice.before(session)
+        if not session.concluded:
+            session.result = Result(value=value)
+            advice.after(session)
+        return session
+
+    def _read(self, advice, execution_id='r'):
+        session = self._session(execution_id)
+        advice.before(session)
+        return session.concluded
+
+
+class TestCachingAdvice(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.advice = CachingAdvice(self.cache_dir)
+        self.session = self._session()
+
     def test_after_stores_result(self):
         cache_item_path = self.cache_dir / 't' / 'r'
         self.assertFalse(cache_item_path.exists())
@@ -57,6 +111,60 @@ class TestCachingAdvice(unittest.TestCase):
 
         self.assertFalse(cache_item_path.exists())
 
+    def test_falsy_results_are_stored(self):
+        for execution_id, value in enumerate([0, [], False, None, '']):
+            self.session.execution = Execution(str(execution_id))
+            self.session.context = Context()
+            self.advice.before(self.session)
+            self.session.result = Result(value=value)
+            self.advice.after(self.session)
+
+            cache_item_path = self.cache_dir / 't' / str(execution_id)
+            stored_result = self.session.serializer.deserialize(
+                cache_item_path.open('rb')
+            )
+            self.assertEqual(Result(value=value), stored_result)
+
+    def test_exceptions_are_cached_if_enabled(self):
+        advice = CachingAdvice(self.cache_dir, cache_exceptions=True)
+        advice.before(self.session)
+        self.session.result = Result(exception=ValueError('error'))
+        advice.after(self.session)
+
+        cache_item_path = self.cache_dir / 't' / 'r'
+        stored_result = self.session.serializer.deserialize(cache_item_path.open('rb'))
+        self.assertEqual(stored_result, Result(exception=ValueError('error')))
+
+    def test_only_exceptions_of_given_types_are_cached(self):
+        advice = CachingAdvice(self.cache_dir, cache_exceptions=(KeyError,))
+        advice.before(self.session)
+        self.session.result = Result(exception=ValueError('error'))
+        advice.after(self.session)
+        self.assertFalse((self.cache_dir / 't' / 'r').exists())
+
+        self.session.result = Result(exception=KeyError('error'))
+        advice.after(self.session)
+        self.assertTrue((self.cache_dir / 't' / 'r').exists())
+
+    def test_cached_exceptions_expire(self):
+        concluded = self.session.concluded
+        advice = CachingAdvice(self.cache_dir, cache_exceptions=True, exception_ttl=10)
+        advice.before(self.session)
+        self.session.result = Result(exception=ValueError('error'))
+        advice.after(self.session)
+
+        self.session.context = Context()
+        advice.before(self.session)
+        self.assertEqual(concluded, [Result(exception=ValueError('error'))])
+
+        with unittest.mock.patch(
+            'bandsaw.advices.cache.time.time', return_value=time.time() + 20
+        ):
+            self.session.context = Context()
+            advice.before(self.session)
+        self.assertEqual(len(concluded), 1)
+        self.assertFalse((self.cache_dir / 't' / 'r').exists())
+
     def test_dont_store_again_if_exists(self):
         cache_item_path = self.cache_dir / 't' / 'r'
         self.assertFalse(cache_item_path.exists())
@@ -75,10 +183,7 @@ class TestCachingAdvice(unittest.TestCase):
         self.assertEqual(Result(value="My result"), stored_result)
 
     def test_dont_store_if_cache_is_disabled(self):
-        task = Task.create_task(task_function, {'cache': False})
-        task.task_id = 't'
-        self.session = Session(task, Execution('r'), self.configuration)
-        self.session.proceed = lambda: None
+        self.session = _create_session(self.configuration, 'r', {'cache': False})
 
         cache_item_path = self.cache_dir / 't' / 'r'
         self.assertFalse(cache_item_path.exists())
@@ -136,5 +241,677 @@ class TestCachingAdvice(unittest.TestCase):
         self.assertTrue(concluded)
 
 
+class TestCachingAdviceWithMemoryCache(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.advice = CachingAdvice(self.cache_dir, memory_cache_entries=10)
+        self.session = self._session()
+        self.concluded = self.session.concluded
+
+    def test_memory_cache_is_disabled_by_default(self):
+        self.assertIsNone(CachingAdvice(self.cache_dir).memory_cache)
+
+    def test_stored_result_is_reused_without_reading_file(self):
+        self.advice.before(self.session)
+        self.session.result = Result(value='My result')
+        self.advice.after(self.session)
+
+        (self.cache_dir / 't' / 'r').unlink()
+        self.session.context = Context()
+        self.advice.before(self.session)
+
+        self.assertEqual(self.concluded, [Result(value='My result')])
+        self.assertEqual(self.advice.memory_cache.hits, 1)
+
+    def test_result_read_from_file_is_kept_in_memory(self):
+        cache_item_path = self.cache_dir / 't' / 'r'
+        cache_item_path.parent.mkdir()
+        cache_item_path.write_text('"My old result"')
+
+        self.advice.before(self.session)
+        cache_item_path.unlink()
+        self.session.context = Context()
+        self.advice.before(self.session)
+
+        self.assertEqual(self.concluded, ['My old result', 'My old result'])
+        self.assertEqual(self.advice.memory_cache.misses, 1)
+        self.assertEqual(self.advice.memory_cache.hits, 1)
+
+
+class TestCachingAdviceWrites(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.session = self._session()
+
+    def test_result_is_written_to_temporary_file_and_replaced(self):
+        advice = CachingAdvice(self.cache_dir)
+        advice.before(self.session)
+        self.session.result = Result(value='My result')
+        with unittest.mock.patch('os.replace', wraps=os.replace) as replace_mock:
+            advice.after(self.session)
+
+        temporary_path, cache_item_path = replace_mock.call_args[0]
+        self.assertEqual(cache_item_path, self.cache_dir / 't' / 'r')
+        self.assertTrue(pathlib.Path(temporary_path).name.endswith('.tmp'))
+        self.assertEqual(os.listdir(self.cache_dir / 't'), ['r'])
+
+    def test_failing_serialization_leaves_no_files(self):
+        advice = CachingAdvice(self.cache_dir)
+        advice.before(self.session)
+        self.session.result = Result(value=object())
+        with self.assertRaises(TypeError):
+            advice.after(self.session)
+
+        self.assertEqual(os.listdir(self.cache_dir / 't'), [])
+
+
+class TestCachingAdviceContentAddressed(CachingAdviceTestCase):
+
+    def _blobs(self):
+        return sorted((self.cache_dir / 'blobs').glob('*/*'))
+
+    def test_identical_results_are_stored_once(self):
+        advice = CachingAdvice(self.cache_dir, content_addressed=True)
+        self._store(advice, 'same', 'a')
+        self._store(advice, 'same', 'b')
+        self._store(advice, 'other', 'c')
+
+        blobs = self._blobs()
+        self.assertEqual(len(blobs), 2)
+        item_a = self.cache_dir / 't' / 'a'
+        item_b = self.cache_dir / 't' / 'b'
+        self.assertTrue(item_a.samefile(item_b))
+        self.assertIn(item_a.stat().st_ino, [blob.stat().st_ino for blob in blobs])
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir / 't')),
+            ['a', 'a.sha256', 'b', 'b.sha256', 'c', 'c.sha256'],
+        )
+        temporary_files = [
+            path for path in (self.cache_dir / 'blobs').iterdir() if path.is_file()
+        ]
+        self.assertEqual(temporary_files, [])
+
+    def test_stored_results_are_read_from_blob(self):
+        advice = CachingAdvice(self.cache_dir, content_addressed=True)
+        self._store(advice, 'My result', 'a')
+
+        self.assertEqual(self._read(advice, 'a'), [Result(value='My result')])
+
+    def test_identical_results_are_counted_once_for_max_size(self):
+        advice = CachingAdvice(
+            self.cache_dir, content_addressed=True, max_size=10000
+        )
+        self._store(advice, 'same', 'a')
+        advice.max_size = advice.index.total_size() * 1.5
+        self._store(advice, 'same', 'b')
+        self._store(advice, 'same', 'c')
+
+        self.assertEqual(len(list(advice.index.least_recently_used())), 3)
+        self.assertEqual(len(self._blobs()), 1)
+
+    def test_blob_is_removed_with_last_item(self):
+        advice = CachingAdvice(
+            self.cache_dir, content_addressed=True, max_size=10000
+        )
+        self._store(advice, 'same', 'a')
+        self._store(advice, 'same', 'b')
+
+        advice._remove_item('t', 'a')
+        self.assertEqual(len(self._blobs()), 1)
+
+        advice._remove_item('t', 'b')
+        self.assertEqual(self._blobs(), [])
+
+    def test_new_exception_with_existing_blob_does_not_expire(self):
+        advice = CachingAdvice(
+            self.cache_dir,
+            content_addressed=True,
+            cache_exceptions=True,
+            exception_ttl=3600,
+        )
+        session = self._session('a')
+        session.result = Result(exception=ValueError('Same error'))
+        advice.after(session)
+        two_hours_ago = time.time() - 7200
+        os.utime(self.cache_dir / 't' / 'a', (two_hours_ago, two_hours_ago))
+        session = self._session('b')
+        session.result = Result(exception=ValueError('Same error'))
+        advice.after(session)
+
+        self.assertEqual(
+            self._read(advice, 'b'), [Result(exception=ValueError('Same error'))]
+        )
+        self.assertTrue((self.cache_dir / 't' / 'b').exists())
+
+
+class TestCachingAdviceWithSqliteBackend(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.backend = SqliteBackend(self.cache_dir / 'results.sqlite')
+        self.advice = CachingAdvice(self.cache_dir, backend=self.backend)
+
+    def test_result_is_stored_in_backend_and_reused(self):
+        self._store(self.advice, 'My result')
+
+        self.assertTrue(self.backend.contains('t', 'r'))
+        self.assertFalse((self.cache_dir / 't' / 'r').exists())
+        self.assertEqual(self._read(self.advice), [Result(value='My result')])
+
+    def test_evicted_results_are_removed_from_backend(self):
+        advice = CachingAdvice(self.cache_dir, backend=self.backend, ttl=60)
+        self._store(advice, 'My result')
+
+        with unittest.mock.patch(
+            'bandsaw.advices.cache.time.time', return_value=time.time() + 120
+        ):
+            advice.evict()
+        self.assertFalse(self.backend.contains('t', 'r'))
+
+    def test_content_addressed_requires_default_backend(self):
+        with self.assertRaises(ValueError):
+            CachingAdvice(self.cache_dir, content_addressed=True, backend=self.backend)
+
+
+class TestCachingAdviceWithMemoryMap(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.configuration.set_serializer(
+            PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        )
+
+    def test_buffers_of_cached_results_are_views_into_mapped_file(self):
+        advice = CachingAdvice(self.cache_dir, memory_map=True)
+        data = bytearray(b'x' * 1000)
+        self._store(advice, pickle.PickleBuffer(data))
+
+        with unittest.mock.patch(
+            'bandsaw.serialization.pickle.PickleSerializer.deserialize',
+            autospec=True,
+            side_effect=PickleSerializer.deserialize,
+        ) as deserialize_mock:
+            concluded = self._read(advice)
+
+        self.assertIsInstance(deserialize_mock.call_args[0][1], MappedFileStream)
+        value = concluded[0].value
+        self.assertIsInstance(value.obj, mmap.mmap)
+        self.assertEqual(bytes(value), bytes(data))
+
+    def test_streams_are_not_mapped_by_default(self):
+        advice = CachingAdvice(self.cache_dir)
+        self._store(advice, 'My result')
+
+        with unittest.mock.patch(
+            'bandsaw.serialization.pickle.PickleSerializer.deserialize',
+            autospec=True,
+            side_effect=PickleSerializer.deserialize,
+        ) as deserialize_mock:
+            concluded = self._read(advice)
+
+        self.assertNotIsInstance(deserialize_mock.call_args[0][1], MappedFileStream)
+        self.assertEqual(concluded, [Result(value='My result')])
+
+
+class TestCachingAdviceWriteBehind(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.advice = CachingAdvice(self.cache_dir, write_behind=True)
+        self.write_allowed = threading.Event()
+        store = self.advice.backend.store
+
+        def _blocking_store(*args):
+            self.write_allowed.wait(5)
+            return store(*args)
+
+        self.advice.backend.store = _blocking_store
+
+    def tearDown(self):
+        self.write_allowed.set()
+        self.advice.flush()
+        super().tearDown()
+
+    def test_after_returns_before_result_is_written(self):
+        self._store(self.advice, 'My result')
+        self.assertFalse((self.cache_dir / 't' / 'r').exists())
+
+        self.write_allowed.set()
+        self.advice.flush()
+        self.assertTrue((self.cache_dir / 't' / 'r').exists())
+
+    def test_pending_result_is_used(self):
+        self._store(self.advice, 'My result')
+        self.assertEqual(self._read(self.advice), [Result(value='My result')])
+
+    def test_pending_result_is_not_stored_twice(self):
+        self._store(self.advice, 'My result')
+        self._store(self.advice, 'My result')
+        self.write_allowed.set()
+        self.advice.flush()
+
+        with unittest.mock.patch.object(self.advice, '_store_result') as store_mock:
+            self._store(self.advice, 'My result')
+            self.advice.flush()
+        store_mock.assert_not_called()
+
+    def test_failing_write_is_logged(self):
+        self.write_allowed.set()
+        with self.assertLogs('bandsaw.advices.cache', 'ERROR'):
+            self._store(self.advice, object())
+            self.advice.flush()
+
+        self.assertEqual(self._read(self.advice), [])
+
+    def test_lock_is_released_after_write(self):
+        advice = CachingAdvice(self.cache_dir, write_behind=True, single_flight=True)
+        advice.backend.store = self.advice.backend.store
+        lock_path = self.cache_dir / 't' / 'r.lock'
+        self._store(advice, 'My result')
+
+        with open(lock_path, 'wb') as lock_file:
+            with self.assertRaises(BlockingIOError):
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.write_allowed.set()
+            advice.flush()
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+class TestCachingAdviceStatistics(CachingAdviceTestCase):
+
+    def test_miss_and_store_are_recorded(self):
+        advice = CachingAdvice(self.cache_dir)
+        session = self._execute(advice)
+
+        statistics = advice.statistics.task('t')
+        self.assertEqual(statistics.misses, 1)
+        self.assertEqual(statistics.hits, 0)
+        self.assertEqual(statistics.stores, 1)
+        size = (self.cache_dir / 't' / 'r').stat().st_size
+        self.assertEqual(statistics.bytes_written, size)
+        self.assertEqual(statistics.serialize_latency.count, 1)
+
+        cache_context = session.context['cache']
+        self.assertEqual(cache_context['lookup'], 'miss')
+        self.assertEqual(cache_context['bytes-written'], size)
+        self.assertGreaterEqual(cache_context['serialize-seconds'], 0)
+
+    def test_hit_is_recorded(self):
+        advice = CachingAdvice(self.cache_dir)
+        self._execute(advice)
+        session = self._execute(advice)
+
+        statistics = advice.statistics.task('t')
+        self.assertEqual(statistics.hits, 1)
+        self.assertEqual(statistics.memory_hits, 0)
+        size = (self.cache_dir / 't' / 'r').stat().st_size
+        self.assertEqual(statistics.bytes_read, size)
+        self.assertEqual(statistics.deserialize_latency.count, 1)
+        self.assertEqual(statistics.hit_rate, 0.5)
+
+        cache_context = session.context['cache']
+        self.assertEqual(cache_context['lookup'], 'hit')
+        self.assertEqual(cache_context['bytes-read'], size)
+        self.assertIn('deserialize-seconds', cache_context)
+
+    def test_memory_hit_is_recorded(self):
+        advice = CachingAdvice(self.cache_dir, memory_cache_entries=1)
+        self._execute(advice)
+        session = self._execute(advice)
+
+        statistics = advice.statistics.task('t')
+        self.assertEqual(statistics.hits, 1)
+        self.assertEqual(statistics.memory_hits, 1)
+        self.assertEqual(statistics.bytes_read, 0)
+        self.assertEqual(session.context['cache']['lookup'], 'memory')
+
+
+class TestCachingAdviceWithSingleFlight(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.lock_path = self.cache_dir / 't' / 'r.lock'
+
+    def _is_locked(self):
+        with open(self.lock_path, 'wb') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            return False
+
+    def test_lock_is_held_while_computing_result(self):
+        advice = CachingAdvice(self.cache_dir, single_flight=True)
+        session = self._session()
+
+        advice.before(session)
+        self.assertTrue(session.proceeded)
+        self.assertTrue(self._is_locked())
+
+        session.result = Result(value='My result')
+        advice.after(session)
+        self.assertFalse(self._is_locked())
+
+    def test_lock_is_released_if_task_fails(self):
+        advice = CachingAdvice(self.cache_dir, single_flight=True)
+        session = self._session()
+
+        advice.before(session)
+        session.result = Result(exception=ValueError('error'))
+        advice.after(session)
+        self.assertFalse(self._is_locked())
+
+    def test_lock_is_released_if_following_advice_raises(self):
+        class _RaisingAdvice(Advice):
+            def before(self, session):
+                raise RuntimeError("Advice failed")
+
+        advice = CachingAdvice(self.cache_dir, single_flight=True)
+        self.configuration.add_advice_chain(advice, _RaisingAdvice(), name='raising')
+        task = Task.create_task(task_function)
+        task.task_id = 't'
+        session = Session(task, Execution('r'), self.configuration, 'raising')
+
+        with self.assertRaisesRegex(RuntimeError, "Advice failed"):
+            session.initiate()
+        self.assertFalse(self.lock_path.exists())
+        self.assertFalse(self._is_locked())
+        self.assertEqual(advice._locks, {})
+
+    def test_lock_file_is_removed_after_result_is_stored(self):
+        advice = CachingAdvice(self.cache_dir, single_flight=True)
+        self._store(advice, 'My result')
+
+        self.assertFalse(self.lock_path.exists())
+        self.assertEqual(os.listdir(self.cache_dir / 't'), ['r'])
+
+    def test_waiting_process_locks_new_file_if_lock_file_was_removed(self):
+        advice = CachingAdvice(self.cache_dir, single_flight=True)
+        self.lock_path.parent.mkdir(parents=True)
+        waiting_session = self._session()
+
+        with open(self.lock_path, 'wb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            thread = threading.Thread(target=advice.before, args=(waiting_session,))
+            thread.start()
+            thread.join(0.2)
+            self.lock_path.unlink()
+        thread.join()
+
+        self.assertTrue(waiting_session.proceeded)
+        self.assertTrue(self._is_locked())
+        waiting_session.result = Result(value='My result')
+        advice.after(waiting_session)
+        self.assertFalse(self.lock_path.exists())
+
+    def test_waiting_process_reads_result_stored_by_lock_holder(self):
+        advice = CachingAdvice(self.cache_dir, single_flight=True)
+        self.lock_path.parent.mkdir(parents=True)
+        waiting_session = self._session()
+
+        with open(self.lock_path, 'wb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            thread = threading.Thread(target=advice.before, args=(waiting_session,))
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+
+            (self.cache_dir / 't' / 'r').write_text('"Stored result"')
+        thread.join()
+
+        self.assertFalse(waiting_session.proceeded)
+        self.assertEqual(waiting_session.concluded, ['Stored result'])
+        self.assertFalse(self._is_locked())
+
+    def test_result_is_computed_if_lock_times_out(self):
+        advice = CachingAdvice(self.cache_dir, single_flight=True, lock_timeout=0.1)
+        self.lock_path.parent.mkdir(parents=True)
+        session = self._session()
+
+        with open(self.lock_path, 'wb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            advice.before(session)
+
+        self.assertTrue(session.proceeded)
+        session.result = Result(value='My result')
+        advice.after(session)
+        self.assertTrue((self.cache_dir / 't' / 'r').exists())
+
+
+class TestCachingAdviceWithEviction(CachingAdviceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = unittest.mock.patch(
+            'bandsaw.advices.cache.time.time', side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, advice, execution_id, value='My result'):
+        session = self._execute(advice, execution_id, value)
+        if session.concluded:
+            return session.concluded[0]
+        self.now += 1
+        return None
+
+    def test_index_is_only_created_for_managed_cache(self):
+        self.assertIsNone(CachingAdvice(self.cache_dir).index)
+        advice = CachingAdvice(self.cache_dir, max_size=100)
+        self.assertEqual(advice.index.path, self.cache_dir / 'index.sqlite')
+
+    def test_least_recently_used_results_are_evicted_by_size(self):
+        advice = CachingAdvice(self.cache_dir, max_size=1000)
+        self._run(advice, 'a', 'a' * 20)
+        advice.max_size = advice.index.total_size() * 2.5
+        self._run(advice, 'b', 'b' * 20)
+        self.assertIsNotNone(self._run(advice, 'a'))
+        self._run(advice, 'c', 'c' * 20)
+
+        self.assertTrue((self.cache_dir / 't' / 'a').exists())
+        self.assertFalse((self.cache_dir / 't' / 'b').exists())
+        self.assertTrue((self.cache_dir / 't' / 'c').exists())
+        self.assertLessEqual(advice.index.total_size(), advice.max_size)
+
+    def test_expired_results_are_not_used(self):
+        advice = CachingAdvice(self.cache_dir, ttl=10)
+        self._run(advice, 'a', 'old')
+        self.now += 5
+        self.assertEqual(self._run(advice, 'a'), Result(value='old'))
+
+        self.now += 10
+        self.assertIsNone(self._run(advice, 'a', 'new'))
+        self.assertEqual(self._run(advice, 'a'), Result(value='new'))
+
+    def test_expired_results_are_evicted_on_write(self):
+        advice = CachingAdvice(self.cache_dir, ttl=10)
+        self._run(advice, 'a')
+        self.now += 20
+        self._run(advice, 'b')
+
+        self.assertFalse((self.cache_dir / 't' / 'a').exists())
+        self.assertTrue((self.cache_dir / 't' / 'b').exists())
+
+    def test_expired_results_are_not_used_from_memory_cache(self):
+        advice = CachingAdvice(self.cache_dir, memory_cache_entries=10, ttl=10)
+        self._run(advice, 'a', 'old')
+        self.assertEqual(self._run(advice, 'a'), Result(value='old'))
+
+        self.now += 1000
+        self.assertIsNone(self._run(advice, 'a', 'new'))
+        self.assertEqual(self._run(advice, 'a'), Result(value='new'))
+
+    def test_evicted_results_are_removed_from_memory_cache(self):
+        advice = CachingAdvice(self.cache_dir, memory_cache_entries=10, ttl=10)
+        self._run(advice, 'a')
+        self.now += 1000
+        advice.evict()
+
+        self.assertEqual(len(advice.memory_cache), 0)
+        self.assertFalse((self.cache_dir / 't' / 'a').exists())
+
+    def test_results_used_from_memory_are_not_evicted_first(self):
+        advice = CachingAdvice(self.cache_dir, memory_cache_entries=10, max_size=1000)
+        self._run(advice, 'a', 'a' * 20)
+        self._run(advice, 'b', 'b' * 20)
+        self.assertIsNotNone(self._run(advice, 'a'))
+        self.assertEqual(advice.memory_cache.hits, 1)
+
+        advice.max_size = advice.index.total_size()
+        self._run(advice, 'c', 'c' * 20)
+
+        self.assertTrue((self.cache_dir / 't' / 'a').exists())
+        self.assertFalse((self.cache_dir / 't' / 'b').exists())
+
+    def test_existing_results_are_added_to_index_when_used(self):
+        self._run(CachingAdvice(self.cache_dir), 'a')
+        advice = CachingAdvice(self.cache_dir, max_size=1000)
+        self.assertEqual(advice.index.total_size(), 0)
+
+        self.assertIsNotNone(self._run(advice, 'a'))
+        self.assertGreater(advice.index.total_size(), 0)
+
+
+class TestCacheIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.index = CacheIndex(self.directory / 'index.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_items_are_ordered_by_access(self):
+        with unittest.mock.patch('bandsaw.advices.cache.time.time', return_value=1):
+            self.index.add('t', 'a', 1)
+        with unittest.mock.patch('bandsaw.advices.cache.time.time', return_value=2):
+            self.index.add('t', 'b', 2)
+        with unittest.mock.patch('bandsaw.advices.cache.time.time', return_value=3):
+            self.index.touch('t', 'a', 1)
+
+        self.assertEqual(
+            list(self.index.least_recently_used()), [('t', 'b', 2), ('t', 'a', 1)]
+        )
+        self.assertEqual(self.index.total_size(), 3)
+        self.assertEqual(self.index.created('t', 'a'), 1)
+        self.assertEqual(self.index.created_before(2), [('t', 'a')])
+
+    def test_removed_items_are_gone(self):
+        self.index.add('t', 'a', 1)
+        self.index.remove('t', 'a')
+        self.assertIsNone(self.index.created('t', 'a'))
+        self.assertEqual(self.index.total_size(), 0)
+
+    def test_index_is_shared_between_instances(self):
+        self.index.add('t', 'a', 1)
+        other_index = CacheIndex(self.directory / 'index.sqlite')
+        self.assertEqual(other_index.total_size(), 1)
+
+    def test_total_size_is_kept_when_items_are_replaced(self):
+        self.index.add('t', 'a', 1)
+        self.index.add('t', 'b', 2)
+        self.index.add('t', 'a', 4)
+        self.index.touch('t', 'b', 8)
+        self.assertEqual(self.index.total_size(), 6)
+
+        self.index.remove('t', 'b')
+        self.assertEqual(self.index.total_size(), 4)
+
+    def test_items_with_same_content_are_counted_once(self):
+        self.index.add('t', 'a', 10, 'content')
+        self.index.add('t', 'b', 10, 'content')
+        self.index.add('t', 'c', 5)
+        self.assertEqual(self.index.total_size(), 15)
+
+        self.index.add('t', 'a', 10, 'content')
+        self.index.remove('t', 'a')
+        self.assertEqual(self.index.total_size(), 15)
+        self.index.remove('t', 'b')
+        self.assertEqual(self.index.total_size(), 5)
+
+    def test_total_size_is_computed_for_index_without_totals(self):
+        path = self.directory / 'old-index.sqlite'
+        with sqlite3.connect(str(path)) as connection:
+            connection.execute(
+                'CREATE TABLE items (task_id TEXT, execution_id TEXT, size INTEGER,'
+                ' created REAL, accessed REAL, PRIMARY KEY (task_id, execution_id))'
+            )
+            connection.execute("INSERT INTO items VALUES ('t', 'a', 3, 1, 1)")
+        connection.close()
+
+        index = CacheIndex(path)
+        self.assertEqual(index.total_size(), 3)
+        index.add('t', 'b', 2)
+        self.assertEqual(index.total_size(), 5)
+
+    def test_access_times_are_only_updated_for_existing_items(self):
+        with unittest.mock.patch('bandsaw.advices.cache.time.time', return_value=1):
+            self.index.add('t', 'a', 1)
+            self.index.add('t', 'b', 1)
+        self.index.update_access_times([('t', 'a', 5), ('t', 'missing', 5)])
+
+        self.assertEqual(
+            list(self.index.least_recently_used()), [('t', 'b', 1), ('t', 'a', 1)]
+        )
+        self.assertIsNone(self.index.created('t', 'missing'))
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_get_returns_stored_result(self):
+        cache = MemoryCache()
+        cache.put(('t', 'e'), 'result', 10)
+        self.assertEqual(cache.get(('t', 'e')), 'result')
+        self.assertIsNone(cache.get(('t', 'f')))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entries_are_evicted_by_count(self):
+        cache = MemoryCache(max_entries=2)
+        cache.put('a', 'a', 1)
+        cache.put('b', 'b', 1)
+        cache.get('a')
+        cache.put('c', 'c', 1)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertEqual(cache.get('c'), 'c')
+        self.assertEqual(cache.evictions, 1)
+
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.put('a', 'a', 4)
+        cache.put('b', 'b', 4)
+        cache.put('c', 'c', 4)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_results_larger_than_max_bytes_are_not_cached(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.put('a', 'a', 11)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_replacing_entry_updates_size(self):
+        cache = MemoryCache()
+        cache.put('a', 'a', 4)
+        cache.put('a', 'b', 6)
+        self.assertEqual(cache.size, 6)
+        self.assertEqual(cache.get('a'), 'b')
+
+    def test_removed_entries_are_gone(self):
+        cache = MemoryCache()
+        cache.put('a', 'a', 4)
+        cache.remove('a')
+        cache.remove('b')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,24 @@
+import collections
 import io
 import os
 import pathlib
+import shutil
+import subprocess
+import sys
 import tempfile
+import threading
 import unittest.mock
 
-from bandsaw.advices.ssh import SshAdvice, Remote, SshBackend, SshCommandLineBackend
+from bandsaw.advices.ssh import (
+    SshAdvice,
+    Remote,
+    SshBackend,
+    SshCommandLineBackend,
+)
+from bandsaw.advices.ssh_executor import SshExecutor
+from bandsaw.advices.ssh_pool import RemotePool
 from bandsaw.config import Configuration
+from bandsaw.decorator import task
 from bandsaw.interpreter import Interpreter
 from bandsaw.execution import Execution
 from bandsaw.session import Session
@@ -16,6 +29,205 @@ def _get_pid():
     return os.getpid()
 
 
+def _square(value):
+    return value * value
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+advice_test_directory = os.path.dirname(__file__)
+test_directory = os.path.dirname(advice_test_directory)
+project_directory = os.path.dirname(test_directory)
+
+
+class LocalBackend(SshBackend):
+    """Stand-in backend, that runs the commands as local subprocesses."""
+
+    def __init__(self, failing_hosts=()):
+        self.failing_hosts = set(failing_hosts)
+        self.executions = collections.Counter()
+
+    def _connect(self, remote):
+        if remote.host in self.failing_hosts:
+            raise subprocess.CalledProcessError(255, ['ssh', remote.host])
+
+    def create_dir(self, remote, remote_path):
+        self._connect(remote)
+        os.makedirs(remote_path, exist_ok=True)
+
+    def create_private_dir(self, remote, remote_path):
+        self._connect(remote)
+        os.makedirs(remote_path, mode=0o700, exist_ok=True)
+
+    def copy_file_to_remote(self, remote, local_path, remote_path):
+        self._connect(remote)
+        shutil.copyfile(local_path, remote_path)
+
+    def copy_file_from_remote(self, remote, remote_path, local_path):
+        self._connect(remote)
+        shutil.copyfile(remote_path, local_path)
+
+    def execute_remote(self, remote, executable, *arguments):
+        self._connect(remote)
+        self.executions[remote.host] += 1
+        subprocess.check_call([executable, *arguments], env=self._environment())
+
+    def execute_remote_with_pipe(self, remote, input_data, executable, *arguments):
+        self._connect(remote)
+        self.executions[remote.host] += 1
+        return subprocess.run(
+            [executable, *arguments],
+            input=input_data,
+            stdout=subprocess.PIPE,
+            env=self._environment(),
+            check=True,
+        ).stdout
+
+    def delete_dir(self, remote, remote_path):
+        self._connect(remote)
+        shutil.rmtree(remote_path, ignore_errors=True)
+
+    def path_exists(self, remote, remote_path):
+        self._connect(remote)
+        return os.path.exists(remote_path)
+
+    def move(self, remote, remote_source, remote_destination):
+        self._connect(remote)
+        os.replace(remote_source, remote_destination)
+
+    @staticmethod
+    def _environment():
+        environment = dict(os.environ)
+        environment['PYTHONPATH'] = ':'.join([test_directory, project_directory])
+        return environment
+
+
+class MinimalLocalBackend(SshBackend):
+    """Local backend, which implements only the mandatory methods."""
+
+    def create_dir(self, remote, remote_path):
+        os.makedirs(remote_path, exist_ok=True)
+
+    def copy_file_to_remote(self, remote, local_path, remote_path):
+        shutil.copyfile(local_path, remote_path)
+
+    def copy_file_from_remote(self, remote, remote_path, local_path):
+        shutil.copyfile(remote_path, local_path)
+
+    def execute_remote(self, remote, executable, *arguments):
+        subprocess.check_call(
+            [executable, *arguments], env=LocalBackend._environment()
+        )
+
+    def delete_dir(self, remote, remote_path):
+        shutil.rmtree(remote_path, ignore_errors=True)
+
+
+# The remotes are needed by the advice chains of the configuration at import time,
+# their directories are removed in tearDownModule()
+remotes_directory = tempfile.TemporaryDirectory()
+
+
+def tearDownModule():
+    remotes_directory.cleanup()
+
+
+def _local_remote(host):
+    return Remote(
+        host=host,
+        interpreter=Interpreter(executable=sys.executable),
+        directory=tempfile.mkdtemp(dir=remotes_directory.name),
+    )
+
+
+class TrackingBackend(LocalBackend):
+    """Local backend, which records the uploads and executions of sessions."""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def copy_file_to_remote(self, remote, local_path, remote_path):
+        if pathlib.Path(local_path).name.endswith('-in.zip'):
+            with self._lock:
+                self.events.append(('upload', self.running))
+        super().copy_file_to_remote(remote, local_path, remote_path)
+
+    def execute_remote(self, remote, executable, *arguments):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.running, self.max_running)
+        try:
+            super().execute_remote(remote, executable, *arguments)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def execute_remote_with_pipe(self, remote, input_data, executable, *arguments):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.running, self.max_running)
+        try:
+            return super().execute_remote_with_pipe(
+                remote, input_data, executable, *arguments
+            )
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+local_backend = LocalBackend(failing_hosts=['broken'])
+tracking_backend = TrackingBackend()
+in_flight_advice = SshAdvice(backend=tracking_backend, max_in_flight=2).add_remote(
+    _local_remote('single')
+)
+pipe_in_flight_advice = SshAdvice(
+    backend=tracking_backend, transfer='pipe', max_in_flight=1,
+).add_remote(_local_remote('single'))
+pool_in_flight_advice = SshAdvice(backend=tracking_backend).add_remote(
+    RemotePool().add_remote(_local_remote('pooled'))
+)
+pool_advice = SshAdvice(backend=local_backend).add_remote(
+    RemotePool(strategy='round-robin')
+    .add_remote(_local_remote('first'))
+    .add_remote(_local_remote('second'))
+)
+pipe_pool_advice = SshAdvice(backend=local_backend, transfer='pipe').add_remote(
+    RemotePool(strategy='round-robin')
+    .add_remote(_local_remote('first'))
+    .add_remote(_local_remote('second'))
+)
+failing_pool_advice = SshAdvice(backend=local_backend).add_remote(
+    RemotePool(strategy='round-robin', max_failures=1)
+    .add_remote(_local_remote('broken'))
+    .add_remote(_local_remote('working'))
+)
+minimal_advice = SshAdvice(backend=MinimalLocalBackend()).add_remote(
+    _local_remote('minimal')
+)
+configuration = Configuration()
+configuration.add_advice_chain(minimal_advice, name='minimal')
+configuration.add_advice_chain(pool_advice, name='pool')
+configuration.add_advice_chain(pipe_pool_advice, name='pipe-pool')
+configuration.add_advice_chain(failing_pool_advice, name='failing-pool')
+configuration.add_advice_chain(in_flight_advice, name='in-flight')
+configuration.add_advice_chain(pipe_in_flight_advice, name='pipe-in-flight')
+configuration.add_advice_chain(pool_in_flight_advice, name='pool-in-flight')
+
+
+def _run_in_chain(task_function, chain):
+    session = Session(
+        Task.create_task(task_function), Execution('r'), configuration, chain,
+    )
+    session.initiate()
+    return session.result.value
+
+
 class TestSshCommandLineBackend(unittest.TestCase):
 
     def setUp(self):
@@ -56,6 +268,21 @@ class TestSshCommandLineBackend(unittest.TestCase):
             ['ssh', '-p', '22', 'my_user@test.host', 'mkdir', '-p', '/my/remote/path'],
         )
 
+    def test_create_private_dir(self):
+        self.backend.create_private_dir(
+            self.remote,
+            pathlib.Path('/my/remote/path'),
+        )
+        self.check_call_mock.assert_called_with(
+            [
+                'ssh', '-p', '22', 'my_user@test.host',
+                'mkdir', '-p', '-m', '700', '/my/remote/path',
+                '&&', 'test', '!', '-L', '/my/remote/path',
+                '&&', 'test', '-O', '/my/remote/path',
+                '&&', 'chmod', '700', '/my/remote/path',
+            ],
+        )
+
     def test_copy_file_to_remote(self):
         self.backend.copy_file_to_remote(
             self.remote,
@@ -86,6 +313,23 @@ class TestSshCommandLineBackend(unittest.TestCase):
             ['ssh', '-p', '22', 'my_user@test.host', '/my/executable', 'argument'],
         )
 
+    def test_execute_remote_with_pipe(self):
+        with unittest.mock.patch('bandsaw.advices.ssh.subprocess.run') as run_mock:
+            run_mock.return_value.stdout = b'output'
+            output = self.backend.execute_remote_with_pipe(
+                self.remote,
+                b'input',
+                pathlib.Path('/my/executable'),
+                'argument',
+            )
+        self.assertEqual(b'output', output)
+        run_mock.assert_called_with(
+            ['ssh', '-p', '22', 'my_user@test.host', '/my/executable', 'argument'],
+            input=b'input',
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+
     def test_delete_dir(self):
         self.backend.delete_dir(
             self.remote,
@@ -95,6 +339,40 @@ class TestSshCommandLineBackend(unittest.TestCase):
             ['ssh', '-p', '22', 'my_user@test.host', 'rm', '-Rf', '/my/remote/path'],
         )
 
+    def test_path_exists(self):
+        with unittest.mock.patch(
+            'bandsaw.advices.ssh.subprocess.call', return_value=0
+        ) as call_mock:
+            exists = self.backend.path_exists(
+                self.remote,
+                pathlib.Path('/my/remote/path'),
+            )
+        self.assertTrue(exists)
+        call_mock.assert_called_with(
+            ['ssh', '-p', '22', 'my_user@test.host', 'test', '-e', '/my/remote/path'],
+        )
+
+    def test_path_exists_if_test_fails(self):
+        with unittest.mock.patch('bandsaw.advices.ssh.subprocess.call', return_value=1):
+            exists = self.backend.path_exists(
+                self.remote,
+                pathlib.Path('/my/remote/path'),
+            )
+        self.assertFalse(exists)
+
+    def test_move(self):
+        self.backend.move(
+            self.remote,
+            pathlib.Path('/my/remote/source'),
+            pathlib.Path('/my/remote/destination'),
+        )
+        self.check_call_mock.assert_called_with(
+            [
+                'ssh', '-p', '22', 'my_user@test.host',
+                'mv', '-f', '/my/remote/source', '/my/remote/destination',
+            ],
+        )
+
     def test_create_dir_with_key_file(self):
         self.backend.create_dir(
             self.remote_with_key,
@@ -144,6 +422,180 @@ class TestSshCommandLineBackend(unittest.TestCase):
         )
 
 
+class TestSshCommandLineBackendWithMultiplexing(unittest.TestCase):
+
+    def setUp(self):
+        self.control_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.control_directory)
+        self.backend = SshCommandLineBackend(
+            multiplex=True, control_directory=self.control_directory
+        )
+        self.remote = Remote(
+            host='test.host',
+            user='my_user',
+            interpreter=Interpreter(path=[], executable='/usr/bin/python3'),
+        )
+        self.check_call_patcher = unittest.mock.patch(
+            'bandsaw.advices.ssh.subprocess.check_call'
+        )
+        self.check_call_mock = self.check_call_patcher.start()
+
+    def tearDown(self):
+        self.backend.close()
+        self.check_call_patcher.stop()
+
+    def _control_path(self):
+        master_command = self.check_call_mock.call_args_list[0][0][0]
+        option = [o for o in master_command if o.startswith('ControlPath=')][0]
+        return option[len('ControlPath='):]
+
+    def test_master_connection_is_opened_once(self):
+        self.backend.create_dir(self.remote, pathlib.Path('/my/remote/path'))
+        self.backend.delete_dir(self.remote, pathlib.Path('/my/remote/path'))
+
+        control_path = self._control_path()
+        self.assertTrue(control_path.startswith(self.control_directory))
+        self.assertEqual(
+            self.check_call_mock.call_args_list,
+            [
+                unittest.mock.call(
+                    [
+                        'ssh', '-p', '22',
+                        '-o', 'ControlMaster=yes',
+                        '-o', f'ControlPath={control_path}',
+                        '-o', 'ControlPersist=60',
+                        '-f', '-N', 'my_user@test.host',
+                    ]
+                ),
+                unittest.mock.call(
+                    [
+                        'ssh', '-p', '22',
+                        '-o', 'ControlMaster=no',
+                        '-o', f'ControlPath={control_path}',
+                        'my_user@test.host', 'mkdir', '-p', '/my/remote/path',
+                    ]
+                ),
+                unittest.mock.call(
+                    [
+                        'ssh', '-p', '22',
+                        '-o', 'ControlMaster=no',
+                        '-o', f'ControlPath={control_path}',
+                        'my_user@test.host', 'rm', '-Rf', '/my/remote/path',
+                    ]
+                ),
+            ],
+        )
+
+    def test_scp_uses_master_connection(self):
+        self.backend.copy_file_to_remote(
+            self.remote,
+            pathlib.Path('/my/local/path'),
+            pathlib.Path('/my/remote/path'),
+        )
+        self.check_call_mock.assert_called_with(
+            [
+                'scp', '-P', '22',
+                '-o', 'ControlMaster=no',
+                '-o', f'ControlPath={self._control_path()}',
+                '/my/local/path', 'my_user@test.host:/my/remote/path',
+            ],
+        )
+
+    def test_remotes_use_separate_master_connections(self):
+        other_remote = Remote(
+            host='other.host',
+            user='my_user',
+            interpreter=Interpreter(path=[], executable='/usr/bin/python3'),
+        )
+        self.backend.create_dir(self.remote, pathlib.Path('/path'))
+        self.backend.create_dir(other_remote, pathlib.Path('/path'))
+
+        master_commands = [
+            call[0][0] for call in self.check_call_mock.call_args_list
+            if 'ControlMaster=yes' in call[0][0]
+        ]
+        self.assertEqual(len(master_commands), 2)
+        self.assertNotEqual(master_commands[0][6], master_commands[1][6])
+
+    def test_slow_master_does_not_block_other_remotes(self):
+        other_remote = Remote(
+            host='other.host',
+            user='my_user',
+            interpreter=Interpreter(path=[], executable='/usr/bin/python3'),
+        )
+        master_started = threading.Event()
+        release_master = threading.Event()
+        master_finished = threading.Event()
+
+        def run(command):
+            if 'ControlMaster=yes' in command and 'my_user@test.host' in command:
+                master_started.set()
+                release_master.wait(5)
+                master_finished.set()
+
+        self.check_call_mock.side_effect = run
+        thread = threading.Thread(
+            target=self.backend.create_dir,
+            args=(self.remote, pathlib.Path('/path')),
+            daemon=True,
+        )
+        thread.start()
+        self.assertTrue(master_started.wait(5))
+
+        self.backend.create_dir(other_remote, pathlib.Path('/path'))
+        self.assertFalse(master_finished.is_set())
+        release_master.set()
+        thread.join(5)
+
+        master_hosts = [
+            call[0][0][-1] for call in self.check_call_mock.call_args_list
+            if 'ControlMaster=yes' in call[0][0]
+        ]
+        self.assertEqual(
+            sorted(master_hosts), ['my_user@other.host', 'my_user@test.host']
+        )
+
+    def test_master_uses_control_persist(self):
+        backend = SshCommandLineBackend(
+            multiplex=True,
+            control_directory=self.control_directory,
+            control_persist=10,
+        )
+        backend.create_dir(self.remote, pathlib.Path('/path'))
+        backend.close()
+
+        master_command = self.check_call_mock.call_args_list[0][0][0]
+        self.assertIn('ControlPersist=10', master_command)
+
+    def test_failing_master_falls_back_to_separate_connections(self):
+        self.check_call_mock.side_effect = [
+            subprocess.CalledProcessError(255, 'ssh'),
+            None,
+            None,
+        ]
+        self.backend.create_dir(self.remote, pathlib.Path('/my/remote/path'))
+        self.backend.create_dir(self.remote, pathlib.Path('/my/remote/path'))
+
+        self.assertEqual(self.check_call_mock.call_count, 3)
+        self.check_call_mock.assert_called_with(
+            ['ssh', '-p', '22', 'my_user@test.host', 'mkdir', '-p', '/my/remote/path'],
+        )
+
+    def test_close_stops_master_connections(self):
+        self.backend.create_dir(self.remote, pathlib.Path('/my/remote/path'))
+        control_path = self._control_path()
+
+        self.backend.close()
+
+        self.check_call_mock.assert_called_with(
+            [
+                'ssh', '-p', '22',
+                '-o', f'ControlPath={control_path}',
+                '-O', 'exit', 'my_user@test.host',
+            ],
+        )
+
+
 class DummyBackend(SshBackend):
 
     def __init__(self, session):
@@ -161,6 +613,21 @@ class DummyBackend(SshBackend):
         self.session.proceed()
 
 
+class DummyPipeBackend(SshBackend):
+
+    def __init__(self, session):
+        self.session = session
+
+    def execute_remote_with_pipe(self, remote, input_data, executable, *arguments):
+        # continue the session that was sent instead of the local one
+        session = Session()
+        session.restore(io.BytesIO(input_data))
+        session.proceed()
+        stream = io.BytesIO()
+        session.save(stream)
+        return stream.getvalue()
+
+
 class TestRemote(unittest.TestCase):
 
     def test_host_is_mandatory(self):
@@ -172,6 +639,126 @@ class TestRemote(unittest.TestCase):
             Remote(host='my.host')
 
 
+class TestSshAdviceWithRemotePool(unittest.TestCase):
+
+    def setUp(self):
+        local_backend.executions.clear()
+
+    def test_tasks_are_distributed_over_remotes(self):
+        pids = [_run_in_chain(_get_pid, 'pool') for _ in range(4)]
+
+        self.assertNotIn(os.getpid(), pids)
+        self.assertEqual({'first': 2, 'second': 2}, dict(local_backend.executions))
+
+    def test_tasks_are_distributed_over_remotes_with_pipe_transfer(self):
+        pids = [_run_in_chain(_get_pid, 'pipe-pool') for _ in range(2)]
+
+        self.assertNotIn(os.getpid(), pids)
+        self.assertEqual({'first': 1, 'second': 1}, dict(local_backend.executions))
+
+    def test_failing_remote_is_taken_out_of_rotation(self):
+        pool = failing_pool_advice.remotes['default']
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            _run_in_chain(_get_pid, 'failing-pool')
+        for _ in range(3):
+            self.assertNotEqual(os.getpid(), _run_in_chain(_get_pid, 'failing-pool'))
+
+        self.assertEqual(['working'], [r.host for r in pool.available_remotes()])
+        self.assertEqual({'working': 3}, dict(local_backend.executions))
+
+
+class TestSshAdviceWithExecutor(unittest.TestCase):
+
+    def setUp(self):
+        tracking_backend.events.clear()
+        tracking_backend.max_running = 0
+
+    def test_futures_contain_results(self):
+        square = task(config=__name__, chain='in-flight')(_square)
+
+        with SshExecutor(in_flight_advice) as executor:
+            futures = [executor.submit(square, value) for value in range(5)]
+
+            self.assertEqual(
+                [0, 1, 4, 9, 16], [future.result(60) for future in futures]
+            )
+
+    def test_futures_contain_exceptions(self):
+        fail = task(config=__name__, chain='in-flight')(_fail)
+
+        with SshExecutor(in_flight_advice) as executor:
+            future = executor.submit(fail, 'broken task')
+
+            with self.assertRaisesRegex(ValueError, 'broken task'):
+                future.result(60)
+
+    def test_sessions_in_flight_are_limited_per_remote(self):
+        square = task(config=__name__, chain='in-flight')(_square)
+
+        with SshExecutor(in_flight_advice, max_workers=6) as executor:
+            futures = [executor.submit(square, value) for value in range(6)]
+            for future in futures:
+                future.result(60)
+
+        self.assertEqual(2, tracking_backend.max_running)
+
+    def test_uploads_overlap_with_executions(self):
+        square = task(config=__name__, chain='in-flight')(_square)
+
+        with SshExecutor(in_flight_advice) as executor:
+            futures = [executor.submit(square, value) for value in range(6)]
+            for future in futures:
+                future.result(60)
+
+        self.assertEqual(6, len(tracking_backend.events))
+        uploads_while_running = [
+            running for _, running in tracking_backend.events if running > 0
+        ]
+        self.assertTrue(uploads_while_running)
+
+    def test_uploads_overlap_with_executions_on_pooled_remotes(self):
+        square = task(config=__name__, chain='pool-in-flight')(_square)
+
+        with SshExecutor(pool_in_flight_advice) as executor:
+            futures = [executor.submit(square, value) for value in range(6)]
+            for future in futures:
+                future.result(60)
+
+        self.assertEqual(1, tracking_backend.max_running)
+        self.assertEqual(6, len(tracking_backend.events))
+        uploads_while_running = [
+            running for _, running in tracking_backend.events if running > 0
+        ]
+        self.assertTrue(uploads_while_running)
+
+    def test_sessions_in_flight_are_limited_with_pipe_transfer(self):
+        square = task(config=__name__, chain='pipe-in-flight')(_square)
+
+        with SshExecutor(pipe_in_flight_advice, max_workers=3) as executor:
+            futures = [executor.submit(square, value) for value in range(3)]
+
+            self.assertEqual([0, 1, 4], [future.result(60) for future in futures])
+        self.assertEqual(1, tracking_backend.max_running)
+
+    def test_max_in_flight_must_be_positive(self):
+        with self.assertRaisesRegex(ValueError, "max_in_flight must be at least 1"):
+            SshAdvice(max_in_flight=0)
+
+
+class TestSshAdviceWithMinimalBackend(unittest.TestCase):
+
+    def test_archive_is_uploaded_to_final_path_without_move(self):
+        pids = [_run_in_chain(_get_pid, 'minimal') for _ in range(2)]
+
+        self.assertNotIn(os.getpid(), pids)
+        remote = minimal_advice.remotes['default']
+        archives_directory = remote.directory / f'bandsaw-{remote.user}' / 'archives'
+        archive_names = [path.name for path in archives_directory.iterdir()]
+        self.assertEqual(1, len(archive_names))
+        self.assertTrue(archive_names[0].endswith('.pyz'))
+
+
 class TestSshAdvice(unittest.TestCase):
 
     def test_task_is_run_in_different_process(self):
@@ -206,6 +793,7 @@ class TestSshAdvice(unittest.TestCase):
         dummy_backend = DummyBackend(session)
         backend_spy = unittest.mock.Mock(wraps=dummy_backend)
         temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
         advice = SshAdvice(
                 backend=backend_spy,
                 directory=temp_dir,
@@ -226,6 +814,147 @@ class TestSshAdvice(unittest.TestCase):
             session.initiate()
         self.assertEqual(0, len(list(advice.directory.iterdir())))
 
+    def _create_advice(self, archive_exists):
+        config = Configuration()
+        dummy_backend = DummyBackend(None)
+        dummy_backend.path_exists = lambda remote, remote_path: archive_exists
+        backend_spy = unittest.mock.Mock(wraps=dummy_backend)
+        advice = SshAdvice(
+                backend=backend_spy,
+            ).add_remote(
+            Remote(
+                host='test.host',
+                user='bandsaw',
+                interpreter=Interpreter(
+                    path=[],
+                    executable='/usr/bin/python3',
+                ),
+                directory='/home/bandsaw',
+            ),
+        )
+        config.add_advice_chain(advice)
+        return config, dummy_backend, backend_spy
+
+    def _run_session(self, config, dummy_backend):
+        session = Session(Task.create_task(_get_pid), Execution('r'), config)
+        dummy_backend.session = session
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=config):
+            session.initiate()
+        return session
+
+    def test_distribution_archive_is_uploaded_once(self):
+        config, dummy_backend, backend_spy = self._create_advice(False)
+
+        session = self._run_session(config, dummy_backend)
+        self._run_session(config, dummy_backend)
+
+        archive_id = session.distribution_archive.archive_id
+        archive_path = pathlib.Path(
+            f'/home/bandsaw/bandsaw-bandsaw/archives/{archive_id}.pyz'
+        )
+        archive_uploads = [
+            call for call in backend_spy.copy_file_to_remote.call_args_list
+            if call.args[1] == session.distribution_archive.path
+        ]
+        self.assertEqual(1, len(archive_uploads))
+        backend_spy.create_private_dir.assert_called_once_with(
+            unittest.mock.ANY, pathlib.Path('/home/bandsaw/bandsaw-bandsaw')
+        )
+        backend_spy.path_exists.assert_called_once()
+        backend_spy.move.assert_called_once()
+        self.assertEqual(archive_path, backend_spy.move.call_args.args[2])
+        self.assertEqual(
+            str(archive_path), backend_spy.execute_remote.call_args.args[2]
+        )
+
+    def test_existing_distribution_archive_is_not_uploaded(self):
+        config, dummy_backend, backend_spy = self._create_advice(True)
+
+        session = self._run_session(config, dummy_backend)
+
+        archive_uploads = [
+            call for call in backend_spy.copy_file_to_remote.call_args_list
+            if call.args[1] == session.distribution_archive.path
+        ]
+        self.assertEqual(0, len(archive_uploads))
+        backend_spy.move.assert_not_called()
+        backend_spy.execute_remote.assert_called()
+
+    def test_archive_is_uploaded_again_if_it_was_removed(self):
+        config, dummy_backend, backend_spy = self._create_advice(False)
+        self._run_session(config, dummy_backend)
+        failures = [subprocess.CalledProcessError(2, ['python'])]
+
+        def _fail_once(*args):
+            if failures:
+                raise failures.pop()
+            return unittest.mock.DEFAULT
+
+        backend_spy.execute_remote.side_effect = _fail_once
+        session = self._run_session(config, dummy_backend)
+
+        archive_uploads = [
+            call for call in backend_spy.copy_file_to_remote.call_args_list
+            if call.args[1] == session.distribution_archive.path
+        ]
+        self.assertEqual(2, len(archive_uploads))
+        self.assertEqual(3, backend_spy.execute_remote.call_count)
+
+    def test_failing_execution_with_existing_archive_is_not_retried(self):
+        config, dummy_backend, backend_spy = self._create_advice(True)
+        backend_spy.execute_remote.side_effect = subprocess.CalledProcessError(
+            2, ['python']
+        )
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            self._run_session(config, dummy_backend)
+        self.assertEqual(1, backend_spy.execute_remote.call_count)
+
+    def test_session_is_transferred_via_pipe(self):
+        config = Configuration()
+        session = Session(Task.create_task(_get_pid), Execution('r'), config)
+        backend_spy = unittest.mock.Mock(wraps=DummyPipeBackend(session))
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        advice = SshAdvice(
+                backend=backend_spy,
+                directory=temp_dir,
+                transfer='pipe',
+            ).add_remote(
+            Remote(
+                host='test.host',
+                user='bandsaw',
+                interpreter=Interpreter(
+                    path=[],
+                    executable='/usr/bin/python3',
+                ),
+                directory='/home/bandsaw',
+            ),
+        )
+        config.add_advice_chain(advice)
+
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=config):
+            session.initiate()
+
+        self.assertEqual(os.getpid(), session.result.value)
+        arguments = backend_spy.execute_remote_with_pipe.call_args.args[3:]
+        self.assertEqual(
+            ('--input', '-', '--output', '-', '--run-id', session.run_id),
+            arguments[1:],
+        )
+        backend_spy.execute_remote.assert_not_called()
+        backend_spy.delete_dir.assert_not_called()
+        backend_spy.copy_file_from_remote.assert_not_called()
+        self.assertEqual(0, len(list(advice.directory.iterdir())))
+
+    def test_pipe_transfer_with_backend_without_pipe_support_raises(self):
+        with self.assertRaisesRegex(ValueError, "doesn't support transfer 'pipe'"):
+            SshAdvice(backend=MinimalLocalBackend(), transfer='pipe')
+
+    def test_unknown_transfer_raises(self):
+        with self.assertRaisesRegex(ValueError, "Unknown transfer 'carrier-pigeon'"):
+            SshAdvice(transfer='carrier-pigeon')
+
     def test_directory_for_data_exchange_can_be_configured(self):
         path = pathlib.Path('/my/directory')
         the_advice = SshAdvice(directory=path)
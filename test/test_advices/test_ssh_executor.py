@@ -0,0 +1,73 @@
+import unittest
+
+from bandsaw.advices.ssh import SshAdvice, Remote
+from bandsaw.advices.ssh_executor import SshExecutor
+from bandsaw.advices.ssh_pool import RemotePool
+from bandsaw.config import Configuration
+from bandsaw.decorator import task
+from bandsaw.interpreter import Interpreter
+
+
+advice = SshAdvice()
+other_advice = SshAdvice()
+
+configuration = Configuration()
+configuration.add_advice_chain(advice, name='ssh')
+configuration.add_advice_chain(other_advice, name='other-ssh')
+
+
+def _square(value):
+    return value * value
+
+
+class TestSshExecutor(unittest.TestCase):
+
+    def test_max_workers_default_to_in_flight_sessions_per_remote(self):
+        advice = SshAdvice(max_in_flight=3)
+        advice.add_remote(Remote(host='first', interpreter=Interpreter()), name='a')
+        advice.add_remote(Remote(host='second', interpreter=Interpreter()), name='b')
+
+        self.assertEqual(8, SshExecutor(advice).max_workers)
+
+    def test_max_workers_default_to_single_slot_per_remote(self):
+        advice = SshAdvice()
+        advice.add_remote(Remote(host='first', interpreter=Interpreter()), name='a')
+        advice.add_remote(Remote(host='second', interpreter=Interpreter()), name='b')
+
+        self.assertEqual(4, SshExecutor(advice).max_workers)
+
+    def test_max_workers_default_to_capacity_of_pool(self):
+        advice = SshAdvice().add_remote(
+            RemotePool()
+            .add_remote(Remote(host='first', interpreter=Interpreter()), slots=4)
+            .add_remote(Remote(host='second', interpreter=Interpreter()), slots=2)
+        )
+
+        self.assertEqual(8, SshExecutor(advice).max_workers)
+
+    def test_max_workers_can_be_configured(self):
+        self.assertEqual(3, SshExecutor(SshAdvice(), max_workers=3).max_workers)
+
+    def test_submit_undecorated_function_raises(self):
+        with SshExecutor(advice) as executor:
+            with self.assertRaisesRegex(ValueError, "isn't advised"):
+                executor.submit(_square, 2)
+
+    def test_submit_task_with_other_advice_raises(self):
+        square = task(config=__name__, chain='other-ssh')(_square)
+
+        with SshExecutor(advice) as executor:
+            with self.assertRaisesRegex(ValueError, "isn't advised"):
+                executor.submit(square, 2)
+
+    def test_submit_after_shutdown_raises(self):
+        square = task(config=__name__, chain='ssh')(_square)
+        executor = SshExecutor(advice)
+        executor.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            executor.submit(square, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
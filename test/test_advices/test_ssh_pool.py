@@ -0,0 +1,225 @@
+import threading
+import unittest.mock
+
+from bandsaw.advices.ssh import Remote
+from bandsaw.advices.ssh_pool import RemotePool
+from bandsaw.interpreter import Interpreter
+
+
+class TestRemotePool(unittest.TestCase):
+
+    def setUp(self):
+        self.first = Remote(host='first', interpreter=Interpreter())
+        self.second = Remote(host='second', interpreter=Interpreter())
+
+    def test_least_loaded_selects_remote_with_lowest_load(self):
+        pool = RemotePool().add_remote(self.first).add_remote(self.second, slots=2)
+
+        self.assertIs(self.first, pool.acquire())
+        self.assertIs(self.second, pool.acquire())
+        self.assertIs(self.second, pool.acquire())
+
+    def test_least_loaded_prefers_lower_ratio_of_assigned_tasks(self):
+        pool = (
+            RemotePool()
+            .add_remote(self.first, slots=2)
+            .add_remote(self.second, slots=4)
+        )
+
+        selected = [pool.acquire() for _ in range(3)]
+
+        self.assertEqual([self.first, self.second, self.second], selected)
+
+    def test_round_robin_selects_remotes_one_after_another(self):
+        pool = (
+            RemotePool(strategy='round-robin')
+            .add_remote(self.first, slots=2)
+            .add_remote(self.second, slots=2)
+        )
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        pool.release(second)
+        third = pool.acquire()
+
+        self.assertEqual([self.first, self.second, self.first], [first, second, third])
+
+    def test_round_robin_skips_full_remotes(self):
+        pool = (
+            RemotePool(strategy='round-robin')
+            .add_remote(self.first)
+            .add_remote(self.second)
+        )
+
+        selected = [pool.acquire() for _ in range(4)]
+        pool.release(self.second)
+
+        self.assertEqual([self.first, self.second] * 2, selected)
+        self.assertIs(self.second, pool.acquire())
+
+    def test_remote_takes_one_task_more_than_slots(self):
+        pool = RemotePool().add_remote(self.first, slots=2)
+
+        selected = [pool.acquire() for _ in range(3)]
+
+        self.assertEqual([self.first] * 3, selected)
+
+    def test_acquire_waits_until_remote_can_take_task(self):
+        pool = RemotePool().add_remote(self.first)
+        remote = pool.acquire()
+        pool.acquire()
+        acquired = []
+
+        thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        thread.start()
+        thread.join(0.1)
+        self.assertEqual([], acquired)
+
+        pool.release(remote)
+        thread.join(5)
+        self.assertEqual([self.first], acquired)
+
+    def test_execution_slot_waits_for_free_slot(self):
+        pool = RemotePool().add_remote(self.first)
+        pool.acquire()
+        pool.acquire()
+        executed = []
+
+        def execute():
+            with pool.execution_slot(self.first):
+                executed.append(self.first)
+
+        with pool.execution_slot(self.first):
+            thread = threading.Thread(target=execute)
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual([], executed)
+
+        thread.join(5)
+        self.assertEqual([self.first], executed)
+
+    def test_remote_is_taken_out_of_rotation_after_failures(self):
+        pool = RemotePool(max_failures=2).add_remote(self.first).add_remote(self.second)
+
+        for _ in range(2):
+            remote = pool.acquire()
+            self.assertIs(self.first, remote)
+            pool.release(remote, failed=True)
+
+        self.assertEqual([self.second], pool.available_remotes())
+        self.assertIs(self.second, pool.acquire())
+
+    def test_success_resets_failures(self):
+        pool = RemotePool(max_failures=2).add_remote(self.first)
+
+        pool.release(pool.acquire(), failed=True)
+        pool.release(pool.acquire())
+        pool.release(pool.acquire(), failed=True)
+
+        self.assertEqual([self.first], pool.available_remotes())
+
+    def test_remote_is_retried_after_timeout(self):
+        pool = RemotePool(max_failures=1, retry_after=10.0).add_remote(self.first)
+        with unittest.mock.patch(
+            'bandsaw.advices.ssh_pool.time.monotonic'
+        ) as time_mock:
+            time_mock.return_value = 100.0
+            pool.release(pool.acquire(), failed=True)
+            self.assertEqual([], pool.available_remotes())
+
+            time_mock.return_value = 110.0
+            remote = pool.acquire()
+            self.assertIs(self.first, remote)
+            pool.release(remote)
+
+        self.assertEqual([self.first], pool.available_remotes())
+
+    def test_failed_retry_takes_remote_out_of_rotation_again(self):
+        pool = (
+            RemotePool(max_failures=2, retry_after=10.0)
+            .add_remote(self.first)
+            .add_remote(self.second)
+        )
+        with unittest.mock.patch(
+            'bandsaw.advices.ssh_pool.time.monotonic'
+        ) as time_mock:
+            time_mock.return_value = 100.0
+            pool.release(pool.acquire(), failed=True)
+            pool.release(pool.acquire(), failed=True)
+
+            time_mock.return_value = 110.0
+            remote = pool.acquire()
+            self.assertIs(self.first, remote)
+            pool.release(remote, failed=True)
+
+        self.assertEqual([self.second], pool.available_remotes())
+
+    def test_only_single_task_is_retried(self):
+        pool = (
+            RemotePool(max_failures=1, retry_after=10.0)
+            .add_remote(self.first, slots=2)
+            .add_remote(self.second, slots=2)
+        )
+        with unittest.mock.patch(
+            'bandsaw.advices.ssh_pool.time.monotonic'
+        ) as time_mock:
+            time_mock.return_value = 100.0
+            pool.release(pool.acquire(), failed=True)
+
+            time_mock.return_value = 110.0
+            selected = [pool.acquire() for _ in range(3)]
+
+        self.assertEqual(1, selected.count(self.first))
+
+    def test_failed_remote_with_assigned_tasks_is_waited_for(self):
+        pool = RemotePool(max_failures=1, retry_after=10.0).add_remote(self.first)
+        with unittest.mock.patch(
+            'bandsaw.advices.ssh_pool.time.monotonic'
+        ) as time_mock:
+            time_mock.return_value = 100.0
+            busy = pool.acquire()
+            pool.release(pool.acquire(), failed=True)
+            time_mock.return_value = 110.0
+            acquired = []
+
+            with unittest.mock.patch.object(
+                pool._condition, 'wait', wraps=pool._condition.wait
+            ) as wait_mock:
+                thread = threading.Thread(
+                    target=lambda: acquired.append(pool.acquire()), daemon=True
+                )
+                thread.start()
+                thread.join(0.1)
+                self.assertEqual([], acquired)
+                self.assertEqual([unittest.mock.call(None)], wait_mock.call_args_list)
+
+                pool.release(busy)
+                thread.join(5)
+
+        self.assertEqual([self.first], acquired)
+
+    def test_empty_pool_raises(self):
+        with self.assertRaisesRegex(RuntimeError, "contains no remotes"):
+            RemotePool().acquire()
+
+    def test_unknown_strategy_raises(self):
+        with self.assertRaisesRegex(ValueError, "Unknown strategy 'random'"):
+            RemotePool(strategy='random')
+
+    def test_slots_must_be_positive(self):
+        with self.assertRaisesRegex(ValueError, "slots must be at least 1"):
+            RemotePool().add_remote(self.first, slots=0)
+
+    def test_max_failures_must_be_positive(self):
+        with self.assertRaisesRegex(ValueError, "max_failures must be at least 1"):
+            RemotePool(max_failures=0)
+
+    def test_capacity_contains_one_task_more_than_slots_per_remote(self):
+        pool = RemotePool().add_remote(self.first, slots=4).add_remote(self.second)
+
+        self.assertEqual(7, pool.capacity)
+
+
+if __name__ == '__main__':
+    unittest.main()
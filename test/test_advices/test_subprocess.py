@@ -2,6 +2,7 @@ import os
 import pathlib
 import tempfile
 import shutil
+import subprocess
 import unittest.mock
 
 from bandsaw.advices.subprocess import SubprocessAdvice
@@ -17,6 +18,10 @@ def _get_pid():
     return os.getpid()
 
 
+def _exit_process():
+    os._exit(3)
+
+
 advice_test_directory = os.path.dirname(__file__)
 sitecustomize_directory = os.path.join(advice_test_directory, 'subprocess_site')
 test_directory = os.path.dirname(advice_test_directory)
@@ -34,17 +39,51 @@ advice = SubprocessAdvice(
     interpreter=interpreter,
     directory=tempfile.mkdtemp(),
 )
+pooled_advice = SubprocessAdvice(
+    interpreter=interpreter,
+    directory=tempfile.mkdtemp(),
+    pool_size=1,
+)
+recycling_advice = SubprocessAdvice(
+    interpreter=interpreter,
+    directory=tempfile.mkdtemp(),
+    pool_size=1,
+    max_tasks_per_worker=1,
+)
+pipe_advice = SubprocessAdvice(
+    interpreter=interpreter,
+    transfer='pipe',
+)
+pooled_pipe_advice = SubprocessAdvice(
+    interpreter=interpreter,
+    pool_size=1,
+    transfer='pipe',
+)
 configuration = Configuration()
 configuration.add_advice_chain(advice)
+configuration.add_advice_chain(pipe_advice, name='pipe')
+configuration.add_advice_chain(pooled_pipe_advice, name='pooled-pipe')
+configuration.add_advice_chain(pooled_advice, name='pooled')
+configuration.add_advice_chain(recycling_advice, name='recycling')
 configuration.set_serializer(JsonSerializer())
 
 
+def _run_in_chain(task_function, chain):
+    session = Session(
+        Task.create_task(task_function), Execution('r'), configuration, chain,
+    )
+    session.initiate()
+    return session.result.value
+
+
 class TestSubprocessAdvice(unittest.TestCase):
 
     @staticmethod
     def tearDownClass():
         global advice
         shutil.rmtree(advice.directory)
+        shutil.rmtree(pooled_advice.directory)
+        shutil.rmtree(recycling_advice.directory)
 
     def test_task_is_run_in_different_process(self):
         session = Session(Task.create_task(_get_pid), Execution('r'), configuration)
@@ -63,6 +102,61 @@ class TestSubprocessAdvice(unittest.TestCase):
         the_advice = SubprocessAdvice(directory=path)
         self.assertEqual(the_advice.directory, path)
 
+    def test_pooled_task_is_run_in_different_process(self):
+        subprocess_pid = _run_in_chain(_get_pid, 'pooled')
+
+        self.assertNotEqual(subprocess_pid, os.getpid())
+
+    def test_pooled_worker_is_reused_for_multiple_sessions(self):
+        first_pid = _run_in_chain(_get_pid, 'pooled')
+        second_pid = _run_in_chain(_get_pid, 'pooled')
+
+        self.assertEqual(first_pid, second_pid)
+        self.assertEqual(0, len(list(pooled_advice.directory.iterdir())))
+
+    def test_pooled_worker_is_replaced_after_max_tasks(self):
+        first_pid = _run_in_chain(_get_pid, 'recycling')
+        second_pid = _run_in_chain(_get_pid, 'recycling')
+
+        self.assertNotEqual(first_pid, second_pid)
+
+    def test_crashed_pooled_worker_is_replaced(self):
+        first_pid = _run_in_chain(_get_pid, 'pooled')
+        with self.assertRaises(subprocess.CalledProcessError):
+            _run_in_chain(_exit_process, 'pooled')
+        second_pid = _run_in_chain(_get_pid, 'pooled')
+
+        self.assertNotEqual(first_pid, second_pid)
+
+    def test_pipe_transfer_runs_task_in_different_process(self):
+        subprocess_pid = _run_in_chain(_get_pid, 'pipe')
+
+        self.assertNotEqual(subprocess_pid, os.getpid())
+
+    def test_pipe_transfer_does_not_write_session_files(self):
+        with unittest.mock.patch('bandsaw.advices.subprocess.io.FileIO') as file_mock:
+            _run_in_chain(_get_pid, 'pipe')
+        file_mock.assert_not_called()
+
+    def test_pipe_transfer_raises_if_subprocess_fails(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            _run_in_chain(_exit_process, 'pipe')
+
+    def test_pipe_transfer_with_pooled_worker(self):
+        first_pid = _run_in_chain(_get_pid, 'pooled-pipe')
+        second_pid = _run_in_chain(_get_pid, 'pooled-pipe')
+
+        self.assertNotEqual(first_pid, os.getpid())
+        self.assertEqual(first_pid, second_pid)
+
+    def test_unknown_transfer_raises(self):
+        with self.assertRaisesRegex(ValueError, "Unknown transfer 'socket'"):
+            SubprocessAdvice(transfer='socket')
+
+    def test_pool_size_must_be_positive(self):
+        with self.assertRaisesRegex(ValueError, "pool_size must be at least 1"):
+            SubprocessAdvice(pool_size=0)
+
     def test_after_does_not_proceed_or_conclude(self):
         session_mock = unittest.mock.Mock()
         the_advice = SubprocessAdvice()
@@ -0,0 +1,124 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest.mock
+
+from bandsaw.cache.directory import DirectoryBackend
+
+
+class TestDirectoryBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.backend = DirectoryBackend(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_stored_result_can_be_opened(self):
+        with self.backend.store('t', 'e') as stream:
+            stream.write(b'My result')
+
+        self.assertTrue(self.backend.contains('t', 'e'))
+        with self.backend.open('t', 'e') as stream:
+            self.assertEqual(stream.read(), b'My result')
+        self.assertEqual((self.directory / 't' / 'e').read_bytes(), b'My result')
+
+    def test_missing_result(self):
+        self.assertFalse(self.backend.contains('t', 'e'))
+        self.assertIsNone(self.backend.open('t', 'e'))
+        self.assertIsNone(self.backend.stored_at('t', 'e'))
+
+    def test_stored_at_is_modification_time(self):
+        with self.backend.store('t', 'e') as stream:
+            stream.write(b'My result')
+        os.utime(self.directory / 't' / 'e', (1000, 1000))
+
+        self.assertEqual(self.backend.stored_at('t', 'e'), 1000)
+
+    def test_failing_store_leaves_no_files(self):
+        with self.assertRaises(RuntimeError):
+            with self.backend.store('t', 'e') as stream:
+                stream.write(b'Partial')
+                raise RuntimeError()
+
+        self.assertFalse(self.backend.contains('t', 'e'))
+        self.assertEqual(os.listdir(self.directory / 't'), [])
+
+    def test_remove(self):
+        with self.backend.store('t', 'e') as stream:
+            stream.write(b'My result')
+
+        self.backend.remove('t', 'e')
+        self.backend.remove('t', 'e')
+        self.assertFalse(self.backend.contains('t', 'e'))
+
+    def test_content_addressed_results_share_blob(self):
+        backend = DirectoryBackend(self.directory, content_addressed=True)
+        for execution_id in ('a', 'b'):
+            with backend.store('t', execution_id) as stream:
+                stream.write(b'Same result')
+
+        self.assertTrue(backend.path('t', 'a').samefile(backend.path('t', 'b')))
+        backend.remove('t', 'a')
+        self.assertEqual(len(list((self.directory / 'blobs').glob('*/*'))), 1)
+        backend.remove('t', 'b')
+        self.assertEqual(list((self.directory / 'blobs').glob('*/*')), [])
+
+    def test_content_addressed_results_share_content_id(self):
+        backend = DirectoryBackend(self.directory, content_addressed=True)
+        for execution_id, content in (('a', b'Same'), ('b', b'Same'), ('c', b'Other')):
+            with backend.store('t', execution_id) as stream:
+                stream.write(content)
+
+        self.assertEqual(backend.content_id('t', 'a'), backend.content_id('t', 'b'))
+        self.assertNotEqual(backend.content_id('t', 'a'), backend.content_id('t', 'c'))
+        self.assertIsNone(backend.content_id('t', 'missing'))
+        self.assertEqual(
+            [entry[:2] for entry in backend.entries()],
+            [('t', 'a'), ('t', 'b'), ('t', 'c')],
+        )
+
+    def test_content_id_without_content_addressing(self):
+        with self.backend.store('t', 'e') as stream:
+            stream.write(b'My result')
+        self.assertIsNone(self.backend.content_id('t', 'e'))
+
+    def test_blob_is_found_without_hashing_item(self):
+        backend = DirectoryBackend(self.directory, content_addressed=True)
+        with backend.store('t', 'a') as stream:
+            stream.write(b'My result')
+
+        with unittest.mock.patch(
+            'bandsaw.cache.directory.shutil.copyfileobj'
+        ) as copy_mock:
+            backend.remove('t', 'a')
+        copy_mock.assert_not_called()
+        self.assertEqual(list((self.directory / 'blobs').glob('*/*')), [])
+        self.assertEqual(os.listdir(self.directory / 't'), [])
+
+    def test_blob_of_item_without_hash_is_removed(self):
+        backend = DirectoryBackend(self.directory, content_addressed=True)
+        with backend.store('t', 'a') as stream:
+            stream.write(b'My result')
+        (self.directory / 't' / 'a.sha256').unlink()
+
+        backend.remove('t', 'a')
+        self.assertEqual(list((self.directory / 'blobs').glob('*/*')), [])
+
+    def test_storing_content_addressed_result_again_updates_stored_at(self):
+        backend = DirectoryBackend(self.directory, content_addressed=True)
+        with backend.store('t', 'a') as stream:
+            stream.write(b'Same result')
+        os.utime(backend.path('t', 'a'), (1000, 1000))
+
+        with backend.store('t', 'b') as stream:
+            stream.write(b'Same result')
+
+        self.assertGreater(backend.stored_at('t', 'b'), 1000)
+        self.assertEqual(backend.stored_at('t', 'a'), backend.stored_at('t', 'b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
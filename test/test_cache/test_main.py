@@ -0,0 +1,196 @@
+import contextlib
+import io
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+
+from bandsaw.advices.cache import CacheIndex
+from bandsaw.cache.__main__ import main
+from bandsaw.cache.directory import DirectoryBackend
+from bandsaw.cache.sqlite import SqliteBackend
+
+
+TASKS_MODULE = '''
+from bandsaw.config import Configuration
+from bandsaw.serialization.json import JsonSerializer
+from bandsaw.tasks import Task
+
+
+configuration = Configuration()
+configuration.set_serializer(JsonSerializer())
+
+
+def my_task():
+    pass
+
+
+my_task.bandsaw_task = Task.create_task(my_task)
+'''
+
+
+class TestCacheCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.cache_dir = self.directory / 'cache'
+        self.backend = DirectoryBackend(self.cache_dir)
+        (self.directory / 'cached_tasks_module.py').write_text(TASKS_MODULE)
+        sys.path.insert(0, str(self.directory))
+        import cached_tasks_module
+
+        self.task_id = cached_tasks_module.my_task.bandsaw_task.task_id
+
+    def tearDown(self):
+        sys.path.remove(str(self.directory))
+        sys.modules.pop('cached_tasks_module', None)
+        shutil.rmtree(self.directory)
+
+    def _store(self, backend, task_id, execution_id, data):
+        with backend.store(task_id, execution_id) as stream:
+            stream.write(data)
+
+    def _run(self, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            exit_code = main(list(args))
+        return exit_code, output.getvalue()
+
+    def test_size_per_task(self):
+        self._store(self.backend, 'a', '1', b'12345')
+        self._store(self.backend, 'a', '2', b'123')
+        self._store(self.backend, 'b', '1', b'1')
+
+        exit_code, output = self._run('size', str(self.cache_dir))
+
+        self.assertEqual(exit_code, 0)
+        lines = [line.split() for line in output.splitlines()]
+        self.assertEqual(
+            lines,
+            [
+                ['task', 'results', 'bytes'],
+                ['a', '2', '8'],
+                ['b', '1', '1'],
+                ['total', '3', '9'],
+            ],
+        )
+
+    def test_size_of_sqlite_backend(self):
+        backend = SqliteBackend(self.directory / 'results.sqlite')
+        self._store(backend, 'a', '1', b'12345')
+
+        _, output = self._run('size', str(self.directory / 'results.sqlite'))
+        self.assertIn(['a', '1', '5'], [line.split() for line in output.splitlines()])
+
+    def test_gc_removes_results_of_unknown_tasks(self):
+        index = CacheIndex(self.cache_dir / 'index.sqlite')
+        self._store(self.backend, self.task_id, '1', b'current')
+        self._store(self.backend, 'old', '1', b'old')
+        index.add('old', '1', 3)
+
+        exit_code, output = self._run(
+            'gc', str(self.cache_dir), '--module', 'cached_tasks_module'
+        )
+
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Removed 1 results with 3 bytes", output)
+        self.assertTrue(self.backend.contains(self.task_id, '1'))
+        self.assertFalse(self.backend.contains('old', '1'))
+        self.assertEqual(index.total_size(), 0)
+
+    def test_gc_dry_run_keeps_results(self):
+        self._store(self.backend, 'old', '1', b'old')
+
+        _, output = self._run(
+            'gc', str(self.cache_dir), '--module', 'cached_tasks_module', '--dry-run'
+        )
+
+        self.assertIn("Would remove old/1", output)
+        self.assertTrue(self.backend.contains('old', '1'))
+
+    def test_verify_reports_broken_results(self):
+        self._store(self.backend, 'a', '1', b'{"value": 1}')
+        self._store(self.backend, 'a', '2', b'{broken')
+
+        exit_code, output = self._run(
+            'verify', str(self.cache_dir), '--config', 'cached_tasks_module'
+        )
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Broken result a/2", output)
+        self.assertIn("Checked 2 results, 1 broken", output)
+        self.assertTrue(self.backend.contains('a', '2'))
+
+    def test_verify_removes_broken_results_and_stale_index_entries(self):
+        index = CacheIndex(self.cache_dir / 'index.sqlite')
+        self._store(self.backend, 'a', '1', b'{broken')
+        index.add('a', '1', 7)
+        index.add('a', '2', 7)
+
+        exit_code, output = self._run(
+            'verify', str(self.cache_dir), '--config', 'cached_tasks_module', '--remove'
+        )
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Index contains missing result a/2", output)
+        self.assertFalse(self.backend.contains('a', '1'))
+        self.assertEqual(index.total_size(), 0)
+
+    def test_copy_selected_tasks_into_other_cache(self):
+        self._store(self.backend, self.task_id, '1', b'current')
+        self._store(self.backend, 'a', '1', b'a')
+        self._store(self.backend, 'b', '1', b'b')
+        destination = SqliteBackend(self.directory / 'local' / 'results.sqlite')
+        self._store(destination, 'a', '1', b'existing')
+
+        exit_code, output = self._run(
+            'copy',
+            str(self.cache_dir),
+            str(destination.path),
+            '--task',
+            'a',
+            '--module',
+            'cached_tasks_module',
+        )
+
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Copied 1 results with 7 bytes, skipped 1 existing", output)
+        with destination.open(self.task_id, '1') as stream:
+            self.assertEqual(stream.read(), b'current')
+        with destination.open('a', '1') as stream:
+            self.assertEqual(stream.read(), b'existing')
+        self.assertFalse(destination.contains('b', '1'))
+
+    def test_copy_all_results_updates_index(self):
+        self._store(self.backend, 'a', '1', b'a')
+        destination_dir = self.directory / 'other'
+        index = CacheIndex(destination_dir / 'index.sqlite')
+        index.total_size()
+
+        self._run('copy', str(self.cache_dir), str(destination_dir))
+
+        self.assertTrue(DirectoryBackend(destination_dir).contains('a', '1'))
+        self.assertEqual(index.total_size(), 1)
+
+
+class TestDirectoryBackendEntries(unittest.TestCase):
+
+    def test_lock_temporary_and_blob_files_are_skipped(self):
+        directory = pathlib.Path(tempfile.mkdtemp())
+        try:
+            backend = DirectoryBackend(directory, content_addressed=True)
+            with backend.store('t', 'e') as stream:
+                stream.write(b'data')
+            (directory / 't' / 'e.lock').touch()
+            (directory / 't' / 'f.1.2.tmp').touch()
+            (directory / 'index.sqlite').touch()
+            (directory / 'results.sqlite.files').mkdir()
+
+            self.assertEqual(list(backend.entries()), [('t', 'e', 4)])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import pathlib
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from bandsaw.cache.sqlite import SqliteBackend
+
+
+class TestSqliteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.backend = SqliteBackend(self.directory / 'cache.sqlite', 16)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _store(self, task_id, execution_id, data):
+        with self.backend.store(task_id, execution_id) as stream:
+            stream.write(data)
+            size = stream.tell()
+        self.assertEqual(size, len(data))
+
+    def _read(self, task_id, execution_id):
+        with self.backend.open(task_id, execution_id) as stream:
+            return stream.read()
+
+    def _external_files(self):
+        if not self.backend.files_directory.exists():
+            return []
+        return os.listdir(self.backend.files_directory)
+
+    def test_database_uses_wal_mode(self):
+        self._store('t', 'e', b'small')
+        connection = sqlite3.connect(str(self.backend.path))
+        journal_mode = connection.execute('PRAGMA journal_mode').fetchone()[0]
+        connection.close()
+        self.assertEqual(journal_mode, 'wal')
+
+    def test_small_result_is_stored_inline(self):
+        self._store('t', 'e', b'small')
+
+        self.assertTrue(self.backend.contains('t', 'e'))
+        self.assertEqual(self._read('t', 'e'), b'small')
+        self.assertEqual(self._external_files(), [])
+
+    def test_large_result_is_stored_in_external_file(self):
+        self._store('t', 'e', b'large' * 10)
+
+        self.assertEqual(self._read('t', 'e'), b'large' * 10)
+        self.assertEqual(len(self._external_files()), 1)
+
+    def test_large_result_written_in_chunks(self):
+        with self.backend.store('t', 'e') as stream:
+            for _ in range(10):
+                stream.write(b'chunk')
+
+        self.assertEqual(self._read('t', 'e'), b'chunk' * 10)
+        self.assertEqual(len(self._external_files()), 1)
+
+    def test_missing_result(self):
+        self.assertFalse(self.backend.contains('t', 'e'))
+        self.assertIsNone(self.backend.open('t', 'e'))
+        self.assertIsNone(self.backend.stored_at('t', 'e'))
+
+    def test_stored_at(self):
+        with unittest.mock.patch('bandsaw.cache.sqlite.time.time', return_value=1000):
+            self._store('t', 'e', b'small')
+
+        self.assertEqual(self.backend.stored_at('t', 'e'), 1000)
+
+    def test_replacing_result_removes_previous_file(self):
+        self._store('t', 'e', b'large' * 10)
+        self._store('t', 'e', b'other' * 10)
+
+        self.assertEqual(self._read('t', 'e'), b'other' * 10)
+        self.assertEqual(len(self._external_files()), 1)
+
+    def test_remove(self):
+        self._store('t', 'small', b'small')
+        self._store('t', 'large', b'large' * 10)
+
+        self.backend.remove('t', 'small')
+        self.backend.remove('t', 'large')
+        self.backend.remove('t', 'missing')
+
+        self.assertFalse(self.backend.contains('t', 'small'))
+        self.assertFalse(self.backend.contains('t', 'large'))
+        self.assertEqual(self._external_files(), [])
+
+    def test_failing_store_leaves_nothing(self):
+        for data in (b'small', b'large' * 10):
+            with self.assertRaises(RuntimeError):
+                with self.backend.store('t', 'e') as stream:
+                    stream.write(data)
+                    raise RuntimeError()
+
+        self.assertFalse(self.backend.contains('t', 'e'))
+        self.assertEqual(self._external_files(), [])
+
+    def test_results_are_shared_between_threads_and_instances(self):
+        def _store(execution_id):
+            self._store('t', execution_id, execution_id.encode())
+
+        threads = [
+            threading.Thread(target=_store, args=(str(i),)) for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        other_backend = SqliteBackend(self.backend.path)
+        for i in range(10):
+            with other_backend.open('t', str(i)) as stream:
+                self.assertEqual(stream.read(), str(i).encode())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import math
+import unittest
+
+from bandsaw.cache.statistics import CacheStatistics, LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_empty_histogram(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.count, 0)
+        self.assertIsNone(histogram.mean)
+        self.assertIsNone(histogram.quantile(0.5))
+
+    def test_durations_are_counted_in_buckets(self):
+        histogram = LatencyHistogram()
+        histogram.add(0.0015)
+        histogram.add(0.0015)
+        histogram.add(0.3)
+        histogram.add(1000)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.total, 1000.303)
+        self.assertEqual(
+            histogram.value_info()['buckets'],
+            {'0.002': 2, '0.5': 1, 'inf': 1},
+        )
+
+    def test_quantile_returns_upper_bound_of_bucket(self):
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.add(0.0015)
+        histogram.add(3)
+
+        self.assertEqual(histogram.quantile(0.5), 0.002)
+        self.assertEqual(histogram.quantile(0.99), 0.002)
+        self.assertEqual(histogram.quantile(1.0), 5)
+
+    def test_quantile_of_overflow_is_infinite(self):
+        histogram = LatencyHistogram()
+        histogram.add(1000)
+        self.assertEqual(histogram.quantile(0.5), math.inf)
+
+
+class TestCacheStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.statistics = CacheStatistics()
+
+    def test_counters_are_kept_per_task(self):
+        self.statistics.record_miss('a')
+        self.statistics.record_store('a', 100, 0.01)
+        self.statistics.record_hit('a', 100, 0.001)
+        self.statistics.record_hit('a')
+        self.statistics.record_miss('b')
+
+        task_a = self.statistics.task('a')
+        self.assertEqual(task_a.hits, 2)
+        self.assertEqual(task_a.memory_hits, 1)
+        self.assertEqual(task_a.misses, 1)
+        self.assertEqual(task_a.stores, 1)
+        self.assertEqual(task_a.bytes_read, 100)
+        self.assertEqual(task_a.bytes_written, 100)
+        self.assertEqual(task_a.deserialize_latency.count, 1)
+        self.assertEqual(task_a.serialize_latency.count, 1)
+        self.assertAlmostEqual(task_a.hit_rate, 2 / 3)
+        self.assertEqual(self.statistics.task('b').misses, 1)
+        self.assertEqual(self.statistics.task_ids, ['a', 'b'])
+
+    def test_unknown_task_has_empty_statistics(self):
+        statistics = self.statistics.task('unknown')
+        self.assertEqual(statistics.hits, 0)
+        self.assertIsNone(statistics.hit_rate)
+        self.assertEqual(self.statistics.task_ids, [])
+
+    def test_total_sums_up_all_tasks(self):
+        self.statistics.record_hit('a', 100, 0.001)
+        self.statistics.record_hit('b', 50, 0.001)
+        self.statistics.record_miss('b')
+        self.statistics.record_store('b', 50, 0.01)
+
+        total = self.statistics.total()
+        self.assertEqual(total.hits, 2)
+        self.assertEqual(total.misses, 1)
+        self.assertEqual(total.bytes_read, 150)
+        self.assertEqual(total.bytes_written, 50)
+        self.assertEqual(total.deserialize_latency.count, 2)
+        self.assertEqual(total.deserialize_latency.value_info()['buckets'], {'0.001': 2})
+
+    def test_value_info(self):
+        self.statistics.record_miss('a')
+        info = self.statistics.value_info()
+        self.assertEqual(list(info), ['a'])
+        self.assertEqual(info['a']['misses'], 1)
+        self.assertEqual(info['a']['hit_rate'], 0.0)
+        self.assertEqual(info['a']['serialize_latency']['count'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import unittest
+import zipfile
+
+from bandsaw.compression import Compression
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_default_is_stored(self):
+        compression = Compression()
+        self.assertEqual('stored', compression.method)
+        self.assertIsNone(compression.level)
+        self.assertEqual({}, compression.entries)
+
+    def test_unknown_method_raises(self):
+        with self.assertRaisesRegex(ValueError, "Unknown compression method 'zstd'"):
+            Compression('zstd')
+
+    def test_unknown_method_for_entries_raises(self):
+        with self.assertRaisesRegex(ValueError, "Unknown compression method 'zstd'"):
+            Compression('deflate', entries={'*.gz': 'zstd'})
+
+    def test_archive_uses_method_and_level(self):
+        compression = Compression('deflate', level=9)
+        stream = io.BytesIO()
+        with compression.open_archive(stream) as archive:
+            archive.writestr(compression.entry('my.entry'), b'a' * 1000)
+
+        with zipfile.ZipFile(stream) as archive:
+            info = archive.getinfo('my.entry')
+            self.assertEqual(zipfile.ZIP_DEFLATED, info.compress_type)
+            self.assertLess(info.compress_size, info.file_size)
+            self.assertEqual(b'a' * 1000, archive.read('my.entry'))
+
+    def test_entry_without_matching_pattern_uses_name(self):
+        compression = Compression('deflate', entries={'attachments/*.gz': 'stored'})
+        self.assertEqual('task.dat', compression.entry('task.dat'))
+
+    def test_entry_with_matching_pattern_uses_different_method(self):
+        compression = Compression('lzma', entries={'attachments/*.gz': 'stored'})
+        stream = io.BytesIO()
+        with compression.open_archive(stream) as archive:
+            with archive.open(compression.entry('attachments/log.gz'), 'w') as entry:
+                entry.write(b'a' * 1000)
+            with archive.open(compression.entry('attachments/log.txt'), 'w') as entry:
+                entry.write(b'a' * 1000)
+
+        with zipfile.ZipFile(stream) as archive:
+            stored_info = archive.getinfo('attachments/log.gz')
+            self.assertEqual(zipfile.ZIP_STORED, stored_info.compress_type)
+            self.assertEqual(b'a' * 1000, archive.read('attachments/log.gz'))
+            compressed_info = archive.getinfo('attachments/log.txt')
+            self.assertEqual(zipfile.ZIP_LZMA, compressed_info.compress_type)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -67,6 +67,48 @@ class TestConfiguration(unittest.TestCase):
         register_mock.call_args[0][0](register_mock.call_args[0][1])
         self.assertFalse(config.temporary_directory.exists())
 
+    def test_session_compression_defaults_to_stored(self):
+        config = Configuration()
+        self.assertEqual('stored', config.session_compression.method)
+
+    def test_set_session_compression(self):
+        config = Configuration()
+        returned = config.set_session_compression(
+            'deflate', level=3, entries={'attachments/*.gz': 'stored'},
+        )
+        self.assertIs(config, returned)
+        self.assertEqual('deflate', config.session_compression.method)
+        self.assertEqual(3, config.session_compression.level)
+        self.assertEqual(
+            {'attachments/*.gz': 'stored'}, config.session_compression.entries,
+        )
+
+    def test_set_session_compression_with_unknown_method_raises(self):
+        config = Configuration()
+        with self.assertRaisesRegex(ValueError, "Unknown compression method"):
+            config.set_session_compression('zstd')
+
+    def test_hasher_defaults_to_sha256(self):
+        config = Configuration()
+        self.assertEqual('sha256', config.hasher.name)
+
+    def test_set_hash_algorithm(self):
+        config = Configuration()
+        returned = config.set_hash_algorithm('blake2b', digest_size=16)
+        self.assertIs(config, returned)
+        self.assertEqual('blake2b(digest_size=16)', config.hasher.name)
+
+    def test_set_hash_algorithm_with_unknown_algorithm_raises(self):
+        config = Configuration()
+        with self.assertRaises(ValueError):
+            config.set_hash_algorithm('not-existing')
+
+    def test_add_fingerprint(self):
+        config = Configuration()
+        returned = config.add_fingerprint(bytes, len)
+        self.assertIs(config, returned)
+        self.assertEqual({bytes: len}, config.fingerprints)
+
 
 class TestGetConfiguration(unittest.TestCase):
 
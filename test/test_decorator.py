@@ -1,8 +1,11 @@
+import io
 import os
 import unittest
 
 from bandsaw.config import Configuration, CONFIGURATION_MODULE_ENV_VARIABLE
-from bandsaw.decorator import task
+from bandsaw.decorator import task, _calculate_execution_id
+from bandsaw.identifier import identifier_from_bytes
+from bandsaw.serialization import JsonSerializer, PickleSerializer
 
 
 def function_without_arguments():
@@ -70,5 +73,50 @@ class TestTask(unittest.TestCase):
             task(function_raises_exception, function_without_arguments)
 
 
+class TestExecutionId(unittest.TestCase):
+
+    def test_execution_id_is_derived_from_serialized_arguments(self):
+        for serializer in (JsonSerializer(), PickleSerializer()):
+            stream = io.BytesIO()
+            serializer.serialize(((1, 'a'), {'b': [2.0]}), stream)
+
+            execution_id = _calculate_execution_id((1, 'a'), {'b': [2.0]}, serializer)
+
+            self.assertEqual(execution_id, identifier_from_bytes(stream.getvalue()))
+
+    def test_arguments_with_fingerprints_use_fingerprint_for_execution_id(self):
+        class LargeValue:
+            def __init__(self, fingerprint):
+                self.fingerprint = fingerprint
+                self.unused_payload = object()
+
+        serializer = PickleSerializer()
+        fingerprints = {LargeValue: lambda value: value.fingerprint}
+
+        execution_id = _calculate_execution_id(
+            (LargeValue('a'),), {}, serializer, fingerprints=fingerprints
+        )
+
+        self.assertEqual(
+            execution_id,
+            _calculate_execution_id(
+                (LargeValue('a'),), {}, serializer, fingerprints=fingerprints
+            ),
+        )
+        self.assertNotEqual(
+            execution_id,
+            _calculate_execution_id(
+                (LargeValue('b'),), {}, serializer, fingerprints=fingerprints
+            ),
+        )
+
+    def test_different_arguments_lead_to_different_execution_ids(self):
+        serializer = PickleSerializer()
+        self.assertNotEqual(
+            _calculate_execution_id((1,), {}, serializer),
+            _calculate_execution_id((2,), {}, serializer),
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
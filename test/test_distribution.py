@@ -3,6 +3,7 @@ import pathlib
 import subprocess
 import sys
 import tempfile
+import threading
 import unittest.mock
 import zipfile
 
@@ -80,6 +81,42 @@ class TestDistributionArchive(unittest.TestCase):
         path2_mod_time = path2.stat().st_mtime_ns
         self.assertEqual(path1_mod_time, path2_mod_time)
 
+    def test_archive_id_is_derived_from_content(self):
+        archive = DistributionArchive(self.path, 'bandsaw')
+        other_path = pathlib.Path(tempfile.mktemp())
+        try:
+            other_archive = DistributionArchive(other_path, 'bandsaw')
+
+            self.assertEqual(archive.archive_id, other_archive.archive_id)
+        finally:
+            other_path.unlink()
+
+    def test_archive_id_differs_for_different_modules(self):
+        archive = DistributionArchive(self.path)
+        other_path = pathlib.Path(tempfile.mktemp())
+        try:
+            other_archive = DistributionArchive(other_path, 'bandsaw')
+
+            self.assertNotEqual(archive.archive_id, other_archive.archive_id)
+        finally:
+            other_path.unlink()
+
+    def test_archive_is_created_once_by_concurrent_threads(self):
+        archive = DistributionArchive(self.path, 'bandsaw')
+        archive_ids = []
+
+        threads = [
+            threading.Thread(target=lambda: archive_ids.append(archive.archive_id))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(set(archive_ids)))
+        self.assertTrue(zipfile.is_zipfile(self.path))
+
     def test_archive_is_zip(self):
         archive = DistributionArchive(self.path)
         path = archive.path
@@ -0,0 +1,143 @@
+import array
+import gc
+import os
+import tempfile
+import unittest
+
+from bandsaw.fingerprints import (
+    Fingerprint,
+    buffer_fingerprint,
+    cached_fingerprint,
+    file_fingerprint,
+    fingerprint_of,
+    replace_by_fingerprints,
+)
+
+
+class ValueWithFingerprint:
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+
+    def __bandsaw_fingerprint__(self):
+        return self.fingerprint
+
+
+class ThirdPartyValue:
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+
+
+class DerivedThirdPartyValue(ThirdPartyValue):
+    pass
+
+
+class TestFingerprintOf(unittest.TestCase):
+
+    def test_values_without_fingerprint_return_none(self):
+        self.assertIsNone(fingerprint_of('value'))
+        self.assertIsNone(fingerprint_of(1, {str: str}))
+
+    def test_fingerprint_method_is_used(self):
+        fingerprint = fingerprint_of(ValueWithFingerprint('abc'))
+        self.assertEqual(
+            fingerprint,
+            Fingerprint('test_fingerprints.ValueWithFingerprint', 'abc'),
+        )
+
+    def test_registered_function_is_used(self):
+        fingerprints = {ThirdPartyValue: lambda value: value.fingerprint}
+        fingerprint = fingerprint_of(ThirdPartyValue('abc'), fingerprints)
+        self.assertEqual(fingerprint.fingerprint, 'abc')
+
+    def test_registered_function_is_used_for_subclasses(self):
+        fingerprints = {ThirdPartyValue: lambda value: value.fingerprint}
+        fingerprint = fingerprint_of(DerivedThirdPartyValue('abc'), fingerprints)
+        self.assertEqual(fingerprint.fingerprint, 'abc')
+        self.assertEqual(
+            fingerprint.value_type, 'test_fingerprints.DerivedThirdPartyValue'
+        )
+
+    def test_fingerprints_of_different_types_are_different(self):
+        fingerprints = {ThirdPartyValue: lambda value: value.fingerprint}
+        self.assertNotEqual(
+            fingerprint_of(ValueWithFingerprint('abc'), fingerprints),
+            fingerprint_of(ThirdPartyValue('abc'), fingerprints),
+        )
+
+
+class TestReplaceByFingerprints(unittest.TestCase):
+
+    def test_arguments_with_fingerprints_are_replaced(self):
+        args, kwargs = replace_by_fingerprints(
+            (1, ValueWithFingerprint('a')),
+            {'b': ValueWithFingerprint('b'), 'c': 'c'},
+        )
+        self.assertEqual(args[0], 1)
+        self.assertEqual(args[1].fingerprint, 'a')
+        self.assertEqual(kwargs['b'].fingerprint, 'b')
+        self.assertEqual(kwargs['c'], 'c')
+
+
+class TestFingerprintFunctions(unittest.TestCase):
+
+    def test_file_fingerprint_changes_with_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'file')
+            with open(path, 'w') as stream:
+                stream.write('content')
+            fingerprint = file_fingerprint(path)
+            self.assertIn(path, fingerprint)
+            self.assertEqual(fingerprint, file_fingerprint(path))
+
+            with open(path, 'w') as stream:
+                stream.write('changed content')
+            self.assertNotEqual(fingerprint, file_fingerprint(path))
+
+    def test_buffer_fingerprint_depends_on_content_format_and_shape(self):
+        fingerprint = buffer_fingerprint(array.array('i', [1, 2, 3]))
+        self.assertEqual(fingerprint, buffer_fingerprint(array.array('i', [1, 2, 3])))
+        self.assertNotEqual(
+            fingerprint, buffer_fingerprint(array.array('i', [1, 2, 4]))
+        )
+        self.assertNotEqual(
+            fingerprint, buffer_fingerprint(array.array('l', [1, 2, 3]))
+        )
+
+    def test_buffer_fingerprint_of_non_contiguous_buffer(self):
+        view = memoryview(b'123456')[::2]
+        self.assertEqual(buffer_fingerprint(view), buffer_fingerprint(b'135'))
+
+    def test_cached_fingerprint_is_only_derived_once_per_value(self):
+        calls = []
+
+        def _fingerprint(value):
+            calls.append(value)
+            return value.fingerprint
+
+        function = cached_fingerprint(_fingerprint)
+        value = ThirdPartyValue('abc')
+        self.assertEqual(function(value), 'abc')
+        value.fingerprint = 'changed'
+        self.assertEqual(function(value), 'abc')
+        self.assertEqual(len(calls), 1)
+
+        other_value = ThirdPartyValue('other')
+        self.assertEqual(function(other_value), 'other')
+        self.assertEqual(len(calls), 2)
+
+    def test_cached_fingerprint_is_removed_with_value(self):
+        function = cached_fingerprint(lambda value: value.fingerprint)
+        value = ThirdPartyValue('abc')
+        function(value)
+        self.assertEqual(len(function.__closure__[0].cell_contents), 1)
+        del value
+        gc.collect()
+        self.assertEqual(len(function.__closure__[0].cell_contents), 0)
+
+    def test_cached_fingerprint_works_for_values_without_weakref(self):
+        function = cached_fingerprint(lambda value: str(value))
+        self.assertEqual(function(1), '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 import importlib
+import io
 import json
 import os
 import unittest
 
-from bandsaw.identifier import identifier_from_string
+from bandsaw.identifier import Hasher, identifier_from_string
+from bandsaw.serialization import JsonSerializer
 
 
 class TestIdentifierFromString(unittest.TestCase):
@@ -64,5 +66,49 @@ class TestIdentifierFromString(unittest.TestCase):
             identifier_from_string(json.dumps(value))
 
 
+class TestHasher(unittest.TestCase):
+
+    def test_default_hasher_derives_same_identifiers(self):
+        self.assertEqual(
+            Hasher().identifier_from_string('value'),
+            identifier_from_string('value'),
+        )
+        self.assertTrue(Hasher().is_default)
+
+    def test_other_algorithms_derive_different_identifiers(self):
+        hasher = Hasher('blake2b', digest_size=16)
+        self.assertFalse(hasher.is_default)
+        identifier = hasher.identifier_from_string('value')
+        self.assertNotEqual(identifier, identifier_from_string('value'))
+        self.assertEqual(len(identifier), 16)
+
+    def test_name_contains_parameters(self):
+        self.assertEqual(Hasher().name, 'sha256')
+        self.assertEqual(
+            Hasher('blake2b', digest_size=16).name, 'blake2b(digest_size=16)'
+        )
+
+    def test_hashers_with_same_name_are_equal(self):
+        self.assertEqual(Hasher('blake2b'), Hasher('blake2b'))
+        self.assertEqual(hash(Hasher('blake2b')), hash(Hasher('blake2b')))
+        self.assertNotEqual(Hasher('blake2b'), Hasher('blake2b', digest_size=8))
+        self.assertNotEqual(Hasher(), 'sha256')
+
+    def test_unknown_algorithm_raises(self):
+        with self.assertRaises(ValueError):
+            Hasher('not-existing')
+
+    def test_algorithm_with_variable_length_raises(self):
+        with self.assertRaisesRegex(ValueError, "can't be used for identifiers"):
+            Hasher('shake_128')
+
+    def test_hasher_can_be_serialized(self):
+        serializer = JsonSerializer()
+        stream = io.BytesIO()
+        serializer.serialize(Hasher('blake2b', digest_size=8), stream)
+        stream.seek(0)
+        self.assertEqual(serializer.deserialize(stream).name, 'blake2b(digest_size=8)')
+
+
 if __name__ == '__main__':
     unittest.main()
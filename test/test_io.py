@@ -1,7 +1,14 @@
+import hashlib
 import io
+import tempfile
 import unittest
 
-from bandsaw.io import BytearrayGeneratorToStream, read_stream_to_generator
+from bandsaw.io import (
+    MappedFileStream,
+    BytearrayGeneratorToStream,
+    HashingStream,
+    read_stream_to_generator,
+)
 
 
 def generator(count=1, size=1):
@@ -63,5 +70,117 @@ class TestReadStreamToGenerator(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class TestHashingStream(unittest.TestCase):
+
+    def test_written_bytes_update_hash(self):
+        stream = HashingStream(hashlib.sha256())
+        stream.write(b'123')
+        stream.write(bytearray(b'45'))
+        stream.write(memoryview(b'6789'))
+        self.assertEqual(
+            stream.hash.hexdigest(), hashlib.sha256(b'123456789').hexdigest()
+        )
+
+    def test_written_bytes_are_forwarded_to_stream(self):
+        target = io.BytesIO()
+        stream = HashingStream(hashlib.sha256(), target)
+        stream.write(b'123')
+        stream.write(b'45')
+        self.assertEqual(target.getvalue(), b'12345')
+        self.assertEqual(stream.hash.hexdigest(), hashlib.sha256(b'12345').hexdigest())
+
+    def test_write_returns_number_of_bytes(self):
+        stream = HashingStream(hashlib.sha256())
+        self.assertEqual(stream.write(b'12345'), 5)
+
+    def test_tell_returns_number_of_written_bytes(self):
+        stream = HashingStream(hashlib.sha256())
+        stream.write(b'12345')
+        stream.write(b'678')
+        self.assertEqual(stream.tell(), 8)
+
+    def test_stream_is_writable_but_not_readable(self):
+        stream = HashingStream(hashlib.sha256())
+        self.assertTrue(stream.writable())
+        self.assertFalse(stream.readable())
+
+    def test_stream_can_be_wrapped_by_text_stream(self):
+        stream = HashingStream(hashlib.sha256())
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8')
+        text_stream.write('äöü')
+        text_stream.detach()
+        self.assertEqual(
+            stream.hash.hexdigest(),
+            hashlib.sha256('äöü'.encode('utf-8')).hexdigest(),
+        )
+
+
+class TestMappedFileStream(unittest.TestCase):
+
+    def setUp(self):
+        self.file = tempfile.TemporaryFile()
+        self.file.write(b'0123456789')
+        self.file.flush()
+
+    def tearDown(self):
+        self.file.close()
+
+    def test_stream_starts_at_position_of_file(self):
+        self.file.seek(4)
+        stream = MappedFileStream.from_stream(self.file)
+        self.assertIsInstance(stream, MappedFileStream)
+        self.assertEqual(stream.tell(), 4)
+        self.assertEqual(stream.read(), b'456789')
+        self.assertTrue(self.file.closed)
+
+    def test_read_and_readinto(self):
+        self.file.seek(0)
+        stream = MappedFileStream.from_stream(self.file)
+        self.assertEqual(stream.read(3), b'012')
+        buffer = bytearray(4)
+        self.assertEqual(stream.readinto(buffer), 4)
+        self.assertEqual(buffer, b'3456')
+        self.assertEqual(stream.readinto(buffer), 3)
+        self.assertEqual(stream.read(), b'')
+        self.assertEqual(stream.tell(), 10)
+
+    def test_seek(self):
+        stream = MappedFileStream.from_stream(self.file)
+        self.assertEqual(stream.seek(-2, io.SEEK_END), 8)
+        self.assertEqual(stream.seek(-3, io.SEEK_CUR), 5)
+        with self.assertRaises(ValueError):
+            stream.seek(-1)
+
+    def test_buffer_contains_whole_file(self):
+        self.file.seek(5)
+        stream = MappedFileStream.from_stream(self.file)
+        self.assertEqual(bytes(stream.buffer), b'0123456789')
+
+    def test_views_stay_valid_after_close(self):
+        stream = MappedFileStream.from_stream(self.file)
+        view = stream.buffer[2:5]
+        stream.close()
+        self.assertEqual(bytes(view), b'234')
+
+    def test_views_are_copy_on_write(self):
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(b'0123456789')
+            file.flush()
+            with open(file.name, 'rb') as read_file:
+                stream = MappedFileStream.from_stream(read_file)
+            stream.buffer[0] = ord('x')
+            self.assertEqual(stream.read(1), b'x')
+            with open(file.name, 'rb') as read_file:
+                self.assertEqual(read_file.read(), b'0123456789')
+
+    def test_streams_without_regular_file_are_not_mapped(self):
+        stream = io.BytesIO(b'data')
+        self.assertIs(MappedFileStream.from_stream(stream), stream)
+
+    def test_empty_files_are_not_mapped(self):
+        with tempfile.TemporaryFile() as file:
+            self.assertIs(MappedFileStream.from_stream(file), file)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,14 @@
+import io
+import json
 import pathlib
 import tempfile
 import unittest.mock
 
-from bandsaw.runner import main
+from bandsaw.runner import main, _read_into_memory, _run_worker
+
+
+def _save_session(stream, reference_attachments=False):
+    stream.write(b'continued')
 
 
 class TestMain(unittest.TestCase):
@@ -28,6 +34,96 @@ class TestMain(unittest.TestCase):
         ))
         set_run_id_mock.assert_called_with('my-run-id')
 
+    @unittest.mock.patch('bandsaw.runner.set_run_id')
+    @unittest.mock.patch('bandsaw.runner.Session')
+    def test_main_requires_input_and_output_without_worker(
+        self, session_mock, set_run_id_mock,
+    ):
+        with self.assertRaises(SystemExit):
+            main(args=('--run-id', 'my-run-id'))
+
+
+class TestWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.session_patcher = unittest.mock.patch('bandsaw.runner.Session')
+        self.session_mock = self.session_patcher.start()
+        self.session_mock.return_value.save.side_effect = _save_session
+
+    def tearDown(self):
+        self.session_patcher.stop()
+
+    def test_worker_continues_sessions_from_files(self):
+        input_path = pathlib.Path(tempfile.mkstemp()[1])
+        output_path = pathlib.Path(tempfile.mkstemp()[1])
+        request = {'input': str(input_path), 'output': str(output_path)}
+        requests = io.BytesIO(((json.dumps(request) + '\n') * 2).encode())
+        responses = io.BytesIO()
+
+        _run_worker(requests, responses)
+
+        self.assertEqual(2, self.session_mock.return_value.proceed.call_count)
+        self.assertEqual(b'continued', output_path.read_bytes())
+        response_lines = responses.getvalue().splitlines()
+        self.assertEqual([{'status': 'ok'}] * 2, [json.loads(l) for l in response_lines])
+        input_path.unlink()
+        output_path.unlink()
+
+    def test_worker_transfers_sessions_via_pipe(self):
+        request = {'input': '-', 'output': '-', 'size': 7}
+        requests = io.BytesIO(json.dumps(request).encode() + b'\nsession')
+        responses = io.BytesIO()
+        restored = []
+        self.session_mock.return_value.restore.side_effect = (
+            lambda stream: restored.append(stream.getvalue())
+        )
+
+        _run_worker(requests, responses)
+
+        self.assertEqual([b'session'], restored)
+        response_line, payload = responses.getvalue().split(b'\n', 1)
+        self.assertEqual({'status': 'ok', 'size': 9}, json.loads(response_line))
+        self.assertEqual(b'continued', payload)
+
+    def test_worker_saves_sessions_with_referenced_attachments(self):
+        request = {
+            'input': '-', 'output': '-', 'size': 7, 'reference_attachments': True,
+        }
+        requests = io.BytesIO(json.dumps(request).encode() + b'\nsession')
+
+        _run_worker(requests, io.BytesIO())
+
+        save_call = self.session_mock.return_value.save.call_args
+        self.assertTrue(save_call[1]['reference_attachments'])
+
+    def test_worker_raises_on_incomplete_session(self):
+        request = {'input': '-', 'output': '-', 'size': 100}
+        requests = io.BytesIO(json.dumps(request).encode() + b'\nsession')
+
+        with self.assertRaisesRegex(EOFError, "not transferred completely"):
+            _run_worker(requests, io.BytesIO())
+
+
+@unittest.mock.patch('bandsaw.runner._CHUNK_SIZE', 3)
+class TestReadIntoMemory(unittest.TestCase):
+
+    def test_stream_is_read_until_its_end(self):
+        stream = _read_into_memory(io.BytesIO(b'my session'))
+
+        self.assertEqual(b'my session', stream.read())
+
+    def test_only_size_bytes_are_read(self):
+        source = io.BytesIO(b'my session and more')
+
+        stream = _read_into_memory(source, 10)
+
+        self.assertEqual(b'my session', stream.read())
+        self.assertEqual(b' and more', source.read())
+
+    def test_incomplete_session_raises(self):
+        with self.assertRaisesRegex(EOFError, "not transferred completely"):
+            _read_into_memory(io.BytesIO(b'my session'), 11)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,19 @@
 import collections
 import io
+import mmap
+import pickle
+import tempfile
 import unittest
 
 from bandsaw.context import Context
 from bandsaw.result import Result
 from bandsaw.execution import Execution
-from bandsaw.serialization import SerializableValue, JsonSerializer
+from bandsaw.io import MappedFileStream
+from bandsaw.serialization import (
+    SerializableValue,
+    JsonSerializer,
+    PickleSerializer,
+)
 
 
 class MyCustomException(Exception):
@@ -181,5 +189,113 @@ class TestJsonSerializationProvider(unittest.TestCase):
         self.assertEqual(deserialized_result, result)
 
 
+class UnseekableStream(io.RawIOBase):
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._stream.readinto(buffer)
+
+
+class TestPickleSerializer(unittest.TestCase):
+
+    def test_roundtrip_without_out_of_band(self):
+        serializer = PickleSerializer()
+        stream = io.BytesIO()
+        serializer.serialize({'a': [1, 2]}, stream)
+        stream.seek(0)
+        self.assertEqual(serializer.deserialize(stream), {'a': [1, 2]})
+
+    def test_out_of_band_roundtrip_from_memory(self):
+        serializer = PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        data = bytearray(range(256)) * 10
+        stream = io.BytesIO()
+        serializer.serialize(
+            {'large': pickle.PickleBuffer(data), 'small': b'small'}, stream
+        )
+        self.assertNotIn(bytes(data), stream.getvalue()[:200])
+        stream.seek(0)
+        value = serializer.deserialize(stream)
+        self.assertEqual(bytes(value['large']), bytes(data))
+        self.assertEqual(value['small'], b'small')
+        self.assertEqual(stream.read(), b'')
+
+    def test_out_of_band_buffers_are_mapped_from_files(self):
+        serializer = PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        data = bytearray(b'x' * 1000)
+        with tempfile.TemporaryFile() as stream:
+            stream.write(b'prefix')
+            serializer.serialize([pickle.PickleBuffer(data), 'next'], stream)
+            stream.write(b'suffix')
+            stream.seek(6)
+            value = serializer.deserialize(stream)
+            self.assertEqual(stream.read(), b'suffix')
+
+            buffer = value[0]
+            self.assertIsInstance(buffer.obj, mmap.mmap)
+            self.assertEqual(bytes(buffer), bytes(data))
+            self.assertEqual(value[1], 'next')
+
+            buffer[0] = ord('y')
+            stream.seek(0)
+            self.assertNotIn(b'y', stream.read())
+
+    def test_out_of_band_buffers_are_views_into_mapped_stream(self):
+        serializer = PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        data = bytearray(b'x' * 1000)
+        with tempfile.TemporaryFile() as file:
+            serializer.serialize(pickle.PickleBuffer(data), file)
+            file.seek(0)
+            stream = MappedFileStream.from_stream(file)
+            value = serializer.deserialize(stream)
+
+        self.assertEqual(bytes(value), bytes(data))
+        self.assertIs(value.obj, stream.buffer.obj)
+        stream.close()
+        self.assertEqual(bytes(value), bytes(data))
+
+    def test_out_of_band_buffers_are_aligned(self):
+        serializer = PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        data = bytearray(b'x' * 100)
+        stream = io.BytesIO()
+        serializer.serialize(pickle.PickleBuffer(data), stream)
+        self.assertEqual(stream.getvalue().index(b'x' * 100) % 64, 0)
+
+    def test_out_of_band_from_unseekable_stream(self):
+        serializer = PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        data = bytearray(b'x' * 1000)
+        stream = io.BytesIO()
+        serializer.serialize([pickle.PickleBuffer(data)] * 2, stream)
+        value = serializer.deserialize(UnseekableStream(stream.getvalue()))
+        self.assertEqual([bytes(v) for v in value], [bytes(data)] * 2)
+
+    def test_small_buffers_are_pickled_in_band(self):
+        serializer = PickleSerializer(out_of_band=True)
+        stream = io.BytesIO()
+        serializer.serialize(pickle.PickleBuffer(bytearray(b'x' * 100)), stream)
+        stream.seek(0)
+        self.assertEqual(serializer.deserialize(stream), bytearray(b'x' * 100))
+
+    def test_out_of_band_reads_values_pickled_without(self):
+        stream = io.BytesIO()
+        PickleSerializer().serialize({'a': 1}, stream)
+        serializer = PickleSerializer(out_of_band=True)
+        stream.seek(0)
+        self.assertEqual(serializer.deserialize(stream), {'a': 1})
+        self.assertEqual(
+            serializer.deserialize(UnseekableStream(stream.getvalue())), {'a': 1}
+        )
+
+    def test_truncated_out_of_band_data_raises(self):
+        serializer = PickleSerializer(out_of_band=True, out_of_band_threshold=16)
+        stream = io.BytesIO()
+        serializer.serialize(pickle.PickleBuffer(bytearray(b'x' * 1000)), stream)
+        with self.assertRaises(EOFError):
+            serializer.deserialize(UnseekableStream(stream.getvalue()[:-10]))
+
+
 if __name__ == '__main__':
     unittest.main()
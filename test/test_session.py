@@ -11,6 +11,8 @@ from bandsaw.advice import Advice
 from bandsaw.config import Configuration
 from bandsaw.extensions import Extension
 from bandsaw.execution import Execution
+from bandsaw.result import Result
+from bandsaw.serialization import JsonSerializer
 from bandsaw.session import Attachment, Attachments, Session, Ids, _Moderator
 
 
@@ -129,6 +131,18 @@ class TestIds(unittest.TestCase):
         self.assertNotEqual(ids, string)
 
 
+class UnseekableStream(io.RawIOBase):
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
 class MyTask:
 
     def __init__(self, task_id='t'):
@@ -141,8 +155,13 @@ class MyTask:
 
 class MySavingAdvice(Advice):
 
+    def __init__(self):
+        self.streams = []
+        super().__init__()
+
     def before(self, session):
         stream = io.BytesIO()
+        self.streams.append(stream)
         session.save(stream)
         stream.seek(0)
 
@@ -204,7 +223,8 @@ class TestSession(unittest.TestCase):
 
     def setUp(self):
         self.config = Configuration()
-        self.config.add_advice_chain(MySavingAdvice(), name='save')
+        self.saving_advice = MySavingAdvice()
+        self.config.add_advice_chain(self.saving_advice, name='save')
 
     def test_session_contains_session_id(self):
         session = Session(MyTask(), Execution('1'), self.config)
@@ -316,6 +336,28 @@ class TestSession(unittest.TestCase):
             result = session.initiate()
             self.assertTrue(result)
 
+    def test_restored_stream_is_closed_when_session_is_finished(self):
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config, 'save')
+            session.initiate()
+
+        self.assertTrue(self.saving_advice.streams[0].closed)
+
+    def test_restored_stream_is_closed_when_session_is_restored_again(self):
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config)
+            first_stream = io.BytesIO()
+            session.save(first_stream)
+            second_stream = io.BytesIO(first_stream.getvalue())
+            first_stream.seek(0)
+
+            restored_session = Session().restore(first_stream)
+            restored_session.restore(second_stream)
+
+            self.assertTrue(first_stream.closed)
+            self.assertFalse(second_stream.closed)
+            self.assertTrue(restored_session.task.execute(None))
+
     def test_session_restore_updates_configuration(self):
         with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
             session = Session(MyTask(), Execution('1'), self.config)
@@ -333,6 +375,19 @@ class TestSession(unittest.TestCase):
             self.assertEqual(session._advice_chain, restored_session._advice_chain)
             self.assertEqual(session.context, restored_session.context)
 
+    def test_session_restore_raises_with_different_hash_algorithm(self):
+        session = Session(MyTask(), Execution('1'), self.config)
+        stream = io.BytesIO()
+        session.save(stream)
+        stream.seek(0)
+
+        other_config = Configuration().set_hash_algorithm('blake2b')
+        with unittest.mock.patch(
+            "bandsaw.session.get_configuration", return_value=other_config
+        ):
+            with self.assertRaisesRegex(ValueError, "hash algorithm 'sha256'"):
+                Session().restore(stream)
+
     def test_session_restore_includes_attachments(self):
         with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
             session = Session(MyTask(), Execution('1'), self.config)
@@ -353,6 +408,159 @@ class TestSession(unittest.TestCase):
                 restored_session.attachments['my.attachment'].open().read(),
             )
 
+    def test_session_restore_with_json_serializer(self):
+        self.config.set_serializer(JsonSerializer())
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(None, Execution('1', ['a'] * 1000), self.config)
+            session._ids = Ids('t', 'e', 'r')
+            session.result = Result(value={'my': 'result'})
+
+            stream = io.BytesIO()
+            session.save(stream)
+            stream.seek(0)
+
+            restored_session = Session().restore(stream)
+
+            self.assertEqual(session.execution.args, restored_session.execution.args)
+            self.assertEqual(session.result, restored_session.result)
+
+    def test_session_can_be_saved_to_unseekable_stream(self):
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config)
+            session.attachments['my.attachment'] = __file__
+
+            stream = UnseekableStream()
+            session.save(stream)
+            stream.buffer.seek(0)
+
+            restored_session = Session().restore(stream.buffer)
+
+            self.assertEqual(session.session_id, restored_session.session_id)
+            self.assertIn('my.attachment', restored_session.attachments)
+
+    def test_session_is_saved_with_configured_compression(self):
+        self.config.set_session_compression(
+            'deflate', entries={'attachments/*.py': 'stored'},
+        )
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config)
+            session.attachments['my.py'] = __file__
+
+            stream = io.BytesIO()
+            session.save(stream)
+
+            with zipfile.ZipFile(stream) as archive:
+                for name in ('session.json', 'run.json', 'task.dat', 'result.dat'):
+                    self.assertEqual(
+                        zipfile.ZIP_DEFLATED, archive.getinfo(name).compress_type,
+                    )
+                self.assertEqual(
+                    zipfile.ZIP_STORED,
+                    archive.getinfo('attachments/my.py').compress_type,
+                )
+
+            stream.seek(0)
+            restored_session = Session().restore(stream)
+            self.assertEqual(
+                pathlib.Path(__file__).read_bytes(),
+                restored_session.attachments['my.py'].open().read(),
+            )
+
+    def test_restored_values_are_deserialized_on_first_access(self):
+        serializer = unittest.mock.Mock(wraps=self.config.serializer)
+        self.config.set_serializer(serializer)
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1', ('arg',)), self.config)
+            session.result = Result(value='my-result')
+
+            stream = io.BytesIO()
+            session.save(stream)
+            stream.seek(0)
+
+            restored_session = Session().restore(stream)
+            serializer.deserialize.assert_not_called()
+
+            self.assertEqual(Result(value='my-result'), restored_session.result)
+            self.assertEqual(1, serializer.deserialize.call_count)
+
+            self.assertEqual(Result(value='my-result'), restored_session.result)
+            self.assertEqual(1, serializer.deserialize.call_count)
+
+    def test_assigned_values_replace_restored_values_without_deserializing(self):
+        serializer = unittest.mock.Mock(wraps=self.config.serializer)
+        self.config.set_serializer(serializer)
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config)
+            session.result = Result(value='my-result')
+
+            stream = io.BytesIO()
+            session.save(stream)
+            stream.seek(0)
+
+            restored_session = Session().restore(stream)
+            restored_session.result = Result(value='other-result')
+
+            self.assertEqual(Result(value='other-result'), restored_session.result)
+            serializer.deserialize.assert_not_called()
+
+    def test_values_not_accessed_are_saved_without_deserializing(self):
+        serializer = unittest.mock.Mock(wraps=self.config.serializer)
+        self.config.set_serializer(serializer)
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1', ('arg',)), self.config)
+
+            stream = io.BytesIO()
+            session.save(stream)
+            stream.seek(0)
+            restored_session = Session().restore(stream)
+            restored_session.result = Result(value='my-result')
+
+            serializer.reset_mock()
+            second_stream = io.BytesIO()
+            restored_session.save(second_stream)
+            second_stream.seek(0)
+            serializer.deserialize.assert_not_called()
+            self.assertEqual(1, serializer.serialize.call_count)
+
+            second_restored_session = Session().restore(second_stream)
+            self.assertEqual(('arg',), second_restored_session.execution.args)
+            self.assertEqual('t', second_restored_session.task.task_id)
+            self.assertEqual(Result(value='my-result'), second_restored_session.result)
+
+    def test_attachments_can_be_saved_as_references(self):
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config)
+            session.attachments['my.attachment'] = __file__
+            temporary_file = session.temp_dir / 'temporary.attachment'
+            temporary_file.write_bytes(b'temporary')
+            session.attachments['temporary.attachment'] = temporary_file
+
+            stream = io.BytesIO()
+            session.save(stream, reference_attachments=True)
+
+            with zipfile.ZipFile(stream) as archive:
+                self.assertNotIn('attachments/my.attachment', archive.namelist())
+                self.assertIn('attachments/temporary.attachment', archive.namelist())
+
+            stream.seek(0)
+            restored_session = Session().restore(stream)
+            with restored_session.attachments['my.attachment'].open() as attachment:
+                self.assertEqual(pathlib.Path(__file__).read_bytes(), attachment.read())
+            with restored_session.attachments['temporary.attachment'].open() as attachment:
+                self.assertEqual(b'temporary', attachment.read())
+
+    def test_attachments_are_copied_by_default(self):
+        with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
+            session = Session(MyTask(), Execution('1'), self.config)
+            session.attachments['my.attachment'] = __file__
+
+            stream = io.BytesIO()
+            session.save(stream)
+
+            with zipfile.ZipFile(stream) as archive:
+                self.assertIn('attachments/my.attachment', archive.namelist())
+                self.assertNotIn('attachments.json', archive.namelist())
+
     def test_restored_session_has_same_session_id(self):
         with unittest.mock.patch("bandsaw.session.get_configuration", return_value=self.config):
             session = Session(MyTask(), Execution('1'), self.config)
@@ -1,6 +1,7 @@
 import functools
 import unittest
 
+from bandsaw.identifier import Hasher
 from bandsaw.tasks import Task, _FunctionTask
 
 
@@ -44,6 +45,17 @@ class TestTask(unittest.TestCase):
         task_v2 = Task.create_task(free_function, {'version': 2})
         self.assertNotEqual(task_v1.task_id, task_v2.task_id)
 
+    def test_task_id_depends_on_hasher(self):
+        default_task = Task.create_task(free_function)
+        sha256_task = Task.create_task(free_function, hasher=Hasher('sha256'))
+        blake2b_task = Task.create_task(free_function, hasher=Hasher('blake2b'))
+        short_blake2b_task = Task.create_task(
+            free_function, hasher=Hasher('blake2b', digest_size=8)
+        )
+        self.assertEqual(default_task.task_id, sha256_task.task_id)
+        self.assertNotEqual(default_task.task_id, blake2b_task.task_id)
+        self.assertNotEqual(blake2b_task.task_id, short_blake2b_task.task_id)
+
     def test_task_signature_from_free_function(self):
         task = Task.create_task(function_with_arguments)
 
@@ -70,6 +82,14 @@ class TestTask(unittest.TestCase):
         self.assertEqual(task.task_id, deserialized_task.task_id)
         self.assertIs(task.function, deserialized_task.function)
 
+    def test_free_function_tasks_keep_hasher_when_serialized(self):
+        task = Task.create_task(free_function, hasher=Hasher('blake2b'))
+        serialized = task.serialized()
+        deserialized_task = _FunctionTask.deserialize(serialized)
+
+        self.assertEqual(task.hasher, deserialized_task.hasher)
+        self.assertEqual(task.task_id, deserialized_task.task_id)
+
     def test_function_returns_wrapped_function(self):
         task = Task.create_task(wrapped_function)
         result = task.function()
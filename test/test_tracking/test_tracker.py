@@ -58,6 +58,7 @@ class TestTrackerExtension(unittest.TestCase):
             'id': 'f751aa54092bf489',
             'definition': 'test_tracking.test_tracker.my_function',
             'advice_parameters': {},
+            'hasher': 'sha256',
         }, task_info['task'])
 
     def test_tracker_on_session_created_tracks_task_only_once(self):